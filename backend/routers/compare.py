@@ -1,7 +1,10 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
+from typing import Optional, Union
 import os
 from excel.engine import load_excel, compare_dataframes
+from excel.selection import SheetSelection, parse_columns
+from excel.diff import numeric_tolerance
 
 router = APIRouter()
 
@@ -10,6 +13,24 @@ TEMP_DIR = "temp"
 class CompareRequest(BaseModel):
     file1: str
     file2: str
+    # A1 range ("B2:K500", "A:K") or defined name
+    cell_range: Optional[str] = None
+    # Column subset, e.g. "A:K,M"
+    columns: Optional[str] = None
+    # Number of leading rows to skip, or a row spec such as "1:3,10"
+    skip_rows: Optional[Union[int, str]] = None
+    # Numbers within any of these tolerances compare equal (0 = exact)
+    abs_tolerance: Optional[float] = None
+    rel_tolerance: Optional[float] = None
+    ulp_tolerance: Optional[int] = None
+    # Align inserted / deleted rows instead of comparing strictly by position
+    align_rows: bool = False
+    # Match inserted / deleted / moved columns by content and header text
+    align_columns: bool = False
+    # 0-based row of the header text used by align_columns
+    header_row: Optional[int] = None
+    # Key columns, e.g. "A" or "A,C": match records by key instead of position
+    key_columns: Optional[str] = None
 
 @router.post("/compare")
 async def compare_files(request: CompareRequest):
@@ -23,10 +44,25 @@ async def compare_files(request: CompareRequest):
         raise HTTPException(status_code=404, detail="One or both files not found.")
         
     try:
-        df1 = load_excel(file1_path)
-        df2 = load_excel(file2_path)
+        selection = SheetSelection.from_options(request.cell_range, request.columns, request.skip_rows)
+        key_columns = parse_columns(request.key_columns)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid selection: {str(e)}")
+    try:
+        tolerance = numeric_tolerance(request.abs_tolerance, request.rel_tolerance, request.ulp_tolerance)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        df1 = load_excel(file1_path, selection)
+        df2 = load_excel(file2_path, selection)
         
-        result = compare_dataframes(df1, df2)
+        result = compare_dataframes(
+            df1, df2, tolerance, request.align_rows, request.align_columns, request.header_row,
+            key_columns or None,
+        )
+        # Change records are only stringified here, for the JSON response
+        result["changes"] = result["changes"].to_records()
         return result
         
     except Exception as e:
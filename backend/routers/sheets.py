@@ -1,6 +1,6 @@
 from fastapi import APIRouter, HTTPException
 import os
-from excel.reader import get_sheet_names, get_sheet_data
+from excel.reader import get_workbook_info, get_sheet_data
 
 router = APIRouter()
 
@@ -18,8 +18,8 @@ async def list_sheets(filename: str):
         raise HTTPException(status_code=404, detail=f"File not found at {os.path.abspath(file_path)}")
         
     try:
-        sheets = get_sheet_names(file_path)
-        return {"filename": filename, "sheets": sheets}
+        info = get_workbook_info(file_path)
+        return {"filename": filename, **info}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
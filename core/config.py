@@ -62,3 +62,43 @@ def pop_pending_update():
     payload = data.pop("pending_update", None)
     save_config(data)
     return payload
+
+
+def get_parse_cache_budget_mb(default=1024):
+    data = load_config()
+    value = data.get("parse_cache_budget_mb")
+    if value is None:
+        return default
+    try:
+        return max(0, int(value))
+    except (TypeError, ValueError):
+        return default
+
+
+def set_parse_cache_budget_mb(value):
+    data = load_config()
+    data["parse_cache_budget_mb"] = max(0, int(value))
+    save_config(data)
+
+
+def get_numeric_tolerance():
+    """(abs_tol, rel_tol, ulps) for numeric comparisons; zeros mean exact."""
+    data = load_config().get("numeric_tolerance") or {}
+    try:
+        return (
+            max(0.0, float(data.get("abs", 0.0))),
+            max(0.0, float(data.get("rel", 0.0))),
+            max(0, int(data.get("ulps", 0))),
+        )
+    except (TypeError, ValueError, AttributeError):
+        return (0.0, 0.0, 0)
+
+
+def set_numeric_tolerance(abs_tol, rel_tol, ulps):
+    data = load_config()
+    data["numeric_tolerance"] = {
+        "abs": max(0.0, float(abs_tol)),
+        "rel": max(0.0, float(rel_tol)),
+        "ulps": max(0, int(ulps)),
+    }
+    save_config(data)
@@ -1,4 +1,5 @@
 import sys
+import multiprocessing
 from pathlib import Path
 from PyQt6.QtWidgets import QApplication, QSplashScreen
 from PyQt6.QtGui import QPixmap, QPainter, QColor, QPen, QPainterPath
@@ -153,4 +154,6 @@ def main():
     sys.exit(app.exec())
 
 if __name__ == "__main__":
+    # Needed for the workbook parser processes in the frozen build
+    multiprocessing.freeze_support()
     main()
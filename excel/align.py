@@ -0,0 +1,775 @@
+"""Row alignment between two versions of a sheet.
+
+Every row is reduced to a 64-bit hash of its cell values. The two hash
+sequences are diffed patience-style: common prefix/suffix first, then rows
+whose hash is unique on both sides act as anchors (longest increasing
+subsequence), recursing into the gaps between them. Unmatched rows facing
+each other in a gap are paired as modified when enough of their cells agree;
+the rest are reported as removed or added.
+
+Before that pairing, runs of unmatched rows that reappear unchanged elsewhere
+are reported as moved blocks (find_moves): every window of MOVE_MIN_ROWS
+consecutive row hashes gets a fingerprint, windows unique on both sides are
+joined, chained along their diagonals and grown to full blocks.
+
+Record tables can instead be aligned on key columns (align_by_key): rows are
+hash-joined on their key cells, duplicates paired by occurrence.
+
+The result is a RowAlignment: parallel arrays of old row, new row (-1 for a
+gap on that side) and row kind, in display order, plus the moved blocks.
+A moved row shows up twice, at its old place and at its new one.
+
+Columns are matched before that (align_columns): by header text when a
+header row is given, then by content. Each column gets a sketch of its
+smallest distinct cell hashes (bottom-k MinHash), so a column still matches
+after rows were inserted, deleted or edited; pairs are taken greedily by
+similarity. The result is a ColumnAlignment in the same shape.
+"""
+import difflib
+from bisect import bisect_left
+
+import numpy as np
+import pandas as pd
+
+from excel.diff import _numeric_types, _to_str, _type_of, cell_texts
+
+ROW_EQUAL = 0
+ROW_MODIFIED = 1
+ROW_ADDED = 2
+ROW_REMOVED = 3
+ROW_MOVED = 4
+ROW_KIND_NAMES = ("equal", "modified", "added", "removed", "moved")
+
+COL_MATCHED = 0
+COL_MOVED = 1
+COL_ADDED = 2
+COL_REMOVED = 3
+COL_KIND_NAMES = ("matched", "moved", "added", "removed")
+
+# Share of non-empty cells two facing rows must have in common to count as
+# one modified row rather than a removal plus an insertion.
+MODIFIED_SIMILARITY = 0.5
+# Largest gap (old rows x new rows) handed to difflib when it has no anchors.
+_DIFFLIB_LIMIT = 4_000_000
+# Shortest run of consecutive rows reported as a moved block.
+MOVE_MIN_ROWS = 3
+# Estimated share of distinct values two columns must have in common to be
+# paired by content.
+COLUMN_SIMILARITY = 0.5
+# Distinct cell hashes kept per column sketch.
+SKETCH_SIZE = 128
+# Most duplicate keys listed in a key-matching result.
+DUPLICATE_KEY_LIMIT = 1000
+
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+_EMPTY_HASH = np.uint64(0)
+# Values that are neither numbers nor strings hash by their text, under their
+# own key so that a date never hashes like the string it prints as.
+_OTHER_HASH_KEY = "excel.align.othr"
+
+
+def _nonzero_hashes(values, **kwargs):
+    hashes = pd.util.hash_array(values, **kwargs)
+    # 0 is reserved for empty cells
+    hashes[hashes == _EMPTY_HASH] = 1
+    return hashes
+
+
+def cell_hashes(column):
+    """uint64 hash per cell of a 1-D object array; empty cells hash to 0 and numbers by value."""
+    hashes = np.zeros(len(column), dtype=np.uint64)
+    if not len(column):
+        return hashes
+    kind = pd.api.types.infer_dtype(column, skipna=False)
+    if kind in ("floating", "integer", "mixed-integer-float"):
+        floats = column.astype(np.float64) + 0.0
+        hashes = _nonzero_hashes(floats)
+        hashes[np.isnan(floats)] = _EMPTY_HASH
+        return hashes
+    if kind == "string":
+        return _nonzero_hashes(column, categorize=False)
+    types = _type_of(column)
+    numeric = _numeric_types(types)
+    if numeric.any():
+        # + 0.0 folds -0.0 into 0.0, so 1, 1.0 and True hash alike; NaN is empty
+        floats = column[numeric].astype(np.float64) + 0.0
+        numeric_hashes = _nonzero_hashes(floats)
+        numeric_hashes[np.isnan(floats)] = _EMPTY_HASH
+        hashes[numeric] = numeric_hashes
+    strings = types == str
+    if strings.any():
+        hashes[strings] = _nonzero_hashes(column[strings], categorize=False)
+    other = np.flatnonzero(~(numeric | strings | (types == type(None))))
+    if len(other):
+        values = column[other]
+        present = ~pd.isna(values)
+        if present.any():
+            hashes[other[present]] = _nonzero_hashes(
+                _to_str(values[present]).astype(object), categorize=False, hash_key=_OTHER_HASH_KEY
+            )
+    return hashes
+
+
+def _finalize(hashes):
+    """splitmix64 finalizer over a uint64 array."""
+    hashes = hashes ^ (hashes >> np.uint64(30))
+    hashes *= np.uint64(0xBF58476D1CE4E5B9)
+    hashes ^= hashes >> np.uint64(27)
+    hashes *= np.uint64(0x94D049BB133111EB)
+    return hashes ^ (hashes >> np.uint64(31))
+
+
+def positioned(cells, position, salt=0):
+    """
+    Hash contribution of cells at a column (or flat cell) position: 0 for
+    empty cells, so empty cells never change a row hash.
+    """
+    with np.errstate(over="ignore"):
+        key = np.uint64(salt) * _MIX + (np.asarray(position, dtype=np.uint64) + np.uint64(1)) * _MIX
+        contribution = _finalize(cells ^ key)
+    return np.where(cells == _EMPTY_HASH, _EMPTY_HASH, contribution)
+
+
+def row_hashes(values, n_cols=None, salt=0):
+    """
+    uint64 hash per row of a 2-D object matrix, over the first n_cols columns:
+    the wrapping sum of each non-empty cell's hash mixed with its column. Empty
+    rows hash to 0 and trailing empty columns do not matter, so sheets of
+    different widths hash alike where their rows agree.
+    """
+    n_rows = values.shape[0]
+    n_cols = values.shape[1] if n_cols is None else n_cols
+    hashes = np.zeros(n_rows, dtype=np.uint64)
+    for c in range(min(n_cols, values.shape[1])):
+        hashes += positioned(cell_hashes(values[:, c]), c, salt)
+    return hashes
+
+
+class RowAlignment:
+    """
+    Aligned row order of two sheets.
+
+    - old_rows / new_rows: int64 source row per aligned row, -1 where that
+      side has a gap
+    - kinds: uint8 ROW_* code per aligned row
+    - moves: (blocks, 3) int64 array of moved blocks as
+      (old start row, new start row, row count)
+    """
+
+    def __init__(self, old_rows, new_rows, kinds, moves=None):
+        self.old_rows = np.asarray(old_rows, dtype=np.int64)
+        self.new_rows = np.asarray(new_rows, dtype=np.int64)
+        self.kinds = np.asarray(kinds, dtype=np.uint8)
+        self.moves = np.asarray(moves if moves is not None else [], dtype=np.int64).reshape(-1, 3)
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def counts(self):
+        counts = np.bincount(self.kinds, minlength=len(ROW_KIND_NAMES))
+        return {
+            "rows_added": int(counts[ROW_ADDED]),
+            "rows_removed": int(counts[ROW_REMOVED]),
+            "rows_modified": int(counts[ROW_MODIFIED]),
+            "rows_moved": int(self.moves[:, 2].sum()),
+            "blocks_moved": len(self.moves),
+        }
+
+    def to_dict(self):
+        """JSON-friendly form stored in compare results."""
+        return {
+            "old_rows": self.old_rows.tolist(),
+            "new_rows": self.new_rows.tolist(),
+            "kinds": np.asarray(ROW_KIND_NAMES, dtype=object)[self.kinds].tolist(),
+            "moves": [
+                {"old_start": old, "new_start": new, "rows": rows}
+                for old, new, rows in self.moves.tolist()
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        codes = {name: code for code, name in enumerate(ROW_KIND_NAMES)}
+        moves = [(m["old_start"], m["new_start"], m["rows"]) for m in data.get("moves", [])]
+        return cls(data["old_rows"], data["new_rows"], [codes[k] for k in data["kinds"]], moves)
+
+
+def take_rows(values, rows):
+    """Rows of a 2-D object matrix in aligned order; -1 gives an empty row."""
+    rows = np.asarray(rows, dtype=np.int64)
+    taken = np.full((len(rows), values.shape[1]), None, dtype=object)
+    present = rows >= 0
+    taken[present] = values[rows[present]]
+    return taken
+
+
+def _common_prefix(a, b):
+    n = min(len(a), len(b))
+    if not n:
+        return 0
+    differs = np.flatnonzero(a[:n] != b[:n])
+    return int(differs[0]) if len(differs) else n
+
+
+def _longest_increasing(seq):
+    """Indexes into seq of one longest strictly increasing subsequence."""
+    tails = []
+    tail_idx = []
+    parents = [-1] * len(seq)
+    for i, value in enumerate(seq):
+        k = bisect_left(tails, value)
+        if k == len(tails):
+            tails.append(value)
+            tail_idx.append(i)
+        else:
+            tails[k] = value
+            tail_idx[k] = i
+        parents[i] = tail_idx[k - 1] if k else -1
+    out = []
+    i = tail_idx[-1] if tail_idx else -1
+    while i >= 0:
+        out.append(i)
+        i = parents[i]
+    return out[::-1]
+
+
+def _unique_anchors(a, b):
+    """(pos_a, pos_b) of hashes occurring exactly once in both, forming an increasing chain."""
+    ua, ia, ca = np.unique(a, return_index=True, return_counts=True)
+    ub, ib, cb = np.unique(b, return_index=True, return_counts=True)
+    ua, ia = ua[ca == 1], ia[ca == 1]
+    ub, ib = ub[cb == 1], ib[cb == 1]
+    _common, ka, kb = np.intersect1d(ua, ub, assume_unique=True, return_indices=True)
+    if not len(_common):
+        return None
+    pos_a = ia[ka]
+    order = np.argsort(pos_a, kind="stable")
+    pos_a = pos_a[order]
+    pos_b = ib[kb][order]
+    if len(pos_b) > 1 and not np.all(np.diff(pos_b) > 0):
+        keep = _longest_increasing(pos_b.tolist())
+        pos_a = pos_a[keep]
+        pos_b = pos_b[keep]
+    return pos_a, pos_b
+
+
+def match_rows(a, b):
+    """
+    Matched (old, new) row index arrays between two hash sequences,
+    increasing on both sides.
+    """
+    match_a = []
+    match_b = []
+    stack = [(0, len(a), 0, len(b))]
+    while stack:
+        a0, a1, b0, b1 = stack.pop()
+        sub_a = a[a0:a1]
+        sub_b = b[b0:b1]
+        head = _common_prefix(sub_a, sub_b)
+        if head:
+            match_a.append(np.arange(a0, a0 + head))
+            match_b.append(np.arange(b0, b0 + head))
+            a0 += head
+            b0 += head
+            sub_a = sub_a[head:]
+            sub_b = sub_b[head:]
+        tail = _common_prefix(sub_a[::-1], sub_b[::-1])
+        if tail:
+            match_a.append(np.arange(a1 - tail, a1))
+            match_b.append(np.arange(b1 - tail, b1))
+            a1 -= tail
+            b1 -= tail
+            sub_a = sub_a[:len(sub_a) - tail]
+            sub_b = sub_b[:len(sub_b) - tail]
+        if a0 >= a1 or b0 >= b1:
+            continue
+
+        anchors = _unique_anchors(sub_a, sub_b)
+        if anchors is not None:
+            pos_a, pos_b = anchors
+            match_a.append(pos_a + a0)
+            match_b.append(pos_b + b0)
+            starts_a = np.concatenate(([a0], pos_a + a0 + 1))
+            ends_a = np.concatenate((pos_a + a0, [a1]))
+            starts_b = np.concatenate(([b0], pos_b + b0 + 1))
+            ends_b = np.concatenate((pos_b + b0, [b1]))
+            gaps = (ends_a > starts_a) & (ends_b > starts_b)
+            stack.extend(zip(
+                starts_a[gaps].tolist(), ends_a[gaps].tolist(),
+                starts_b[gaps].tolist(), ends_b[gaps].tolist(),
+            ))
+        elif (a1 - a0) * (b1 - b0) <= _DIFFLIB_LIMIT:
+            matcher = difflib.SequenceMatcher(None, sub_a.tolist(), sub_b.tolist(), autojunk=False)
+            for i, j, size in matcher.get_matching_blocks():
+                if size:
+                    match_a.append(np.arange(a0 + i, a0 + i + size))
+                    match_b.append(np.arange(b0 + j, b0 + j + size))
+
+    if not match_a:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    match_a = np.concatenate(match_a).astype(np.int64)
+    match_b = np.concatenate(match_b).astype(np.int64)
+    order = np.argsort(match_a, kind="stable")
+    return match_a[order], match_b[order]
+
+
+def _similarity(values_old, values_new, old_rows, new_rows):
+    """Share of cells, among those non-empty on either side, equal in each row pair."""
+    n_cols = max(values_old.shape[1], values_new.shape[1])
+    same = np.zeros(len(old_rows), dtype=np.int64)
+    used = np.zeros(len(old_rows), dtype=np.int64)
+    for c in range(n_cols):
+        h1 = cell_hashes(values_old[old_rows, c]) if c < values_old.shape[1] else np.zeros(len(old_rows), dtype=np.uint64)
+        h2 = cell_hashes(values_new[new_rows, c]) if c < values_new.shape[1] else np.zeros(len(new_rows), dtype=np.uint64)
+        nonempty = (h1 != _EMPTY_HASH) | (h2 != _EMPTY_HASH)
+        used += nonempty
+        same += nonempty & (h1 == h2)
+    return np.divide(same, used, out=np.ones(len(old_rows)), where=used > 0)
+
+
+def _expand(starts, lengths):
+    """(group id, value) for the concatenated ranges starts[g] .. starts[g] + lengths[g]."""
+    groups = np.repeat(np.arange(len(lengths)), lengths)
+    offsets = np.arange(len(groups)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return groups, starts[groups] + offsets, offsets
+
+
+def _window_fingerprints(hashes, free, width):
+    """
+    Fingerprint of every window of ``width`` consecutive row hashes; 0 for
+    windows touching a row that is not free, or made of empty rows only.
+    """
+    n = len(hashes) - width + 1
+    if n <= 0:
+        return np.zeros(0, dtype=np.uint64)
+    fingerprints = np.zeros(n, dtype=np.uint64)
+    usable = np.ones(n, dtype=bool)
+    nonempty = np.zeros(n, dtype=bool)
+    for offset in range(width):
+        window = hashes[offset:offset + n]
+        with np.errstate(over="ignore"):
+            fingerprints += _finalize(window ^ (np.uint64(offset + 1) * _MIX))
+        usable &= free[offset:offset + n]
+        nonempty |= window != _EMPTY_HASH
+    fingerprints[~(usable & nonempty)] = 0
+    return fingerprints
+
+
+def _unique_windows(fingerprints):
+    values, first, counts = np.unique(fingerprints, return_index=True, return_counts=True)
+    keep = (counts == 1) & (values != 0)
+    return values[keep], first[keep]
+
+
+def find_moves(hashes_old, hashes_new, free_old=None, free_new=None, min_rows=MOVE_MIN_ROWS):
+    """
+    Blocks of at least ``min_rows`` consecutive rows found unchanged on both
+    sides, among the rows flagged free (not already aligned), as a (blocks, 3)
+    int64 array of (old start, new start, row count), largest blocks first.
+
+    Windows of min_rows row hashes occurring once on each side are joined;
+    joined windows on one diagonal (same old - new offset, consecutive rows)
+    chain into a block, which is then grown row by row while the hashes
+    agree. Blocks overlapping a larger one are dropped.
+    """
+    if free_old is None:
+        free_old = np.ones(len(hashes_old), dtype=bool)
+    if free_new is None:
+        free_new = np.ones(len(hashes_new), dtype=bool)
+    fp_old, pos_old = _unique_windows(_window_fingerprints(hashes_old, free_old, min_rows))
+    fp_new, pos_new = _unique_windows(_window_fingerprints(hashes_new, free_new, min_rows))
+    _common, k_old, k_new = np.intersect1d(fp_old, fp_new, assume_unique=True, return_indices=True)
+    if not len(_common):
+        return np.zeros((0, 3), dtype=np.int64)
+    pos_old = pos_old[k_old].astype(np.int64)
+    pos_new = pos_new[k_new].astype(np.int64)
+    offsets = pos_new - pos_old
+    order = np.lexsort((pos_old, offsets))
+    pos_old, pos_new, offsets = pos_old[order], pos_new[order], offsets[order]
+    starts = np.flatnonzero(np.concatenate((
+        [True], (offsets[1:] != offsets[:-1]) | (pos_old[1:] != pos_old[:-1] + 1)
+    )))
+    ends = np.concatenate((starts[1:], [len(pos_old)]))
+
+    blocks = []
+    n_old, n_new = len(hashes_old), len(hashes_new)
+    for s, e in zip(starts.tolist(), ends.tolist()):
+        old, new = int(pos_old[s]), int(pos_new[s])
+        length = int(pos_old[e - 1]) - old + min_rows
+        while old and new and free_old[old - 1] and free_new[new - 1] and hashes_old[old - 1] == hashes_new[new - 1]:
+            old -= 1
+            new -= 1
+            length += 1
+        while (old + length < n_old and new + length < n_new and free_old[old + length]
+               and free_new[new + length] and hashes_old[old + length] == hashes_new[new + length]):
+            length += 1
+        blocks.append((old, new, length))
+
+    blocks.sort(key=lambda block: -block[2])
+    taken_old = np.zeros(n_old, dtype=bool)
+    taken_new = np.zeros(n_new, dtype=bool)
+    moves = []
+    for old, new, length in blocks:
+        if taken_old[old:old + length].any() or taken_new[new:new + length].any():
+            continue
+        taken_old[old:old + length] = True
+        taken_new[new:new + length] = True
+        moves.append((old, new, length))
+    return np.asarray(moves, dtype=np.int64).reshape(-1, 3)
+
+
+def _gap_ranks(rows, matches):
+    """Gap (index of the next match) of each unmatched row, and its rank within the gap."""
+    gaps = np.searchsorted(matches, rows)
+    return gaps, np.arange(len(rows)) - np.searchsorted(gaps, gaps)
+
+
+def align_rows(values_old, values_new, hashes=None):
+    """
+    RowAlignment of two 2-D object value matrices. ``hashes`` optionally
+    gives their precomputed (old, new) row_hashes.
+    """
+    if hashes is None:
+        hashes = row_hashes(values_old), row_hashes(values_new)
+    match_old, match_new = match_rows(*hashes)
+    n_match = len(match_old)
+
+    free_old = np.ones(values_old.shape[0], dtype=bool)
+    free_new = np.ones(values_new.shape[0], dtype=bool)
+    free_old[match_old] = False
+    free_new[match_new] = False
+    moves = find_moves(hashes[0], hashes[1], free_old, free_new)
+    _, moved_old, _ = _expand(moves[:, 0], moves[:, 2])
+    _, moved_new, _ = _expand(moves[:, 1], moves[:, 2])
+    free_old[moved_old] = False
+    free_new[moved_new] = False
+
+    # Gap g lies before match g (the last gap runs to the end of both sheets);
+    # its remaining rows face each other in order and are candidate modified pairs
+    rest_old = np.flatnonzero(free_old)
+    rest_new = np.flatnonzero(free_new)
+    gap_old, rank_old = _gap_ranks(rest_old, match_old)
+    gap_new, rank_new = _gap_ranks(rest_new, match_new)
+    count_new = np.bincount(gap_new, minlength=n_match + 1)
+    facing = np.minimum(np.bincount(gap_old, minlength=n_match + 1), count_new)
+    is_facing = rank_old < facing[gap_old]
+    gap, t, cand_old = gap_old[is_facing], rank_old[is_facing], rest_old[is_facing]
+    first_new = np.concatenate(([0], np.cumsum(count_new)[:-1]))
+    cand_new = rest_new[first_new[gap] + t]
+    paired = np.zeros(0, dtype=bool)
+    if len(cand_old):
+        paired = _similarity(values_old, values_new, cand_old, cand_new) >= MODIFIED_SIMILARITY
+    lone = ~paired
+
+    # Emit every aligned row with a (gap, slot, section, position, order) sort
+    # key. Facing rows take slot t of their gap; a row present on one side only
+    # (leftover removed / added, moved out / in) goes before the first facing
+    # pair that lies below it on its side, old side first. The match ends the gap.
+    single_old = np.concatenate((rest_old[~is_facing], moved_old))
+    single_new = np.concatenate((rest_new[rank_new >= facing[gap_new]], moved_new))
+    gap_single_old = np.searchsorted(match_old, single_old)
+    gap_single_new = np.searchsorted(match_new, single_new)
+    slot_old = np.searchsorted(cand_old, single_old) - np.searchsorted(gap, gap_single_old)
+    slot_new = np.searchsorted(cand_new, single_new) - np.searchsorted(gap, gap_single_new)
+    kind_old = np.full(len(single_old), ROW_MOVED, dtype=np.int64)
+    kind_old[:len(single_old) - len(moved_old)] = ROW_REMOVED
+    kind_new = np.full(len(single_new), ROW_MOVED, dtype=np.int64)
+    kind_new[:len(single_new) - len(moved_new)] = ROW_ADDED
+    last = len(cand_old) + 1
+    parts = [
+        # (gap, slot, section, position, order, old, new, kind)
+        (gap_single_old, slot_old, 0, single_old, 0, single_old, -1, kind_old),
+        (gap_single_new, slot_new, 1, single_new, 0, -1, single_new, kind_new),
+        (gap[paired], t[paired], 2, 0, 0, cand_old[paired], cand_new[paired], ROW_MODIFIED),
+        (gap[lone], t[lone], 2, 0, 0, cand_old[lone], -1, ROW_REMOVED),
+        (gap[lone], t[lone], 2, 0, 1, -1, cand_new[lone], ROW_ADDED),
+        (np.arange(n_match), last, 3, 0, 0, match_old, match_new, ROW_EQUAL),
+    ]
+    columns = [[] for _ in range(8)]
+    for part in parts:
+        n = len(part[0])
+        for column, item in zip(columns, part):
+            column.append(np.broadcast_to(np.asarray(item, dtype=np.int64), (n,)))
+    gap_key, slot, section, position, order, old_rows, new_rows, kinds = (np.concatenate(c) for c in columns)
+    sort = np.lexsort((order, position, section, slot, gap_key))
+    return RowAlignment(old_rows[sort], new_rows[sort], kinds[sort], moves)
+
+
+# ------------------------------------------------------------------ columns
+
+
+class ColumnAlignment:
+    """
+    Aligned column order of two sheets.
+
+    - old_cols / new_cols: int64 source column per aligned column, -1 where
+      that side has a gap
+    - kinds: uint8 COL_* code per aligned column; COL_MOVED marks matched
+      columns whose order changed
+    """
+
+    def __init__(self, old_cols, new_cols, kinds):
+        self.old_cols = np.asarray(old_cols, dtype=np.int64)
+        self.new_cols = np.asarray(new_cols, dtype=np.int64)
+        self.kinds = np.asarray(kinds, dtype=np.uint8)
+
+    def __len__(self):
+        return len(self.kinds)
+
+    @property
+    def matched(self):
+        """Bool mask of aligned columns present on both sides."""
+        return (self.old_cols >= 0) & (self.new_cols >= 0)
+
+    def counts(self):
+        counts = np.bincount(self.kinds, minlength=len(COL_KIND_NAMES))
+        return {
+            "cols_added": int(counts[COL_ADDED]),
+            "cols_removed": int(counts[COL_REMOVED]),
+            "cols_moved": int(counts[COL_MOVED]),
+        }
+
+    def to_dict(self):
+        """JSON-friendly form stored in compare results."""
+        return {
+            "old_cols": self.old_cols.tolist(),
+            "new_cols": self.new_cols.tolist(),
+            "kinds": np.asarray(COL_KIND_NAMES, dtype=object)[self.kinds].tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        codes = {name: code for code, name in enumerate(COL_KIND_NAMES)}
+        return cls(data["old_cols"], data["new_cols"], [codes[k] for k in data["kinds"]])
+
+
+def take_columns(values, cols):
+    """Columns of a 2-D object matrix in aligned order; -1 gives an empty column."""
+    cols = np.asarray(cols, dtype=np.int64)
+    taken = np.full((values.shape[0], len(cols)), None, dtype=object)
+    present = cols >= 0
+    taken[:, present] = values[:, cols[present]]
+    return taken
+
+
+def column_sketch(hashes, size=SKETCH_SIZE):
+    """Sorted ``size`` smallest distinct non-empty cell hashes of a column."""
+    hashes = hashes[hashes != _EMPTY_HASH]
+    if len(hashes) > 4 * size:
+        # Usually enough distinct values sit among the 4k smallest hashes
+        sketch = np.unique(np.partition(hashes, 4 * size)[:4 * size])
+        if len(sketch) >= size:
+            return sketch[:size]
+    return np.unique(hashes)[:size]
+
+
+def _header_texts(values, header_row):
+    """Normalized header text per column; None where the cell holds no text."""
+    if header_row is None or header_row >= values.shape[0]:
+        return [None] * values.shape[1]
+    texts = []
+    for value in values[header_row].tolist():
+        text = " ".join(value.split()).casefold() if isinstance(value, str) else ""
+        texts.append(text or None)
+    return texts
+
+
+def _unique_header_pairs(headers_old, headers_new):
+    """(old, new) column pairs whose header text occurs once on each side."""
+    def positions(headers):
+        seen = {}
+        for c, text in enumerate(headers):
+            if text is not None:
+                seen.setdefault(text, []).append(c)
+        return {text: cols[0] for text, cols in seen.items() if len(cols) == 1}
+
+    old = positions(headers_old)
+    new = positions(headers_new)
+    return [(old[text], new[text]) for text in old.keys() & new.keys()]
+
+
+def _content_pairs(hashes_old, hashes_new):
+    """
+    Candidate (old, new, score) column pairs by content: score 2 for columns
+    with identical cells, otherwise the Jaccard similarity of their sketches.
+    """
+    def fingerprint(hashes):
+        nonempty = np.flatnonzero(hashes != _EMPTY_HASH)
+        return hashes[:nonempty[-1] + 1].tobytes() if len(nonempty) else b""
+
+    sketches_old = [column_sketch(h) for h in hashes_old]
+    sketches_new = [column_sketch(h) for h in hashes_new]
+    scores = {}
+
+    # Sketch overlap, joined on hash value
+    old_side = pd.DataFrame({
+        "hash": np.concatenate(sketches_old + [np.zeros(0, dtype=np.uint64)]),
+        "old": np.repeat(np.arange(len(sketches_old)), [len(k) for k in sketches_old]),
+    })
+    new_side = pd.DataFrame({
+        "hash": np.concatenate(sketches_new + [np.zeros(0, dtype=np.uint64)]),
+        "new": np.repeat(np.arange(len(sketches_new)), [len(k) for k in sketches_new]),
+    })
+    shared = old_side.merge(new_side, on="hash").groupby(["old", "new"]).size()
+    for (o, n), common in shared.items():
+        union = len(sketches_old[o]) + len(sketches_new[n]) - common
+        scores[(o, n)] = common / union
+
+    # Empty columns only resemble each other
+    empty_old = [o for o, k in enumerate(sketches_old) if not len(k)]
+    empty_new = [n for n, k in enumerate(sketches_new) if not len(k)]
+    for o in empty_old:
+        for n in empty_new:
+            scores[(o, n)] = 1.0
+
+    prints_new = {}
+    for n, h in enumerate(hashes_new):
+        prints_new.setdefault(fingerprint(h), []).append(n)
+    for o, h in enumerate(hashes_old):
+        for n in prints_new.get(fingerprint(h), ()):
+            scores[(o, n)] = 2.0
+    return [(o, n, score) for (o, n), score in scores.items()]
+
+
+def align_columns(values_old, values_new, header_row=None):
+    """
+    ColumnAlignment of two 2-D object value matrices. ``header_row`` (0-based)
+    is a row whose text labels the columns; headers found exactly once on both
+    sides are matched first.
+    """
+    n_old = values_old.shape[1]
+    n_new = values_new.shape[1]
+    hashes_old = [cell_hashes(values_old[:, c]) for c in range(n_old)]
+    hashes_new = [cell_hashes(values_new[:, c]) for c in range(n_new)]
+
+    candidates = _content_pairs(hashes_old, hashes_new)
+    headers = _unique_header_pairs(
+        _header_texts(values_old, header_row), _header_texts(values_new, header_row)
+    )
+    candidates.extend((o, n, 3.0) for o, n in headers)
+
+    # Greedy pairing: best score first, nearer columns first on ties
+    candidates.sort(key=lambda p: (-p[2], abs(p[0] - p[1]), p[0]))
+    old_match = np.full(n_old, -1, dtype=np.int64)
+    new_match = np.full(n_new, -1, dtype=np.int64)
+    for o, n, score in candidates:
+        if score < COLUMN_SIMILARITY:
+            break
+        if old_match[o] < 0 and new_match[n] < 0:
+            old_match[o] = n
+            new_match[n] = o
+
+    # Matched columns off the longest in-order chain have moved
+    matched_old = np.flatnonzero(old_match >= 0)
+    matched_new = old_match[matched_old]
+    moved = np.ones(len(matched_old), dtype=bool)
+    moved[_longest_increasing(matched_new.tolist())] = False
+    is_moved = np.zeros(n_new, dtype=bool)
+    is_moved[matched_new[moved]] = True
+
+    old_cols, new_cols = _layout(old_match, new_match)
+    kinds = np.full(len(old_cols), COL_MATCHED, dtype=np.uint8)
+    kinds[is_moved[np.maximum(new_cols, 0)] & (old_cols >= 0)] = COL_MOVED
+    kinds[old_cols < 0] = COL_ADDED
+    kinds[new_cols < 0] = COL_REMOVED
+    return ColumnAlignment(old_cols, new_cols, kinds)
+
+
+def _layout(old_match, new_match):
+    """
+    Display order of a one-to-one matching, as (old, new) index arrays with -1
+    for gaps. Follows the new side; an unmatched old item goes right after the
+    aligned position of the matched item preceding it on the old side.
+    """
+    n_old = len(old_match)
+    n_new = len(new_match)
+    previous = np.maximum.accumulate(np.where(old_match >= 0, np.arange(n_old), -1)) if n_old else old_match
+    removed = np.flatnonzero(old_match < 0)
+    anchor_new = np.where(previous[removed] >= 0, old_match[np.maximum(previous[removed], 0)], -1)
+
+    old_items = np.concatenate((new_match, removed))
+    new_items = np.concatenate((np.arange(n_new), np.full(len(removed), -1)))
+    position = np.concatenate((np.arange(n_new), anchor_new))
+    section = np.concatenate((np.zeros(n_new, dtype=np.int64), np.ones(len(removed), dtype=np.int64)))
+    order_in = np.concatenate((np.zeros(n_new, dtype=np.int64), removed))
+    sort = np.lexsort((order_in, section, position))
+    return old_items[sort].astype(np.int64), new_items[sort].astype(np.int64)
+
+
+# --------------------------------------------------------------------- keys
+
+
+def _occurrences(codes, n_codes):
+    """
+    (occurrence, order, counts): the 0-based occurrence number of each code
+    among the equal codes before it, the stable order sorting the codes and
+    the count of each code.
+    """
+    order = np.argsort(codes, kind="stable")
+    counts = np.bincount(codes, minlength=n_codes)
+    starts = np.cumsum(counts) - counts
+    occurrence = np.empty(len(codes), dtype=np.int64)
+    occurrence[order] = np.arange(len(codes)) - starts[codes[order]]
+    return occurrence, order, counts
+
+
+def _key_text(keys, row):
+    return " | ".join(cell_texts(keys[row]).tolist())
+
+
+def align_by_key(keys_old, keys_new, values_old, values_new, hashes=None):
+    """
+    RowAlignment of two record tables joined on their key cells.
+
+    keys_* hold the key columns of each row, values_* the cells compared for
+    modifications (``hashes``: their precomputed (old, new) row_hashes, if
+    any). Rows sharing a key are paired (hash join); a key found
+    several times is paired by occurrence, the n-th old row with the n-th new
+    row, and the surplus is removed / added. Rows keep the new sheet's order.
+
+    Returns (alignment, duplicates, duplicate_count): duplicates lists up to
+    DUPLICATE_KEY_LIMIT {"key", "old_count", "new_count"} dicts for non-empty
+    keys found more than once on either side.
+    """
+    n_keys = max(keys_old.shape[1], keys_new.shape[1])
+    hashes_old = row_hashes(keys_old, n_keys)
+    hashes_new = row_hashes(keys_new, n_keys)
+    # Sort-merge join on shared key codes
+    codes, uniques = pd.factorize(np.concatenate((hashes_old, hashes_new)))
+    codes_old = codes[:len(hashes_old)]
+    codes_new = codes[len(hashes_old):]
+    occ_old, _order_old, counts_old = _occurrences(codes_old, len(uniques))
+    occ_new, order_new, counts_new = _occurrences(codes_new, len(uniques))
+    starts_new = np.cumsum(counts_new) - counts_new
+
+    old_match = np.full(len(hashes_old), -1, dtype=np.int64)
+    new_match = np.full(len(hashes_new), -1, dtype=np.int64)
+    paired = np.flatnonzero(occ_old < counts_new[codes_old])
+    partners = order_new[starts_new[codes_old[paired]] + occ_old[paired]]
+    old_match[paired] = partners
+    new_match[partners] = paired
+    old_rows, new_rows = _layout(old_match, new_match)
+
+    kinds = np.full(len(old_rows), ROW_ADDED, dtype=np.uint8)
+    kinds[new_rows < 0] = ROW_REMOVED
+    both = np.flatnonzero((old_rows >= 0) & (new_rows >= 0))
+    if hashes is None:
+        hashes = row_hashes(values_old), row_hashes(values_new)
+    same = hashes[0][old_rows[both]] == hashes[1][new_rows[both]]
+    kinds[both] = np.where(same, ROW_EQUAL, ROW_MODIFIED)
+
+    # Duplicate keys, shown by their first row on the new side (old if absent)
+    empty_key = row_hashes(np.full((1, n_keys), None, dtype=object))[0]
+    duplicated = np.flatnonzero(((counts_old > 1) | (counts_new > 1)) & (uniques != empty_key))
+    first_old = np.full(len(uniques), -1, dtype=np.int64)
+    first_old[codes_old[::-1]] = np.arange(len(codes_old))[::-1]
+    first_new = np.full(len(uniques), -1, dtype=np.int64)
+    first_new[codes_new[::-1]] = np.arange(len(codes_new))[::-1]
+    duplicates = []
+    for code in duplicated[:DUPLICATE_KEY_LIMIT].tolist():
+        if first_new[code] >= 0:
+            text = _key_text(keys_new, first_new[code])
+        else:
+            text = _key_text(keys_old, first_old[code])
+        duplicates.append({"key": text, "old_count": int(counts_old[code]), "new_count": int(counts_new[code])})
+    return RowAlignment(old_rows, new_rows, kinds), duplicates, len(duplicated)
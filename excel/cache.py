@@ -0,0 +1,141 @@
+"""Persistent on-disk cache of parsed sheets.
+
+Parsed SheetData is stored under ~/.spreadsheet_compare/parse_cache as an
+uncompressed .npz of plain NumPy arrays (see SheetData.to_columns), keyed by
+the file's path, size, mtime, content hash and the sheet name. Entries are
+evicted least-recently-used once the cache exceeds its size budget
+(``parse_cache_budget_mb`` in config.json, 0 disables the cache).
+"""
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+
+from core.config import CONFIG_DIR, get_parse_cache_budget_mb
+from excel.engine import load_sheet
+from excel.sheet import SheetData
+
+CACHE_DIR = CONFIG_DIR / "parse_cache"
+# Bump when the loader output or the column layout changes.
+CACHE_FORMAT_VERSION = 4
+
+_HASH_CHUNK = 4 * 1024 * 1024
+_content_hashes = {}
+
+
+def file_fingerprint(file_path):
+    """(abs_path, size, mtime_ns, content_hash) for a file; the hash is memoized per size/mtime."""
+    path = os.path.abspath(file_path)
+    stat = os.stat(path)
+    memo_key = (path, stat.st_size, stat.st_mtime_ns)
+    digest = _content_hashes.get(memo_key)
+    if digest is None:
+        hasher = hashlib.blake2b(digest_size=20)
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+                hasher.update(chunk)
+        digest = hasher.hexdigest()
+        _content_hashes[memo_key] = digest
+    return path, stat.st_size, stat.st_mtime_ns, digest
+
+
+def cache_key(file_path, sheet_name, extra=None):
+    path, size, mtime_ns, digest = file_fingerprint(file_path)
+    parts = [str(CACHE_FORMAT_VERSION), path, str(size), str(mtime_ns), digest, sheet_name or "", extra or ""]
+    return hashlib.blake2b("\0".join(parts).encode("utf-8"), digest_size=20).hexdigest()
+
+
+def _entry_path(key):
+    return CACHE_DIR / f"{key}.npz"
+
+
+def load_cached_sheet(file_path, sheet_name=None, extra=None):
+    """Return the cached SheetData, or None on a miss."""
+    if get_parse_cache_budget_mb() <= 0:
+        return None
+    try:
+        entry = _entry_path(cache_key(file_path, sheet_name, extra))
+        if not entry.exists():
+            return None
+        with np.load(entry, allow_pickle=False) as data:
+            sheet = SheetData.from_columns({name: data[name] for name in data.files})
+        # Touch the entry so eviction sees it as recently used.
+        os.utime(entry)
+        return sheet
+    except Exception as e:
+        print(f"Parse cache read failed: {e}")
+        return None
+
+
+def store_sheet(file_path, sheet_name, sheet, extra=None):
+    budget_mb = get_parse_cache_budget_mb()
+    if budget_mb <= 0:
+        return
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        entry = _entry_path(cache_key(file_path, sheet_name, extra))
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=CACHE_DIR)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **sheet.to_columns())
+            os.replace(tmp_path, entry)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+        evict(budget_mb * 1024 * 1024)
+    except Exception as e:
+        print(f"Parse cache write failed: {e}")
+
+
+def evict(budget_bytes):
+    """Delete least-recently-used entries until the cache fits the budget."""
+    if not CACHE_DIR.exists():
+        return
+    entries = []
+    total = 0
+    for entry in CACHE_DIR.glob("*.npz"):
+        try:
+            stat = entry.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, entry))
+        total += stat.st_size
+    entries.sort()
+    for _mtime, size, entry in entries:
+        if total <= budget_bytes:
+            break
+        try:
+            entry.unlink()
+            total -= size
+        except OSError:
+            pass
+
+
+def clear_cache():
+    if not CACHE_DIR.exists():
+        return
+    for entry in CACHE_DIR.glob("*.npz"):
+        try:
+            entry.unlink()
+        except OSError:
+            pass
+
+
+def selection_key(selection):
+    """Cache key part for a SheetSelection (None for a full sheet)."""
+    return selection.key() if selection is not None else None
+
+
+def load_sheet_cached(file_path, sheet_name=None, selection=None):
+    """load_sheet() with the on-disk parse cache in front of it."""
+    extra = selection_key(selection)
+    sheet = load_cached_sheet(file_path, sheet_name, extra)
+    if sheet is not None:
+        return sheet
+    sheet = load_sheet(file_path, sheet_name, selection=selection)
+    # Row hashes are stored with the sheet, so diffs of cached sheets can
+    # skip unchanged rows without hashing them again.
+    sheet.row_hashes()
+    store_sheet(file_path, sheet_name, sheet, extra)
+    return sheet
@@ -0,0 +1,127 @@
+"""Columnar change records of a compare result.
+
+compare_dataframes reports its changes as a ChangeSet: parallel arrays of
+row, column and change type, plus the old and new cell values themselves
+(references to the sheets' objects, not copies or strings). Text is only
+made for the changes someone looks at: get() for a tooltip, slicing or
+iteration for a listing, to_records() for JSON.
+"""
+import numpy as np
+
+from excel.diff import cell_texts
+
+CHANGE_MODIFIED = 0
+CHANGE_ADDED = 1
+CHANGE_REMOVED = 2
+CHANGE_TYPE_NAMES = ("modified", "added", "removed")
+
+
+def _object_array(n):
+    return np.full(n, None, dtype=object)
+
+
+class ChangeSet:
+    """
+    Changed cells of one compare, in row-major order.
+
+    - rows / cols: int64 cell coordinates (in the aligned layout, if any)
+    - types: uint8 CHANGE_* code per change
+    - old_values / new_values: 1-D object arrays of the compared values
+    - key_cells / key_index: optional (records, keys) object matrix of record
+      keys and each change's row in it (key-column matching); changes then
+      carry a "key" text
+
+    Behaves like the former list of change dicts: len(), iteration, indexing
+    and slicing produce {"row", "col", "old", "new", "type"[, "key"]} dicts,
+    stringified on the fly. get((row, col)) looks a cell up like the dict the
+    view used to build.
+    """
+
+    def __init__(self, rows=None, cols=None, types=None, old_values=None, new_values=None,
+                 key_cells=None, key_index=None):
+        self.rows = np.asarray(rows if rows is not None else [], dtype=np.int64)
+        self.cols = np.asarray(cols if cols is not None else [], dtype=np.int64)
+        n = len(self.rows)
+        self.types = np.asarray(types, dtype=np.uint8) if types is not None else np.zeros(n, dtype=np.uint8)
+        self.old_values = old_values if old_values is not None else _object_array(n)
+        self.new_values = new_values if new_values is not None else _object_array(n)
+        self.key_cells = key_cells
+        self.key_index = key_index
+        self._positions = None
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        for start in range(0, len(self), 4096):
+            yield from self.records(slice(start, start + 4096))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.records(index)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("change index out of range")
+        return self.records(slice(index, index + 1))[0]
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def _position_index(self):
+        """(positions, n_cols): sorted flat cell positions for lookups."""
+        if self._positions is None:
+            n_cols = int(self.cols.max()) + 1 if len(self) else 1
+            self._positions = (self.rows * n_cols + self.cols, n_cols)
+        return self._positions
+
+    def find(self, row, col):
+        """Index of the change at (row, col), or -1."""
+        positions, n_cols = self._position_index()
+        if col >= n_cols or not len(positions):
+            return -1
+        pos = row * n_cols + col
+        i = int(np.searchsorted(positions, pos))
+        return i if i < len(positions) and positions[i] == pos else -1
+
+    def get(self, cell, default=None):
+        """Change dict of a (row, col) cell, or ``default``."""
+        i = self.find(*cell)
+        return self[i] if i >= 0 else default
+
+    def type_names(self, index=slice(None)):
+        return np.asarray(CHANGE_TYPE_NAMES, dtype=object)[self.types[index]]
+
+    def key_texts(self, index=slice(None)):
+        """Record key text of the selected changes (key-column matching only)."""
+        if self.key_cells is None:
+            return None
+        cells = self.key_cells[self.key_index[index]]
+        texts = None
+        for k in range(cells.shape[1]):
+            column = cell_texts(cells[:, k])
+            texts = column if texts is None else texts + " | " + column
+        return texts if texts is not None else np.full(len(cells), "", dtype=object)
+
+    def records(self, index=slice(None)):
+        """List of change dicts for an index (slice or index array); values stringified here."""
+        fields = {
+            "row": self.rows[index].tolist(),
+            "col": self.cols[index].tolist(),
+            "old": cell_texts(self.old_values[index]).tolist(),
+            "new": cell_texts(self.new_values[index]).tolist(),
+            "type": self.type_names(index).tolist(),
+        }
+        keys = self.key_texts(index)
+        if keys is not None:
+            fields["key"] = keys.tolist()
+        names = list(fields)
+        return [dict(zip(names, values)) for values in zip(*fields.values())]
+
+    def to_records(self):
+        """All changes as JSON-ready dicts."""
+        return self.records()
+
+    def count_by_type(self):
+        counts = np.bincount(self.types, minlength=len(CHANGE_TYPE_NAMES))
+        return {name: int(count) for name, count in zip(CHANGE_TYPE_NAMES, counts)}
@@ -0,0 +1,433 @@
+"""Vectorized cell diff between two loaded sheets.
+
+build_diff_masks compares two SheetData over a common extent and returns
+boolean (rows, cols) masks for content, format and formula differences. The
+ignore options (case, whitespace, number format) are applied as array
+operations; only cells whose raw values differ ever get stringified. Rows
+whose hashes (SheetData.row_hashes) agree are skipped altogether. A DiffState
+keeps the raw comparison, so changing an option only re-evaluates the few
+candidate cells.
+
+column_differs is the typed column comparison behind compare_dataframes.
+Both take an optional NumericTolerance (absolute, relative and ULP) so that
+recalculation noise such as 1e-12 rounding differences is not reported.
+"""
+import numbers
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+DIFF_CONTENT = 1
+DIFF_FORMAT = 2
+DIFF_FORMULA = 4
+
+DiffMasks = namedtuple("DiffMasks", ["content", "format", "formula"])
+
+# Two numbers are equal when they are within abs_tol of each other, within
+# rel_tol of the larger magnitude, or at most ``ulps`` representable doubles
+# apart; zero disables a test.
+NumericTolerance = namedtuple("NumericTolerance", ["abs_tol", "rel_tol", "ulps"], defaults=(0.0, 0.0, 0))
+
+_type_of = np.frompyfunc(type, 1, 1)
+_to_str = np.frompyfunc(str, 1, 1)
+
+
+def numeric_tolerance(abs_tol=None, rel_tol=None, ulps=None):
+    """A NumericTolerance from optional settings, or None when all are unset/zero."""
+    tolerance = NumericTolerance(float(abs_tol or 0.0), float(rel_tol or 0.0), int(ulps or 0))
+    if tolerance.abs_tol < 0 or tolerance.rel_tol < 0 or tolerance.ulps < 0:
+        raise ValueError("Numeric tolerances must not be negative.")
+    if not (tolerance.abs_tol or tolerance.rel_tol or tolerance.ulps):
+        return None
+    return tolerance
+
+
+def _ordered_bits(values):
+    """float64 -> int64 whose order matches the float order (-0.0 == 0.0)."""
+    bits = values.view(np.int64)
+    return np.where(bits < 0, -(bits & np.int64(0x7FFFFFFFFFFFFFFF)), bits)
+
+
+def ulp_distance(a, b):
+    """Number of representable doubles between two float64 arrays (uint64)."""
+    oa = _ordered_bits(a)
+    ob = _ordered_bits(b)
+    # Differences of the two's complement values wrap correctly as uint64.
+    ua = oa.view(np.uint64)
+    ub = ob.view(np.uint64)
+    return np.where(oa >= ob, ua - ub, ub - ua)
+
+
+def numbers_differ(a, b, tolerance=None):
+    """
+    True where two float64 arrays differ; NaN equals NaN (both empty). With a
+    tolerance, only values that are not close by any of its tests differ.
+    """
+    differs = (a != b) & ~(np.isnan(a) & np.isnan(b))
+    if tolerance is None or not differs.any():
+        return differs
+    idx = np.flatnonzero(differs)
+    x = a[idx]
+    y = b[idx]
+    with np.errstate(invalid="ignore", over="ignore"):
+        delta = np.abs(x - y)
+        close = np.zeros(len(idx), dtype=bool)
+        if tolerance.abs_tol:
+            close |= delta <= tolerance.abs_tol
+        if tolerance.rel_tol:
+            close |= delta <= tolerance.rel_tol * np.maximum(np.abs(x), np.abs(y))
+        if tolerance.ulps:
+            close |= ulp_distance(x, y) <= np.uint64(tolerance.ulps)
+    close &= np.isfinite(x) & np.isfinite(y)
+    differs[idx] = ~close
+    return differs
+
+
+def pad_matrix(matrix, n_rows, n_cols, fill=0):
+    """Grow (or cut) a per-cell matrix to the comparison extent."""
+    rows, cols = matrix.shape
+    if rows == n_rows and cols == n_cols:
+        return matrix
+    padded = np.full((n_rows, n_cols), fill, dtype=matrix.dtype)
+    padded[:min(rows, n_rows), :min(cols, n_cols)] = matrix[:n_rows, :n_cols]
+    return padded
+
+
+def _values(sheet, n_rows, n_cols):
+    if sheet is None:
+        return np.full((n_rows, n_cols), None, dtype=object)
+    return pad_matrix(sheet.values, n_rows, n_cols, fill=None)
+
+
+def _numeric_types(types):
+    """Bool mask of cells holding a numbers.Number (checked once per distinct type)."""
+    numeric = {t for t in set(types.tolist()) if t is not type(None) and issubclass(t, numbers.Number)}
+    if not numeric:
+        return np.zeros(types.shape, dtype=bool)
+    return np.isin(types, list(numeric))
+
+
+def normalize_strings(values, ignore_case=False, ignore_whitespace=False):
+    """Stringify a 1-D object array and apply the text ignore options."""
+    text = pd.Series(_to_str(values) if len(values) else values, dtype=object)
+    if ignore_whitespace:
+        text = text.str.replace(r"\s+", " ", regex=True).str.strip()
+    if ignore_case:
+        text = text.str.lower()
+    return text.to_numpy(dtype=object)
+
+
+def _texts_equal(a, b, ignore_case, ignore_whitespace):
+    if not len(a):
+        return np.ones(0, dtype=bool)
+    return normalize_strings(a, ignore_case, ignore_whitespace) == normalize_strings(b, ignore_case, ignore_whitespace)
+
+
+def style_signature(style, ignore_number_format=False):
+    if not style:
+        style = {}
+    font = style.get('font', {})
+    align = style.get('align', {})
+    border = style.get('border', {})
+    numfmt = None if ignore_number_format else style.get('numfmt')
+    return (
+        style.get('bg'),
+        font.get('color'), font.get('bold'), font.get('italic'), font.get('size'), font.get('name'),
+        align.get('horizontal'), align.get('vertical'), align.get('wrap_text'),
+        bool(border.get('left')), bool(border.get('right')), bool(border.get('top')), bool(border.get('bottom')),
+        numfmt,
+    )
+
+
+def style_keys(sheet1, sheet2, ignore_number_format=False):
+    """
+    Map both sides' interned style ids onto one shared key space, so
+    comparing two cells' formats is a plain integer comparison.
+    """
+    signature_keys = {}
+
+    def keys_for(sheet):
+        table = sheet.style_table.styles if sheet is not None else [{}]
+        keys = [
+            signature_keys.setdefault(style_signature(style, ignore_number_format), len(signature_keys))
+            for style in table
+        ]
+        return np.asarray(keys, dtype=np.int32)
+
+    return keys_for(sheet1), keys_for(sheet2)
+
+
+def _object_array(items):
+    arr = np.empty(len(items), dtype=object)
+    arr[:] = items
+    return arr
+
+
+def formula_keys(sheet1, sheet2):
+    """
+    Per-sheet arrays mapping formula ids (see excel.formulas.FormulaTable)
+    to ids shared by both sheets: equal ids mean equal canonical keys.
+    """
+    shared = {}
+
+    def keys_for(sheet):
+        keys = sheet.formula_table.keys if sheet is not None else []
+        return np.fromiter((shared.setdefault(key, len(shared)) for key in keys), dtype=np.int64, count=len(keys))
+
+    return keys_for(sheet1), keys_for(sheet2)
+
+
+def _formula_cells(sheet, n_rows, n_cols):
+    """(flat positions in the n_cols layout, indexes into formula_index) of a sheet's formulas inside the extent."""
+    if sheet is None or not sheet.has_formulas():
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    rows, cols = np.divmod(sheet.formula_index, sheet.n_cols)
+    inside = np.flatnonzero((rows < n_rows) & (cols < n_cols))
+    return rows[inside] * n_cols + cols[inside], inside
+
+
+def changed_rows(sheet1, sheet2, n_rows, ignore_number_format=False):
+    """
+    Rows below n_rows whose hashes over values, formats and formulas differ
+    between two sheets. Every other row is identical, whatever the ignore
+    options and tolerance, and needs no cell comparison.
+    """
+    def hashes(sheet):
+        padded = np.zeros(n_rows, dtype=np.uint64)
+        if sheet is not None:
+            part = sheet.row_hashes(styles=True, formulas=True, ignore_number_format=ignore_number_format)
+            padded[:min(len(part), n_rows)] = part[:n_rows]
+        return padded
+
+    return np.flatnonzero(hashes(sheet1) != hashes(sheet2))
+
+
+def _sheet_rows(sheet, rows):
+    if sheet is None:
+        return None
+    return sheet.take_rows(np.where(rows < sheet.n_rows, rows, -1))
+
+
+class DiffState:
+    """
+    Raw comparison of two sheets over (n_rows, n_cols), kept so that the
+    ignore options can change without diffing again.
+
+    Only candidate cells are kept: those whose raw content, format or formula
+    differ (within changed_rows when skip_equal_rows). For them, the outcome
+    per option is derived from memoized views: normalized texts per case /
+    whitespace setting, format keys with and without the number format, and
+    the raw numbers for the tolerance test. masks() therefore only touches
+    candidates, and every other cell is equal under any option.
+    """
+
+    def __init__(self, sheet1, sheet2, n_rows, n_cols, skip_equal_rows=True):
+        self.shape = (n_rows, n_cols)
+        if skip_equal_rows:
+            rows = changed_rows(sheet1, sheet2, n_rows)
+            if len(rows) < n_rows:
+                sheet1 = _sheet_rows(sheet1, rows)
+                sheet2 = _sheet_rows(sheet2, rows)
+        else:
+            rows = np.arange(n_rows)
+        sub_rows = len(rows)
+
+        def flat(positions):
+            """Flat positions in the (sub_rows, n_cols) layout -> full extent."""
+            r, c = np.divmod(positions, n_cols)
+            return rows[r] * n_cols + c
+
+        # Content: empty vs non-empty always differs; two numbers depend on the
+        # tolerance, anything else that is not identical on the text options.
+        flat1 = _values(sheet1, sub_rows, n_cols).reshape(-1)
+        flat2 = _values(sheet2, sub_rows, n_cols).reshape(-1)
+        missing1 = pd.isna(flat1)
+        missing2 = pd.isna(flat2)
+        self.missing_pos = flat(np.flatnonzero(missing1 != missing2))
+        idx = np.flatnonzero(~(missing1 | missing2))
+        a = flat1[idx]
+        b = flat2[idx]
+        types1 = _type_of(a)
+        types2 = _type_of(b)
+        both_numeric = _numeric_types(types1) & _numeric_types(types2)
+        same = (types1 == types2) & (a == b)
+        numeric = both_numeric & ~same
+        self.number_pos = flat(idx[numeric])
+        self.numbers = (a[numeric].astype(np.float64), b[numeric].astype(np.float64))
+        text = ~both_numeric & ~same
+        self.text_pos = flat(idx[text])
+        self.texts = (a[text], b[text])
+
+        # Format: keys with the number format differ wherever keys without do
+        full1, full2 = style_keys(sheet1, sheet2, False)
+        bare1, bare2 = style_keys(sheet1, sheet2, True)
+        ids1 = self._style_ids(sheet1, sub_rows, n_cols)
+        ids2 = self._style_ids(sheet2, sub_rows, n_cols)
+        differs = np.flatnonzero(full1[ids1] != full2[ids2])
+        self.format_pos = flat(differs)
+        self.format_without_numfmt = bare1[ids1[differs]] != bare2[ids2[differs]]
+
+        # Formulas: present on one side only always differs. Two formulas are
+        # the same when their canonical keys are (a filled-down formula that
+        # moved with its rows) or, failing that, their A1 texts; texts are
+        # only rendered for the cells whose keys differ.
+        pos1, idx1 = _formula_cells(sheet1, sub_rows, n_cols)
+        pos2, idx2 = _formula_cells(sheet2, sub_rows, n_cols)
+        self.formula_only_pos = flat(np.setxor1d(pos1, pos2, assume_unique=True))
+        common, i1, i2 = np.intersect1d(pos1, pos2, assume_unique=True, return_indices=True)
+        idx1, idx2 = idx1[i1], idx2[i2]
+        keys1, keys2 = formula_keys(sheet1, sheet2)
+        differs = np.zeros(len(common), dtype=bool)
+        if len(common):
+            differs = keys1[sheet1.formula_ids[idx1]] != keys2[sheet2.formula_ids[idx2]]
+        texts1 = texts2 = np.empty(0, dtype=object)
+        if differs.any():
+            texts1 = _object_array(sheet1.formula_texts(idx1[differs]))
+            texts2 = _object_array(sheet2.formula_texts(idx2[differs]))
+        same_text = texts1 == texts2
+        self.formula_pos = flat(common[differs][~same_text])
+        self.formulas = (texts1[~same_text], texts2[~same_text])
+
+        self.candidates = np.unique(np.concatenate((
+            self.missing_pos, self.number_pos, self.text_pos, self.format_pos,
+            self.formula_only_pos, self.formula_pos,
+        ))).astype(np.int64)
+        self._views = {}
+
+    @staticmethod
+    def _style_ids(sheet, n_rows, n_cols):
+        if sheet is None:
+            return np.zeros(n_rows * n_cols, dtype=np.int32)
+        return pad_matrix(sheet.style_ids, n_rows, n_cols).reshape(-1)
+
+    def _texts_equal(self, kind, ignore_case, ignore_whitespace):
+        """Memoized equality of the 'texts' or 'formulas' candidates under the text options."""
+        key = (kind, ignore_case, ignore_whitespace)
+        equal = self._views.get(key)
+        if equal is None:
+            a, b = getattr(self, kind)
+            equal = self._views[key] = _texts_equal(a, b, ignore_case, ignore_whitespace)
+        return equal
+
+    def masks(self, ignore_case=False, ignore_whitespace=False, ignore_number_format=False, tolerance=None):
+        """DiffMasks for one set of options."""
+        size = self.shape[0] * self.shape[1]
+        content = np.zeros(size, dtype=bool)
+        content[self.missing_pos] = True
+        content[self.number_pos] = numbers_differ(*self.numbers, tolerance)
+        content[self.text_pos] = ~self._texts_equal("texts", ignore_case, ignore_whitespace)
+
+        formats = np.zeros(size, dtype=bool)
+        formats[self.format_pos] = self.format_without_numfmt if ignore_number_format else True
+
+        formula = np.zeros(size, dtype=bool)
+        formula[self.formula_only_pos] = True
+        formula[self.formula_pos] = ~self._texts_equal("formulas", ignore_case, ignore_whitespace)
+        return DiffMasks(content.reshape(self.shape), formats.reshape(self.shape), formula.reshape(self.shape))
+
+
+def build_diff_masks(sheet1, sheet2, n_rows, n_cols, ignore_case=False, ignore_whitespace=False,
+                     ignore_number_format=False, tolerance=None, skip_equal_rows=True):
+    """
+    Content, format and formula difference masks of two sheets over
+    (n_rows, n_cols): an empty cell only equals an empty cell, two numbers
+    compare as floats (within ``tolerance``) and anything else compares as
+    (normalized) text. Keep a DiffState instead to re-evaluate other options.
+    """
+    state = DiffState(sheet1, sheet2, n_rows, n_cols, skip_equal_rows)
+    return state.masks(ignore_case, ignore_whitespace, ignore_number_format, tolerance)
+
+
+def combine_masks(masks):
+    """Pack DiffMasks into one uint8 matrix of DIFF_* bits."""
+    diff_map = masks.content.astype(np.uint8)
+    diff_map |= masks.format.astype(np.uint8) << 1
+    diff_map |= masks.formula.astype(np.uint8) << 2
+    return diff_map
+
+
+# ------------------------------------------------------------ typed columns
+
+_NUMERIC_KINDS = {"integer", "floating", "mixed-integer-float", "boolean", "decimal"}
+_DATETIME_KINDS = {"datetime", "datetime64"}
+
+
+def column_kind(column):
+    """'empty', 'numeric', 'datetime', 'string' or 'mixed' for a pandas Series."""
+    kind = pd.api.types.infer_dtype(column, skipna=True)
+    if kind == "empty":
+        return "empty"
+    if kind in _NUMERIC_KINDS:
+        return "numeric"
+    if kind in _DATETIME_KINDS:
+        return "datetime"
+    if kind == "string":
+        return "string"
+    return "mixed"
+
+
+def _as_float(values):
+    try:
+        return values.astype(np.float64)
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def _as_datetime(values):
+    try:
+        return np.asarray(values, dtype="datetime64[us]")
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def column_differs(old, new, tolerance=None):
+    """
+    True where two aligned columns (equal-length Series) differ; an empty
+    cell only equals an empty cell. The dtype of each column is inferred
+    once: numeric columns are compared as float64 arrays (within
+    ``tolerance``) and date columns as datetime64, anything else (text,
+    mixed) with one elementwise comparison whose few mismatches are then
+    checked for empty-vs-empty and, with a tolerance, for close numbers.
+    """
+    a = old.to_numpy()
+    b = new.to_numpy()
+    kind = column_kind(old)
+    if kind == column_kind(new):
+        if kind == "numeric":
+            fa = _as_float(a)
+            fb = _as_float(b)
+            if fa is not None and fb is not None:
+                return numbers_differ(fa, fb, tolerance)
+        elif kind == "datetime":
+            da = _as_datetime(a)
+            db = _as_datetime(b)
+            if da is not None and db is not None:
+                return (da != db) & ~(np.isnat(da) & np.isnat(db))
+
+    differs = np.asarray(a != b, dtype=bool)
+    candidates = np.flatnonzero(differs)
+    if len(candidates):
+        # NaN != NaN and None != NaN, but empty cells are equal
+        differs[candidates] = ~(pd.isna(a[candidates]) & pd.isna(b[candidates]))
+        if tolerance is not None:
+            candidates = candidates[differs[candidates]]
+            x = a[candidates].astype(object)
+            y = b[candidates].astype(object)
+            numeric = _numeric_types(_type_of(x)) & _numeric_types(_type_of(y))
+            if numeric.any():
+                differs[candidates[numeric]] = numbers_differ(
+                    x[numeric].astype(np.float64),
+                    y[numeric].astype(np.float64),
+                    tolerance,
+                )
+    return differs
+
+
+def cell_texts(values):
+    """str() of each value of a 1-D object array, with empty cells as ''."""
+    texts = np.full(len(values), "", dtype=object)
+    present = ~pd.isna(values) if len(values) else np.zeros(0, dtype=bool)
+    if present.any():
+        texts[present] = _to_str(values[present])
+    return texts
@@ -3,12 +3,39 @@ import numpy as np
 
 
 from openpyxl import load_workbook
+from openpyxl.cell.cell import Cell
 from openpyxl.styles.colors import COLOR_INDEX
 from openpyxl.writer.theme import theme_xml
+from openpyxl.utils.cell import range_boundaries
 import xml.etree.ElementTree as ET
+import logging
+
+from array import array
+from collections import namedtuple
+
+from excel.align import (
+    align_by_key,
+    align_columns as align_sheet_columns,
+    align_rows as align_sheet_rows,
+    take_columns,
+    take_rows,
+    ROW_ADDED,
+    ROW_EQUAL,
+    ROW_MOVED,
+    ROW_REMOVED,
+)
+from excel.changes import ChangeSet, CHANGE_MODIFIED, CHANGE_ADDED, CHANGE_REMOVED
+from excel.diff import column_differs
+from excel.formulas import FormulaTable
+from excel.sheet import SheetData, object_array, dims_to_array, used_extent
+from excel.styles import StyleMap, StyleTable
+from excel.xlsx_reader import XlsxWorkbook, SheetReader, DEFAULT_BLOCK_ROWS
+from excel.xls_reader import is_xls_file, load_xls_sheet
 
 THEME_NS = {"a": "http://schemas.openxmlformats.org/drawingml/2006/main"}
 
+logger = logging.getLogger(__name__)
+
 def _normalize_hex(value):
     if not value:
         return None
@@ -136,11 +163,374 @@ def _fill_color_to_hex(fill, wb, theme_colors):
             return hex_code
     return None
 
-def load_excel_with_styles(file_path, sheet_name=None):
+class ColorResolver:
+    """
+    Per-workbook memo for color -> hex resolution.
+
+    Theme colors are parsed once per workbook. Results are cached on the
+    normalized color descriptor (auto, type, rgb, indexed, theme, tint, role),
+    with an identity fast path for the Color objects openpyxl shares between
+    fonts and fills. hits / misses count lookups served from / added to the cache.
+    """
+
+    _ATTRS = ("type", "rgb", "indexed", "theme", "tint")
+
+    def __init__(self, wb):
+        self.wb = wb
+        self.theme_colors = _get_theme_colors(wb)
+        self._by_key = {}
+        # (id(color), role) -> (color, hex); the color is kept so its id stays valid
+        self._by_object = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _descriptor(self, color, role):
+        auto = _safe_color_attr(color, "auto") is True
+        return (auto,) + tuple(_safe_color_attr(color, attr) for attr in self._ATTRS) + (role,)
+
+    def color(self, color, role=None):
+        """Memoized _color_to_hex."""
+        if not color:
+            return None
+        object_key = (id(color), role)
+        entry = self._by_object.get(object_key)
+        if entry is not None and entry[0] is color:
+            self.hits += 1
+            return entry[1]
+
+        try:
+            key = self._descriptor(color, role)
+            hash(key)
+        except TypeError:
+            key = None
+        if key is not None and key in self._by_key:
+            self.hits += 1
+            hex_code = self._by_key[key]
+        else:
+            self.misses += 1
+            hex_code = _color_to_hex(color, self.wb, self.theme_colors, role=role)
+            if key is not None:
+                self._by_key[key] = hex_code
+        self._by_object[object_key] = (color, hex_code)
+        return hex_code
+
+    def fill(self, fill):
+        """Memoized _fill_color_to_hex."""
+        if not fill:
+            return None
+        for attr in ("fgColor", "start_color", "bgColor", "end_color"):
+            if hasattr(fill, attr):
+                hex_code = self.color(getattr(fill, attr), role="fill")
+                if hex_code:
+                    return hex_code
+        return None
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "distinct_colors": len(self._by_key),
+        }
+
+def _build_cell_style(font, fill, border, alignment, number_format, colors):
+    """
+    Translate openpyxl style parts into the plain dict the UI renders.
+    colors is the workbook's ColorResolver.
+    """
+    cell_style = {}
+
+    # Background Color
+    # Handling openpyxl color complexities slightly better
+    # We skip '00000000' if it appears as it often usually means transparent/auto in some contexts, but 'FF000000' is black.
+    if fill:
+        hex_code = colors.fill(fill)
+        if hex_code:
+            cell_style['bg'] = hex_code
+
+    # Font
+    if font:
+        font_style = {
+            'bold': font.bold,
+            'italic': font.italic,
+            'name': font.name,
+            'size': font.size
+        }
+        if font.color:
+            font_color = colors.color(font.color, role="font")
+            if font_color:
+                font_style['color'] = font_color
+
+        cell_style['font'] = font_style
+
+    # Alignment
+    if alignment:
+        cell_style['align'] = {
+            'horizontal': alignment.horizontal,
+            'vertical': alignment.vertical,
+            'wrap_text': alignment.wrap_text
+        }
+
+    # Number Format
+    if number_format:
+        cell_style['numfmt'] = number_format
+
+    # Borders
+    # Qt TableWidget doesn't support individual borders easily without a Delegate.
+    # We will extract it, but might not render it fully yet.
+    if border:
+        # Just checking if any border side exists
+        border_style = {}
+        if border.left and border.left.style: border_style['left'] = True
+        if border.right and border.right.style: border_style['right'] = True
+        if border.top and border.top.style: border_style['top'] = True
+        if border.bottom and border.bottom.style: border_style['bottom'] = True
+
+        if border_style:
+            cell_style['border'] = border_style
+
+    return cell_style
+
+def _xf_interner(book, colors, style_table):
+    """Return intern_xf(cellXfs index) -> style id in style_table, resolving each index once."""
+    xf_style_ids = {}
+
+    def intern_xf(style_id):
+        interned = xf_style_ids.get(style_id)
+        if interned is None:
+            cell_format = book.cell_format(style_id)
+            cell_style = _build_cell_style(*cell_format, colors) if cell_format else {}
+            interned = style_table.intern(cell_style)
+            xf_style_ids[style_id] = interned
+        return interned
+
+    return intern_xf
+
+def _load_sheet_single_pass(file_path, sheet_name=None, selection=None):
+    """
+    Build a SheetData from one streaming parse of the sheet XML.
+    Cached values, formulas and style indexes all come from the same pass.
+    """
+    with XlsxWorkbook(file_path) as book:
+        if selection is not None and selection.needs_name:
+            name = sheet_name or book.active_sheet_name()
+            selection = selection.resolved(book.defined_names(name), name)
+        reader = SheetReader(book, sheet_name, selection)
+        colors = ColorResolver(book)
+        style_table = StyleTable()
+        intern_xf = _xf_interner(book, colors, style_table)
+
+        # Flat per-cell accumulators; the dense matrices are allocated once
+        # the extent of the sheet is known.
+        cell_rows = array("q")
+        cell_cols = array("q")
+        cell_styles = array("i")
+        cell_values = []
+        formula_rows = array("q")
+        formula_cols = array("q")
+        # Formulas are interned by canonical key as they stream in
+        formula_table = FormulaTable()
+        formula_ids = array("i")
+
+        for block in reader.iter_blocks():
+            for row in block:
+                n = len(row.columns)
+                cell_rows.extend([row.index] * n)
+                cell_cols.extend(row.columns)
+                cell_styles.extend([intern_xf(sid) for sid in row.style_ids])
+                cell_values.extend(row.values)
+                for c_idx, formula in row.formulas.items():
+                    formula_rows.append(row.index)
+                    formula_cols.append(c_idx)
+                    formula_ids.append(formula_table.intern(formula, row.index, c_idx))
+
+        declared_extent = reader.declared_extent or (reader.max_row, reader.max_col)
+        col_widths = reader.col_widths
+        row_heights = reader.row_heights
+        # Cells missing from the XML still carry the default style in openpyxl.
+        default_id = intern_xf(0)
+        logger.debug("Color resolution for %s: %s", file_path, colors.stats())
+
+        # Trim trailing rows/columns that only hold empty, invisibly styled cells.
+        rows = np.frombuffer(cell_rows, dtype=np.int64)
+        cols = np.frombuffer(cell_cols, dtype=np.int64)
+        cell_style_arr = np.frombuffer(cell_styles, dtype=np.int32)
+        f_rows = np.frombuffer(formula_rows, dtype=np.int64)
+        f_cols = np.frombuffer(formula_cols, dtype=np.int64)
+        used = np.fromiter((v is not None for v in cell_values), dtype=bool, count=len(cell_values))
+        used |= style_table.visible_ids()[cell_style_arr]
+        n_rows, n_cols, merges = used_extent(
+            np.concatenate([rows[used], f_rows]),
+            np.concatenate([cols[used], f_cols]),
+            reader.merges,
+        )
+
+    keep = (rows < n_rows) & (cols < n_cols)
+    positions = rows[keep] * n_cols + cols[keep]
+    values = np.empty(n_rows * n_cols, dtype=object)
+    values[positions] = object_array(cell_values)[keep]
+    style_ids = np.full(n_rows * n_cols, default_id, dtype=np.int32)
+    style_ids[positions] = cell_style_arr[keep]
+
+    f_positions = f_rows * n_cols + f_cols
+    order = np.argsort(f_positions, kind="stable")
+
+    return SheetData(
+        values.reshape(n_rows, n_cols),
+        style_ids.reshape(n_rows, n_cols),
+        style_table,
+        f_positions[order],
+        np.frombuffer(formula_ids, dtype=np.int32)[order],
+        formula_table,
+        merges=merges,
+        col_widths=dims_to_array(col_widths, n_cols),
+        row_heights=dims_to_array(row_heights, n_rows),
+        name=sheet_name,
+        declared_extent=declared_extent,
+    )
+
+def load_sheet(file_path, sheet_name=None, single_pass=True, selection=None):
+    """
+    Load one worksheet into an array-backed SheetData.
+    single_pass=False goes through the openpyxl loader instead.
+    Legacy .xls files are read directly with xlrd.
+
+    selection (excel.selection.SheetSelection) limits the load to a range,
+    a column subset and/or rows to skip; everything else is left empty.
+    """
+    if is_xls_file(file_path):
+        try:
+            return load_xls_sheet(file_path, sheet_name, selection)
+        except Exception as e:
+            raise ValueError(f"Error loading file with styles: {str(e)}")
+    if single_pass:
+        try:
+            return _load_sheet_single_pass(file_path, sheet_name, selection)
+        except Exception as e:
+            raise ValueError(f"Error loading file with styles: {str(e)}")
+    loaded, declared_extent = _load_excel_with_styles(file_path, sheet_name, selection)
+    return SheetData.from_legacy(*loaded, name=sheet_name, declared_extent=declared_extent)
+
+# One dense block of a streamed sheet. values / style_ids are (rows, cols)
+# arrays whose [0, 0] is the absolute 0-based cell (start_row, start_col);
+# formulas maps absolute (row, col) -> text; style_ids index style_table,
+# which is shared by all blocks of a stream and grows as new styles appear.
+RowBlock = namedtuple("RowBlock", ["start_row", "start_col", "values", "style_ids", "formulas", "style_table"])
+
+def _range_bounds(cell_range):
+    """0-based inclusive (min_row, min_col, max_row, max_col) of an A1 range; open ends are None."""
+    if not cell_range:
+        return 0, 0, None, None
+    min_col, min_row, max_col, max_row = range_boundaries(cell_range.replace("$", "").upper())
+    return (
+        (min_row or 1) - 1,
+        (min_col or 1) - 1,
+        max_row - 1 if max_row else None,
+        max_col - 1 if max_col else None,
+    )
+
+def _sheet_blocks(sheet, block_rows, bounds):
+    """Slice an already loaded SheetData into RowBlocks."""
+    r0, c0, r1, c1 = bounds
+    last_row = sheet.n_rows - 1 if r1 is None else min(r1, sheet.n_rows - 1)
+    last_col = sheet.n_cols - 1 if c1 is None else c1
+    n_cols = max(last_col - c0 + 1, 1)
+    formulas = {}
+    for (r, c), text in sheet.iter_formulas():
+        if r0 <= r <= last_row and c0 <= c <= last_col:
+            formulas[(r, c)] = text
+    for start in range(r0, last_row + 1, block_rows):
+        stop = min(start + block_rows, last_row + 1)
+        values = np.empty((stop - start, n_cols), dtype=object)
+        style_ids = np.zeros((stop - start, n_cols), dtype=np.int32)
+        width = max(min(sheet.n_cols - c0, n_cols), 0)
+        values[:, :width] = sheet.values[start:stop, c0:c0 + width]
+        style_ids[:, :width] = sheet.style_ids[start:stop, c0:c0 + width]
+        block_formulas = {key: text for key, text in formulas.items() if start <= key[0] < stop}
+        yield RowBlock(start, c0, values, style_ids, block_formulas, sheet.style_table)
+
+def iter_sheet_blocks(file_path, sheet_name=None, block_rows=DEFAULT_BLOCK_ROWS, cell_range=None):
+    """
+    Stream a worksheet as dense RowBlocks of ``block_rows`` rows (the last
+    block may be shorter), in bounded memory.
+
+    cell_range limits the stream to an A1 range such as "B2:F500"; open
+    ranges like "A:D" or "10:200" work too. Without a column bound the block
+    width is the widest column seen so far, so it can grow between blocks.
+    Rows with no cells inside the range are yielded as empty rows. Unlike
+    load_sheet the stream is not trimmed to the used range: trailing empty
+    but styled cells are included.
+    """
+    block_rows = max(int(block_rows), 1)
+    try:
+        bounds = _range_bounds(cell_range)
+    except Exception as e:
+        raise ValueError(f"Invalid cell range '{cell_range}': {str(e)}")
+    r0, c0, r1, c1 = bounds
+
+    if is_xls_file(file_path):
+        # xlrd always parses the whole sheet, so slice the loaded sheet.
+        yield from _sheet_blocks(load_sheet(file_path, sheet_name), block_rows, bounds)
+        return
+
+    with XlsxWorkbook(file_path) as book:
+        reader = SheetReader(book, sheet_name)
+        style_table = StyleTable()
+        intern_xf = _xf_interner(book, ColorResolver(book), style_table)
+        default_id = intern_xf(0)
+        width = c1 - c0 + 1 if c1 is not None else 1
+
+        def build(start, rows, n_rows):
+            nonlocal width
+            if c1 is None:
+                for row in rows:
+                    width = max(width, row.columns[-1] - c0 + 1)
+            values = np.empty((n_rows, width), dtype=object)
+            style_ids = np.full((n_rows, width), default_id, dtype=np.int32)
+            formulas = {}
+            for row in rows:
+                r = row.index - start
+                for c_idx, value, xf in zip(row.columns, row.values, row.style_ids):
+                    if c_idx < c0 or (c1 is not None and c_idx > c1):
+                        continue
+                    values[r, c_idx - c0] = value
+                    style_ids[r, c_idx - c0] = intern_xf(xf)
+                for c_idx, text in row.formulas.items():
+                    if c_idx >= c0 and (c1 is None or c_idx <= c1):
+                        formulas[(row.index, c_idx)] = text
+            return RowBlock(start, c0, values, style_ids, formulas, style_table)
+
+        pending = []
+        start = r0
+        for row in reader.iter_rows():
+            if row.index < r0:
+                continue
+            if r1 is not None and row.index > r1:
+                break
+            while row.index >= start + block_rows:
+                yield build(start, pending, block_rows)
+                pending = []
+                start += block_rows
+            pending.append(row)
+        if pending:
+            yield build(start, pending, pending[-1].index - start + 1)
+
+def load_excel_with_styles(file_path, sheet_name=None, single_pass=False, selection=None):
     """
     Load an Excel file including its styles and merged cells.
-    Returns: (DataFrame, styles_dict, merges_list)
+    Returns: (DataFrame, StyleMap, merges_list, formulas_dict, col_widths, row_heights)
+
+    single_pass=True reads values, formulas and styles from one parse of the
+    sheet XML instead of opening the workbook twice through openpyxl.
     """
+    if single_pass or is_xls_file(file_path):
+        return load_sheet(file_path, sheet_name, selection=selection).to_legacy()
+    loaded, _declared_extent = _load_excel_with_styles(file_path, sheet_name, selection)
+    return loaded
+
+def _load_excel_with_styles(file_path, sheet_name=None, selection=None):
+    """openpyxl loader behind load_excel_with_styles; also returns the declared (rows, cols)."""
     try:
         # data_only=True gets values instead of formulas
         wb_values = load_workbook(file_path, data_only=True)
@@ -153,12 +543,19 @@ def load_excel_with_styles(file_path, sheet_name=None):
         else:
             ws = wb_values.active # Default to first sheet
             ws_formulas = wb_formulas.active
-        theme_colors = _get_theme_colors(wb_values)
+        if selection is not None and selection.needs_name:
+            names = {name: dn.attr_text for name, dn in wb_values.defined_names.items()}
+            names.update({name: dn.attr_text for name, dn in ws.defined_names.items()})
+            selection = selection.resolved(names, ws.title)
+        wanted = selection.wants if selection is not None else None
+        colors = ColorResolver(wb_values)
         
         data = []
-        styles = {}
+        styles = StyleMap()
         formulas = {}
         merges = []
+        # openpyxl style array -> interned style id
+        array_style_ids = {}
         
         # 1. Extract Merged Cells
         # Openpyxl ranges are 1-based indices
@@ -168,16 +565,52 @@ def load_excel_with_styles(file_path, sheet_name=None):
             c_idx = rng.min_col - 1
             r_span = rng.max_row - rng.min_row + 1
             c_span = rng.max_col - rng.min_col + 1
+            if wanted and not wanted(r_idx, c_idx):
+                continue
             merges.append((r_idx, c_idx, r_span, c_span))
 
-        # 2. Iterate Rows for Data and Styles
-        # We assume a rectangular grid based on max dimensions
-        max_row = ws.max_row
-        max_col = ws.max_column
-        
+        def style_id_of(cell):
+            # Style extraction (once per distinct style array)
+            style_key = tuple(cell._style) if cell._style is not None else None
+            style_id = array_style_ids.get(style_key)
+            if style_id is None:
+                cell_style = _build_cell_style(
+                    cell.font, cell.fill, cell.border, cell.alignment, cell.number_format,
+                    colors,
+                )
+                style_id = styles.table.intern(cell_style)
+                array_style_ids[style_key] = style_id
+            return style_id
+
+        # 2. Used range: ws.max_row / ws.max_column also count empty styled
+        # cells, so trim to cells with a value, a formula or a visible format.
+        declared_extent = (ws.max_row, ws.max_column)
+        used_rows = []
+        used_cols = []
+        for (row, col), cell in ws._cells.items():
+            if wanted and not wanted(row - 1, col - 1):
+                continue
+            used = cell.value is not None
+            if not used:
+                formula_cell = ws_formulas._cells.get((row, col))
+                used = formula_cell is not None and formula_cell.data_type == 'f'
+            if not used:
+                used = styles.table.is_visible(style_id_of(cell))
+            if used:
+                used_rows.append(row - 1)
+                used_cols.append(col - 1)
+        max_row, max_col, merges = used_extent(used_rows, used_cols, merges)
+        # Cells outside the selection are left empty with the default style.
+        default_style_id = style_id_of(Cell(ws)) if wanted else None
+
+        # 3. Iterate Rows for Data and Styles
         for r_idx, row in enumerate(ws.iter_rows(max_row=max_row, max_col=max_col)):
             row_data = []
             for c_idx, cell in enumerate(row):
+                if wanted and not wanted(r_idx, c_idx):
+                    row_data.append(None)
+                    styles.set_id((r_idx, c_idx), default_style_id)
+                    continue
                 # Value
                 row_data.append(cell.value)
 
@@ -189,64 +622,11 @@ def load_excel_with_styles(file_path, sheet_name=None):
                 except Exception:
                     pass
                 
-                # Style Extraction
-                cell_style = {}
-                
-                # Background Color
-                # Handling openpyxl color complexities slightly better
-                # We skip '00000000' if it appears as it often usually means transparent/auto in some contexts, but 'FF000000' is black.
-                if cell.fill:
-                    hex_code = _fill_color_to_hex(cell.fill, wb_values, theme_colors)
-                    if hex_code:
-                        cell_style['bg'] = hex_code
-
-                # Font
-                if cell.font:
-                    font_style = {
-                        'bold': cell.font.bold,
-                        'italic': cell.font.italic,
-                        'name': cell.font.name,
-                        'size': cell.font.size
-                    }
-                    if cell.font.color:
-                        font_color = _color_to_hex(cell.font.color, wb_values, theme_colors, role="font")
-                        if font_color:
-                            font_style['color'] = font_color
-                    
-                    cell_style['font'] = font_style
-
-                # Alignment
-                if cell.alignment:
-                    cell_style['align'] = {
-                        'horizontal': cell.alignment.horizontal,
-                        'vertical': cell.alignment.vertical,
-                        'wrap_text': cell.alignment.wrap_text
-                    }
-
-                # Number Format
-                if cell.number_format:
-                    cell_style['numfmt'] = cell.number_format
-                
-                # Borders
-                # Qt TableWidget doesn't support individual borders easily without a Delegate.
-                # We will extract it, but might not render it fully yet.
-                if cell.border:
-                    # Just checking if any border side exists
-                    border_style = {}
-                    if cell.border.left and cell.border.left.style: border_style['left'] = True
-                    if cell.border.right and cell.border.right.style: border_style['right'] = True
-                    if cell.border.top and cell.border.top.style: border_style['top'] = True
-                    if cell.border.bottom and cell.border.bottom.style: border_style['bottom'] = True
-                    
-                    if border_style:
-                        cell_style['border'] = border_style
-
-                if cell_style:
-                    styles[(r_idx, c_idx)] = cell_style
+                styles.set_id((r_idx, c_idx), style_id_of(cell))
 
             data.append(row_data)
 
-        # 3. Extract Column Widths and Row Heights
+        # 4. Extract Column Widths and Row Heights
         col_widths = {}
         row_heights = {}
         
@@ -256,65 +636,163 @@ def load_excel_with_styles(file_path, sheet_name=None):
         for col_char, dim in ws.column_dimensions.items():
             if dim.width:
                 col_idx = column_index_from_string(col_char) - 1
-                col_widths[col_idx] = dim.width
+                if col_idx < max_col:
+                    col_widths[col_idx] = dim.width
             
         # Row Heights
         for row_idx, dim in ws.row_dimensions.items():
-            if dim.height:
+            if dim.height and row_idx <= max_row:
                 row_heights[row_idx - 1] = dim.height
 
+        logger.debug("Color resolution for %s: %s", file_path, colors.stats())
         df = pd.DataFrame(data)
-        return df, styles, merges, formulas, col_widths, row_heights
+        return (df, styles, merges, formulas, col_widths, row_heights), declared_extent
 
     except Exception as e:
         raise ValueError(f"Error loading file with styles: {str(e)}")
 
-def load_excel(file_path):
+def load_excel(file_path, selection=None):
     # Backward compatibility wrapper or just use pandas for pure data
-    return load_excel_with_styles(file_path)[0]
+    return load_sheet(file_path, selection=selection).df
 
 
-def compare_dataframes(df_old: pd.DataFrame, df_new: pd.DataFrame):
+def compare_dataframes(df_old: pd.DataFrame, df_new: pd.DataFrame, tolerance=None, align_rows=False,
+                       align_columns=False, header_row=None, key_columns=None, row_hashes=None):
     """
     Compare two DataFrames and return a summary of changes.
+    Columns are compared one typed array at a time (see excel.diff.column_differs);
+    only changed cells are turned into strings. ``tolerance`` is an optional
+    excel.diff.NumericTolerance for numeric cells.
+
+    align_rows=True first aligns the rows (excel.align.align_rows) so that
+    inserted and deleted rows show up as such instead of shifting everything
+    below them. Rows are then reported in aligned order: the result carries
+    the ``alignment`` (RowAlignment.to_dict()) and change types "added" /
+    "removed" for cells of inserted / deleted rows.
+
+    align_columns=True matches columns by content (and by the text of
+    ``header_row``, if given) before anything else, see
+    excel.align.align_columns. Only matched column pairs are diffed; inserted,
+    deleted and moved columns are reported once in ``column_alignment``
+    (ColumnAlignment.to_dict()) and ``col`` indexes refer to the aligned order.
+
+    key_columns (0-based column indexes, the same on both sides) compares
+    record tables instead: rows are joined on their key cells wherever they
+    are (excel.align.align_by_key), takes precedence over align_rows and adds
+    a ``key`` to every change plus the ``duplicate_keys`` found.
+
+    row_hashes: optional (old, new) per-row value hashes of the two frames,
+    e.g. SheetData.row_hashes(). Rows whose hashes agree (or rows aligned as
+    equal) are not compared cell by cell.
     """
-    # 1. Align Columns (by index since we don't have headers)
+    column_alignment = None
+    alignment = None
+    matched = None
+    keys_old = keys_new = None
+    duplicates = None
+    if align_columns or align_rows or key_columns:
+        values_old = df_old.to_numpy(dtype=object)
+        values_new = df_new.to_numpy(dtype=object)
+        if key_columns:
+            keys_old = take_columns(values_old, [k if k < values_old.shape[1] else -1 for k in key_columns])
+            keys_new = take_columns(values_new, [k if k < values_new.shape[1] else -1 for k in key_columns])
+        if align_columns:
+            column_alignment = align_sheet_columns(values_old, values_new, header_row)
+            values_old = take_columns(values_old, column_alignment.old_cols)
+            values_new = take_columns(values_new, column_alignment.new_cols)
+            matched = column_alignment.matched
+        # Rows are compared on matched columns only, or an inserted column
+        # would make every row look different
+        compared = np.flatnonzero(matched) if matched is not None else slice(None)
+        hashes = row_hashes if matched is None else None
+        if key_columns:
+            alignment, duplicates, duplicate_count = align_by_key(
+                keys_old, keys_new, values_old[:, compared], values_new[:, compared], hashes
+            )
+        elif align_rows:
+            alignment = align_sheet_rows(values_old[:, compared], values_new[:, compared], hashes)
+        if alignment is not None:
+            values_old = take_rows(values_old, alignment.old_rows)
+            values_new = take_rows(values_new, alignment.new_rows)
+        df_old = pd.DataFrame(values_old)
+        df_new = pd.DataFrame(values_new)
+
+    # 1. Align Columns (by index unless aligned above)
     max_cols = max(df_old.shape[1], df_new.shape[1])
     
-    # Reindex columns to ensure matching shape
-    df_old = df_old.reindex(columns=range(max_cols))
-    df_new = df_new.reindex(columns=range(max_cols))
-    
     # 2. Align Rows
     max_rows = max(len(df_old), len(df_new))
-    df_old = df_old.reindex(index=range(max_rows))
-    df_new = df_new.reindex(index=range(max_rows))
+    empty = pd.Series([None] * max_rows, dtype=object)
 
-    changes = []
-    
-    # 3. Iterate and Compare cell-by-cell
-    # Fill NaN with a placeholder
-    df_old_filled = df_old.fillna("###NULL###")
-    df_new_filled = df_new.fillna("###NULL###")
-    
-    diff_mask = (df_old_filled != df_new_filled)
-    
-    # Get coordinates of differences
-    diff_locations = np.where(diff_mask)
-    rows = diff_locations[0]
-    cols = diff_locations[1]
-    
-    for r, c in zip(rows, cols):
-        old_val = df_old.iloc[r, c]
-        new_val = df_new.iloc[r, c]
-        
-        changes.append({
-            "row": int(r),
-            "col": int(c),
-            "old": str(old_val) if pd.notna(old_val) else "",
-            "new": str(new_val) if pd.notna(new_val) else "",
-            "type": "modified"
-        })
+    def aligned(df, c):
+        if c >= df.shape[1]:
+            return empty
+        column = df.iloc[:, c]
+        if len(column) != max_rows or not column.index.equals(empty.index):
+            column = column.reset_index(drop=True).reindex(range(max_rows))
+        return column
+
+    # Rows known to be identical are left out of the cell comparison
+    equal_rows = None
+    if alignment is not None:
+        # Moved rows are unchanged, only reported once as a moved block
+        equal_rows = (alignment.kinds == ROW_EQUAL) | (alignment.kinds == ROW_MOVED)
+    elif row_hashes is not None:
+        padded = [np.zeros(max_rows, dtype=np.uint64) for _ in row_hashes]
+        for pad, hashes in zip(padded, row_hashes):
+            pad[:min(len(hashes), max_rows)] = hashes[:max_rows]
+        equal_rows = padded[0] == padded[1]
+    todo = np.flatnonzero(~equal_rows) if equal_rows is not None and equal_rows.any() else None
+
+    # 3. Compare column by column
+    change_rows = []
+    change_cols = []
+    old_values = []
+    new_values = []
+    for c in range(max_cols):
+        if matched is not None and not matched[c]:
+            continue
+        old = aligned(df_old, c)
+        new = aligned(df_new, c)
+        if todo is not None:
+            if not len(todo):
+                break
+            old = old.iloc[todo].reset_index(drop=True)
+            new = new.iloc[todo].reset_index(drop=True)
+        rows = np.flatnonzero(column_differs(old, new, tolerance))
+        if not len(rows):
+            continue
+        # Values stay as they are; ChangeSet stringifies only what is shown
+        old_values.append(old.to_numpy(dtype=object)[rows])
+        new_values.append(new.to_numpy(dtype=object)[rows])
+        change_rows.append(todo[rows] if todo is not None else rows)
+        change_cols.append(np.full(len(rows), c, dtype=np.int64))
+
+    changes = ChangeSet()
+    if change_rows:
+        rows = np.concatenate(change_rows)
+        cols = np.concatenate(change_cols)
+        # Row-major order, as a cell-by-cell walk would report them
+        order = np.lexsort((cols, rows))
+        rows = rows[order]
+        types = np.full(len(rows), CHANGE_MODIFIED, dtype=np.uint8)
+        if alignment is not None:
+            kinds = alignment.kinds[rows]
+            types[kinds == ROW_ADDED] = CHANGE_ADDED
+            types[kinds == ROW_REMOVED] = CHANGE_REMOVED
+        key_cells = key_index = None
+        if keys_old is not None:
+            # Key cells of each changed record, from the new row (old if removed)
+            changed, key_index = np.unique(rows, return_inverse=True)
+            new_rows = alignment.new_rows[changed]
+            key_cells = take_rows(keys_new, new_rows)
+            removed = new_rows < 0
+            key_cells[removed] = take_rows(keys_old, alignment.old_rows[changed[removed]])
+        changes = ChangeSet(
+            rows, cols[order], types,
+            np.concatenate(old_values)[order], np.concatenate(new_values)[order],
+            key_cells=key_cells, key_index=key_index,
+        )
 
     # Summary Stats
     summary = {
@@ -323,7 +801,17 @@ def compare_dataframes(df_old: pd.DataFrame, df_new: pd.DataFrame):
         "changes_count": len(changes)
     }
 
-    return {
+    result = {
         "changes": changes,
         "summary": summary
     }
+    if alignment is not None:
+        summary.update(alignment.counts())
+        result["alignment"] = alignment.to_dict()
+    if duplicates is not None:
+        summary["duplicate_keys"] = duplicate_count
+        result["duplicate_keys"] = duplicates
+    if column_alignment is not None:
+        summary.update(column_alignment.counts())
+        result["column_alignment"] = column_alignment.to_dict()
+    return result
@@ -0,0 +1,170 @@
+"""Canonical formula keys.
+
+A formula is keyed by its relative R1C1 form: every A1 reference becomes an
+offset from the formula's own cell (R[-1]C[2]), or an absolute R5C3 where
+the reference has $ markers. A formula filled down a column therefore has
+one key in every row, and keeps it when rows or columns are inserted above
+or to the left of it. String literals and quoted sheet names are left alone.
+
+FormulaTable interns the keys, so a sheet stores one int32 id per formula
+cell and each distinct formula once; the A1 text is rebuilt from the key
+and the cell when it is shown. Converted references are delimited by a
+control character, which XML cannot hold, so a key always renders back to
+the exact text it came from.
+"""
+import re
+
+# Excel's limits, beyond which a token is a name rather than a reference
+MAX_ROWS = 1048576
+MAX_COLUMNS = 16384
+
+# Delimits the references converted in a key; prefixes a key holding the
+# formula as it is, for the odd formula that contains either character
+_REF = "\x01"
+_VERBATIM = "\x02"
+
+# Quoted parts are copied as they are: "string literals" and 'sheet names'
+_QUOTED = re.compile(r"\"(?:[^\"]|\"\")*\"|'(?:[^']|'')*'")
+_A1_REF = re.compile(
+    r"(?<![\w.$])(?:"
+    r"(\$?)([A-Z]{1,3})(\$?)(\d+)(?![\w.(!])"
+    r"|(\$?)([A-Z]{1,3}):(\$?)([A-Z]{1,3})(?![\w.(!])"
+    r"|(\$?)(\d+):(\$?)(\d+)(?![\w.(!])"
+    r")"
+)
+_PART = r"(\[-?\d+\]|\d+)"
+_KEY_REF = re.compile(rf"{_REF}(?:R{_PART}C{_PART}|C{_PART}:C{_PART}|R{_PART}:R{_PART}){_REF}")
+
+
+def _column_number(letters):
+    number = 0
+    for ch in letters:
+        number = number * 26 + ord(ch) - 64
+    return number
+
+
+def _column_letters(number):
+    letters = ""
+    while number > 0:
+        number, remainder = divmod(number - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _relative(absolute, number, origin):
+    """R1C1 part of a 1-based row / column number seen from a 1-based origin."""
+    return str(number) if absolute else f"[{number - origin}]"
+
+
+def _absolute(part, origin):
+    """(is_absolute, 1-based number) of an R1C1 part."""
+    if part.startswith("["):
+        return False, origin + int(part[1:-1])
+    return True, int(part)
+
+
+def _rewrite(formula, pattern, replace):
+    """Apply a reference substitution outside the quoted parts of a formula."""
+    if '"' not in formula and "'" not in formula:
+        return pattern.sub(replace, formula)
+    out = []
+    last = 0
+    for quoted in _QUOTED.finditer(formula):
+        out.append(pattern.sub(replace, formula[last:quoted.start()]))
+        out.append(quoted.group())
+        last = quoted.end()
+    out.append(pattern.sub(replace, formula[last:]))
+    return "".join(out)
+
+
+def r1c1_key(formula, row, col):
+    """
+    Relative R1C1 form of an A1 formula sitting in 0-based cell (row, col).
+    References written in a non-canonical way (leading zeros) or out of
+    Excel's range are left as they are.
+    """
+    row += 1
+    col += 1
+
+    def replace(match):
+        col_abs, letters, row_abs, digits, c1_abs, c1, c2_abs, c2, r1_abs, r1, r2_abs, r2 = match.groups()
+        if letters is not None:
+            number = _column_number(letters)
+            if number > MAX_COLUMNS or digits[0] == "0" or int(digits) > MAX_ROWS:
+                return match.group()
+            return f"{_REF}R{_relative(row_abs, int(digits), row)}C{_relative(col_abs, number, col)}{_REF}"
+        if c1 is not None:
+            first, last = _column_number(c1), _column_number(c2)
+            if max(first, last) > MAX_COLUMNS:
+                return match.group()
+            return f"{_REF}C{_relative(c1_abs, first, col)}:C{_relative(c2_abs, last, col)}{_REF}"
+        if r1[0] == "0" or r2[0] == "0" or max(int(r1), int(r2)) > MAX_ROWS:
+            return match.group()
+        return f"{_REF}R{_relative(r1_abs, int(r1), row)}:R{_relative(r2_abs, int(r2), row)}{_REF}"
+
+    return _rewrite(formula, _A1_REF, replace)
+
+
+def a1_formula(key, row, col):
+    """A1 text of a formula key (see formula_key) in 0-based cell (row, col)."""
+    if key.startswith(_VERBATIM):
+        return key[1:]
+    row += 1
+    col += 1
+
+    def row_part(part):
+        absolute, number = _absolute(part, row)
+        return f"${number}" if absolute else str(number)
+
+    def col_part(part):
+        absolute, number = _absolute(part, col)
+        return f"${_column_letters(number)}" if absolute else _column_letters(number)
+
+    def replace(match):
+        r, c, c1, c2, r1, r2 = match.groups()
+        if r is not None:
+            return col_part(c) + row_part(r)
+        if c1 is not None:
+            return f"{col_part(c1)}:{col_part(c2)}"
+        return f"{row_part(r1)}:{row_part(r2)}"
+
+    return _KEY_REF.sub(replace, key)
+
+
+def formula_key(formula, row, col):
+    """Key of a formula in 0-based cell (row, col), see r1c1_key."""
+    if _REF in formula or _VERBATIM in formula:
+        return _VERBATIM + formula
+    return r1c1_key(formula, row, col)
+
+
+class FormulaTable:
+    """Distinct formula keys, indexed by id."""
+
+    def __init__(self, keys=()):
+        self.keys = []
+        self._index = {}
+        for key in keys:
+            self.intern_key(key)
+
+    def intern_key(self, key):
+        formula_id = self._index.get(key)
+        if formula_id is None:
+            formula_id = len(self.keys)
+            self.keys.append(key)
+            self._index[key] = formula_id
+        return formula_id
+
+    def intern(self, formula, row, col):
+        """Id of an A1 formula sitting in 0-based cell (row, col)."""
+        return self.intern_key(formula_key(formula, row, col))
+
+    def text(self, formula_id, row, col):
+        """A1 text of formula ``formula_id`` in 0-based cell (row, col)."""
+        return a1_formula(self.keys[formula_id], row, col)
+
+    def __getitem__(self, formula_id):
+        return self.keys[formula_id]
+
+    def __len__(self):
+        return len(self.keys)
@@ -0,0 +1,156 @@
+"""Parse several workbooks at once in separate processes.
+
+Each child process parses one sheet (through the parse cache) and copies the
+SheetData columns (see SheetData.to_columns) into a single shared memory
+block. Only the block name and the array layout travel back through the pipe;
+the parent rebuilds the SheetData straight from the shared buffer, so no
+DataFrame or cell object is ever pickled.
+"""
+import multiprocessing
+import traceback
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from excel.cache import load_cached_sheet, load_sheet_cached, selection_key
+from excel.sheet import SheetData
+
+_ALIGN = 64
+
+
+def _pack_columns(columns):
+    """Copy a dict of arrays into one new SharedMemory block. Returns (shm, layout)."""
+    arrays = {name: np.ascontiguousarray(arr) for name, arr in columns.items()}
+    layout = []
+    offset = 0
+    for name, arr in arrays.items():
+        offset = (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+        layout.append((name, arr.dtype.str, arr.shape, offset, arr.nbytes))
+        offset += arr.nbytes
+
+    shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for name, _dtype, _shape, start, nbytes in layout:
+        if nbytes:
+            shm.buf[start:start + nbytes] = arrays[name].reshape(-1).view(np.uint8)
+    return shm, layout
+
+
+def _unpack_columns(shm, layout):
+    """Copy the arrays back out of a block written by _pack_columns."""
+    columns = {}
+    for name, dtype, shape, start, nbytes in layout:
+        dtype = np.dtype(dtype)
+        count = nbytes // dtype.itemsize if dtype.itemsize else 0
+        arr = np.frombuffer(shm.buf, dtype=dtype, count=count, offset=start)
+        # Copy so the block can be released as soon as the sheet is rebuilt.
+        columns[name] = arr.reshape(shape).copy()
+        del arr
+    return columns
+
+
+def _attach(name):
+    """Open an existing block; the child that created it is responsible for unlinking."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13: the spawned children share this process' resource
+        # tracker, so the registration made here is cleared by the child's unlink.
+        return shared_memory.SharedMemory(name=name)
+
+
+def _load_worker(conn, file_path, sheet_name, selection=None):
+    try:
+        sheet = load_sheet_cached(file_path, sheet_name, selection)
+        shm, layout = _pack_columns(sheet.to_columns())
+    except Exception as e:
+        conn.send(("error", f"{str(e)}\n{traceback.format_exc()}"))
+        conn.close()
+        return
+
+    try:
+        conn.send(("ok", shm.name, layout))
+        # Keep the block alive until the parent has copied it out; on Windows
+        # it disappears as soon as the last handle is closed.
+        conn.recv()
+    except (EOFError, OSError):
+        pass
+    finally:
+        shm.close()
+        shm.unlink()
+        conn.close()
+
+
+def _receive_sheet(conn):
+    try:
+        message = conn.recv()
+    except EOFError:
+        raise ValueError("Error loading Excel file: worker process exited unexpectedly")
+    if message[0] == "error":
+        raise ValueError(f"Error loading Excel file: {message[1]}")
+
+    _status, name, layout = message
+    shm = _attach(name)
+    try:
+        columns = _unpack_columns(shm, layout)
+    finally:
+        shm.close()
+        conn.send("done")
+    return SheetData.from_columns(columns)
+
+
+def load_sheets_parallel(requests, selection=None):
+    """
+    Load [(file_path, sheet_name), ...] into a list of SheetData, one child
+    process per request. Runs in the calling (worker) thread; the GUI thread
+    stays free while it waits on the pipes. ``selection`` (a SheetSelection)
+    applies to every request.
+    """
+    # spawn everywhere: forking a process that runs Qt threads is not safe.
+    ctx = multiprocessing.get_context("spawn")
+    workers = []
+    try:
+        for file_path, sheet_name in requests:
+            parent_conn, child_conn = ctx.Pipe()
+            process = ctx.Process(
+                target=_load_worker,
+                args=(child_conn, file_path, sheet_name, selection),
+                daemon=True,
+            )
+            process.start()
+            child_conn.close()
+            workers.append((process, parent_conn))
+
+        return [_receive_sheet(conn) for _process, conn in workers]
+    finally:
+        for process, conn in workers:
+            conn.close()
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+
+def load_sheets(requests, selection=None):
+    """
+    Load [(file_path, sheet_name), ...] into SheetData. Cached sheets are
+    read directly; when two or more still need parsing they are parsed in
+    parallel processes, falling back to sequential loading if processes
+    cannot be started.
+    """
+    extra = selection_key(selection)
+    sheets = [load_cached_sheet(file_path, sheet_name, extra) for file_path, sheet_name in requests]
+    missing = [i for i, sheet in enumerate(sheets) if sheet is None]
+
+    if len(missing) >= 2:
+        try:
+            loaded = load_sheets_parallel([requests[i] for i in missing], selection)
+            for i, sheet in zip(missing, loaded):
+                sheets[i] = sheet
+            missing = []
+        except ValueError:
+            raise
+        except Exception as e:
+            print(f"Parallel load unavailable, loading sequentially: {e}")
+
+    for i in missing:
+        sheets[i] = load_sheet_cached(*requests[i], selection=selection)
+    return sheets
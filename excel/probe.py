@@ -0,0 +1,55 @@
+"""Lightweight workbook probe.
+
+Reads only the workbook part, docProps/core.xml and the head of each sheet
+XML (up to its <dimension>) to report sheet names, declared dimensions,
+author, last-saved-by and the content fingerprint, without loading the
+workbook. Results are memoized per file path, size and mtime, so the sheet
+combo, the file card metadata and /api/sheets all share one probe.
+"""
+from excel.cache import file_fingerprint
+from excel.xls_reader import is_xls_file, probe_xls
+from excel.xlsx_reader import XlsxWorkbook
+
+_probes = {}
+
+
+def _probe_xlsx(path):
+    with XlsxWorkbook(path) as book:
+        sheets = book.sheetnames
+        props = book.core_properties()
+        dimensions = {name: book.sheet_dimension(name) for name in sheets}
+        active = book.sheets[book.active_index][0] if 0 <= book.active_index < len(sheets) else None
+    return {
+        "sheets": sheets,
+        "dimensions": dimensions,
+        "active_sheet": active,
+        "author": props["creator"],
+        "last_saved_by": props["lastModifiedBy"],
+    }
+
+
+def _probe_legacy_xls(path):
+    info = probe_xls(path)
+    return {
+        "sheets": info["sheets"],
+        "dimensions": {name: None for name in info["sheets"]},
+        "active_sheet": info["sheets"][0] if info["sheets"] else None,
+        "author": None,
+        "last_saved_by": info["last_saved_by"],
+    }
+
+
+def probe_workbook(file_path):
+    """
+    Return a dict with ``sheets``, ``dimensions`` ({name: (rows, cols) or None}),
+    ``active_sheet``, ``author``, ``last_saved_by``, ``fingerprint``, ``size``
+    and ``path``. The dict is shared between callers and must not be modified.
+    """
+    path, size, mtime_ns, digest = file_fingerprint(file_path)
+    key = (path, size, mtime_ns)
+    info = _probes.get(key)
+    if info is None:
+        info = _probe_legacy_xls(path) if is_xls_file(path) else _probe_xlsx(path)
+        info.update({"path": path, "size": size, "fingerprint": digest})
+        _probes[key] = info
+    return info
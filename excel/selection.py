@@ -0,0 +1,155 @@
+"""Region, column and row pushdown for the sheet loaders.
+
+A SheetSelection tells a reader which cells to materialize. Cells outside it
+are skipped while the sheet is parsed (no value decoding, no style lookup)
+and come out as empty cells, so coordinates stay the sheet's own.
+"""
+from openpyxl.utils.cell import column_index_from_string, range_boundaries
+
+
+def _parse_spec(spec, column):
+    """
+    Parse "A:K,M,P:R" (columns) or "1:3,10" (rows) into a frozenset of 0-based
+    indexes. A list/tuple of such items (or 1-based row numbers) works too.
+    """
+    if spec is None or spec == "":
+        return None
+    items = spec.split(",") if isinstance(spec, str) else list(spec)
+    indexes = set()
+    for item in items:
+        if isinstance(item, int):
+            indexes.add(item - 1)
+            continue
+        item = str(item).strip().replace("$", "").upper()
+        if not item:
+            continue
+        start, _sep, end = item.partition(":")
+        end = end or start
+        if column:
+            lo, hi = column_index_from_string(start), column_index_from_string(end)
+        else:
+            lo, hi = int(start), int(end)
+        if lo > hi:
+            lo, hi = hi, lo
+        if lo < 1:
+            raise ValueError(f"Invalid {'column' if column else 'row'} spec '{item}'")
+        indexes.update(range(lo - 1, hi))
+    return frozenset(indexes)
+
+
+def parse_columns(spec):
+    """Sorted 0-based column indexes of a spec such as "A,C:D"; [] when empty."""
+    indexes = _parse_spec(spec, column=True)
+    return sorted(indexes) if indexes else []
+
+
+def _split_sheet_ref(ref):
+    """'Sheet 1'!$A$1:$K$9 -> ('Sheet 1', 'A1:K9'); a bare range gives (None, range)."""
+    ref = ref.strip()
+    if "!" in ref:
+        sheet, _sep, cells = ref.rpartition("!")
+        sheet = sheet.strip("'").replace("''", "'")
+        return sheet, cells.replace("$", "")
+    return None, ref.replace("$", "")
+
+
+class SheetSelection:
+    """
+    Cells a load should materialize.
+
+    - cell_range: A1 range ("B2:K500", "A:K", "5:200") or a defined name
+    - columns: column subset, e.g. "A:K,M"
+    - skip_rows: int = number of leading rows of the region to skip (headers),
+      or a row spec such as "1:3,10" (1-based sheet rows)
+    """
+
+    def __init__(self, cell_range=None, columns=None, skip_rows=None):
+        self.cell_range = cell_range.strip() if isinstance(cell_range, str) and cell_range.strip() else None
+        self.columns = columns
+        self.skip_rows = skip_rows
+        self.column_set = _parse_spec(columns, column=True)
+        self.bounds = None
+        if self.cell_range:
+            try:
+                self.bounds = self._bounds(self.cell_range)
+            except ValueError:
+                # Not an A1 reference: a defined name, see resolved().
+                self.bounds = None
+        r0 = self.bounds[0] if self.bounds else 0
+        if isinstance(skip_rows, int) and not isinstance(skip_rows, bool):
+            self.first_row = r0 + skip_rows
+            self.skip_set = None
+        else:
+            self.first_row = r0
+            self.skip_set = _parse_spec(skip_rows, column=False)
+
+    @staticmethod
+    def _bounds(ref):
+        min_col, min_row, max_col, max_row = range_boundaries(ref.upper())
+        return (
+            (min_row or 1) - 1,
+            (min_col or 1) - 1,
+            max_row - 1 if max_row else None,
+            max_col - 1 if max_col else None,
+        )
+
+    @classmethod
+    def from_options(cls, cell_range=None, columns=None, skip_rows=None):
+        """A SheetSelection, or None when no option is set."""
+        selection = cls(cell_range, columns, skip_rows)
+        return None if selection.is_full else selection
+
+    @property
+    def is_full(self):
+        return not self.cell_range and self.column_set is None and not self.skip_rows
+
+    @property
+    def needs_name(self):
+        return bool(self.cell_range) and self.bounds is None
+
+    def resolved(self, defined_names, sheet_name=None):
+        """
+        Resolve a defined-name range against {name: reference} of a workbook.
+        Returns a SheetSelection over the plain A1 range.
+        """
+        if not self.needs_name:
+            return self
+        wanted = self.cell_range.casefold()
+        ref = None
+        for name, value in (defined_names or {}).items():
+            if name.casefold() == wanted:
+                ref = value
+                break
+        if ref is None:
+            raise ValueError(f"'{self.cell_range}' is neither a cell range nor a defined name.")
+        ref_sheet, cells = _split_sheet_ref(ref)
+        if ref_sheet and sheet_name and ref_sheet != sheet_name:
+            raise ValueError(f"Defined name '{self.cell_range}' refers to sheet '{ref_sheet}'.")
+        return SheetSelection(cells, self.columns, self.skip_rows)
+
+    def key(self):
+        """Stable string for cache keys."""
+        cols = ",".join(str(c) for c in sorted(self.column_set)) if self.column_set is not None else ""
+        skip = ",".join(str(r) for r in sorted(self.skip_set)) if self.skip_set is not None else ""
+        return f"range={self.cell_range or ''};cols={cols};first={self.first_row};skip={skip}"
+
+    def wants_row(self, r):
+        if r < self.first_row:
+            return False
+        if self.bounds and self.bounds[2] is not None and r > self.bounds[2]:
+            return False
+        return self.skip_set is None or r not in self.skip_set
+
+    def wants_col(self, c):
+        if self.bounds:
+            if c < self.bounds[1] or (self.bounds[3] is not None and c > self.bounds[3]):
+                return False
+        return self.column_set is None or c in self.column_set
+
+    def wants(self, r, c):
+        return self.wants_row(r) and self.wants_col(c)
+
+    @property
+    def last_row(self):
+        """Last 0-based row that can be wanted, or None when open-ended."""
+        return self.bounds[2] if self.bounds else None
@@ -0,0 +1,651 @@
+"""Array-backed container for one loaded worksheet."""
+import datetime
+import json
+
+import numpy as np
+import pandas as pd
+
+from excel.align import positioned, row_hashes
+from excel.diff import style_signature
+from excel.formulas import FormulaTable, MAX_COLUMNS
+from excel.styles import StyleMap, StyleTable
+
+
+def object_array(items):
+    """Build a 1-D object array without letting numpy coerce mixed values."""
+    arr = np.empty(len(items), dtype=object)
+    arr[:] = items
+    return arr
+
+
+# Salts keeping the value, style and formula parts of a row hash apart
+_STYLE_SALT = 1
+_FORMULA_SALT = 2
+
+# Value kinds used by the columnar encoding (see encode_values)
+KIND_EMPTY = 0
+KIND_FLOAT = 1
+KIND_INT = 2
+KIND_BOOL = 3
+KIND_STR = 4
+KIND_DATETIME = 5
+KIND_TIME = 6
+KIND_TIMEDELTA = 7
+
+
+def _is_missing(value):
+    if value is None:
+        return True
+    try:
+        return bool(pd.isna(value))
+    except (TypeError, ValueError):
+        return False
+
+
+class SheetData:
+    """
+    Compact contents of one worksheet.
+
+    - values: dense (rows, cols) object array of cached cell values
+    - style_ids: (rows, cols) int32 matrix of ids into style_table
+    - formula_index / formula_ids: sorted flat positions (row * cols + col)
+      of formula cells and the id of their canonical key in formula_table
+      (excel.formulas), so formulas cost nothing where absent and a formula
+      filled down a column is stored once
+    - formula_origins: optional flat positions (row * MAX_COLUMNS + col) of
+      the cell each formula was written in, once take_rows / take_columns
+      moved it; A1 texts are rendered there
+    - col_widths / row_heights: float64 arrays, NaN where the sheet uses the default
+    - merges: list of (row, col, row_span, col_span)
+    - declared_extent: (rows, cols) the file claims, before trailing empty
+      rows/columns were trimmed; the trimmed extent is ``shape``
+    - value_hashes: optional precomputed row_hashes() of the values (the
+      parse cache stores them)
+    """
+
+    def __init__(self, values, style_ids, style_table, formula_index, formula_ids, formula_table,
+                 merges=None, col_widths=None, row_heights=None, name=None, declared_extent=None,
+                 value_hashes=None, formula_origins=None):
+        self.values = values
+        self.style_ids = style_ids
+        self.style_table = style_table
+        self.formula_index = formula_index
+        self.formula_ids = formula_ids
+        self.formula_table = formula_table
+        self.formula_origins = formula_origins
+        self.merges = merges or []
+        n_rows, n_cols = values.shape
+        self.col_widths = col_widths if col_widths is not None else np.full(n_cols, np.nan, dtype=np.float64)
+        self.row_heights = row_heights if row_heights is not None else np.full(n_rows, np.nan, dtype=np.float64)
+        self.name = name
+        self.declared_extent = tuple(declared_extent) if declared_extent else (n_rows, n_cols)
+        self._df = None
+        # Row hash parts, computed once: "values", ("styles", ignore_number_format), "formulas"
+        self._hashes = {}
+        if value_hashes is not None:
+            self._hashes["values"] = value_hashes
+
+    # ------------------------------------------------------------------ shape
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    @property
+    def n_rows(self):
+        return self.values.shape[0]
+
+    @property
+    def n_cols(self):
+        return self.values.shape[1]
+
+    @property
+    def is_trimmed(self):
+        """True when the declared extent was larger than the used range."""
+        return self.declared_extent != self.shape
+
+    @property
+    def df(self):
+        """DataFrame view over the value matrix (built once, without copying)."""
+        if self._df is None:
+            self._df = pd.DataFrame(self.values, copy=False)
+        return self._df
+
+    # ---------------------------------------------------------------- values
+
+    def value(self, r, c):
+        """Cell value, or None when out of range or empty."""
+        if r < 0 or c < 0 or r >= self.n_rows or c >= self.n_cols:
+            return None
+        v = self.values[r, c]
+        if _is_missing(v):
+            return None
+        return v
+
+    def rows(self, fill=None):
+        """Values as a list of row lists, with empty cells replaced by ``fill``."""
+        return [[fill if _is_missing(v) else v for v in row] for row in self.values.tolist()]
+
+    # ---------------------------------------------------------------- styles
+
+    def style_id(self, r, c):
+        if r < 0 or c < 0 or r >= self.n_rows or c >= self.n_cols:
+            return 0
+        return int(self.style_ids[r, c])
+
+    def style(self, r, c):
+        """Shared style dict of a cell; treat it as read-only."""
+        return self.style_table.styles[self.style_id(r, c)]
+
+    # -------------------------------------------------------------- formulas
+
+    def formula(self, r, c):
+        if r < 0 or c < 0 or r >= self.n_rows or c >= self.n_cols or not len(self.formula_index):
+            return None
+        pos = r * self.n_cols + c
+        i = int(np.searchsorted(self.formula_index, pos))
+        if i < len(self.formula_index) and self.formula_index[i] == pos:
+            return self.formula_texts([i])[0]
+        return None
+
+    def has_formulas(self):
+        return len(self.formula_index) > 0
+
+    def _origins(self):
+        """Flat (row * MAX_COLUMNS + col) cell each formula was written in."""
+        if self.formula_origins is not None:
+            return self.formula_origins
+        rows, cols = np.divmod(self.formula_index, max(self.n_cols, 1))
+        return rows * MAX_COLUMNS + cols
+
+    def formula_texts(self, indices=None):
+        """A1 texts of the formulas, all or those at ``indices`` into formula_index."""
+        ids = self.formula_ids if indices is None else self.formula_ids[indices]
+        origins = self._origins() if indices is None else self._origins()[indices]
+        rows, cols = np.divmod(origins, MAX_COLUMNS)
+        text = self.formula_table.text
+        return [text(i, r, c) for i, r, c in zip(ids.tolist(), rows.tolist(), cols.tolist())]
+
+    def iter_formulas(self):
+        """Yield ((row, col), formula_text) in row-major order."""
+        n_cols = self.n_cols
+        for pos, text in zip(self.formula_index.tolist(), self.formula_texts()):
+            yield divmod(pos, n_cols), text
+
+    def formula_mask(self):
+        mask = np.zeros(self.values.size, dtype=bool)
+        mask[self.formula_index] = True
+        return mask.reshape(self.values.shape)
+
+    # ------------------------------------------------------------ dimensions
+
+    def col_width(self, c):
+        if c < 0 or c >= len(self.col_widths) or np.isnan(self.col_widths[c]):
+            return None
+        return float(self.col_widths[c])
+
+    def row_height(self, r):
+        if r < 0 or r >= len(self.row_heights) or np.isnan(self.row_heights[r]):
+            return None
+        return float(self.row_heights[r])
+
+    def col_widths_dict(self):
+        idx = np.flatnonzero(~np.isnan(self.col_widths))
+        return {int(i): float(self.col_widths[i]) for i in idx}
+
+    def row_heights_dict(self):
+        idx = np.flatnonzero(~np.isnan(self.row_heights))
+        return {int(i): float(self.row_heights[i]) for i in idx}
+
+    # ------------------------------------------------------------ row hashes
+
+    def row_hashes(self, styles=False, formulas=False, ignore_number_format=False):
+        """
+        uint64 hash per row over the values and, optionally, the cell formats
+        and formulas (see excel.align.row_hashes). Rows whose hashes differ
+        between two sheets are the only ones a diff needs to look at; empty
+        cells add nothing, so an empty row hashes to 0 in any sheet.
+        """
+        hashes = self._hash_part("values", lambda: row_hashes(self.values))
+        if styles:
+            hashes = hashes + self._hash_part(
+                ("styles", ignore_number_format), lambda: self._style_hashes(ignore_number_format)
+            )
+        if formulas:
+            hashes = hashes + self._hash_part("formulas", self._formula_hashes)
+        return hashes
+
+    def _hash_part(self, key, compute):
+        part = self._hashes.get(key)
+        if part is None:
+            part = self._hashes[key] = compute()
+        return part
+
+    def _style_hashes(self, ignore_number_format):
+        # Styles compare by signature, which is shared across workbooks while
+        # style ids are not; a signature equal to no style at all adds nothing.
+        empty = style_signature({}, ignore_number_format)
+        signatures = [style_signature(style, ignore_number_format) for style in self.style_table.styles]
+        texts = object_array([repr(signature) for signature in signatures])
+        by_id = pd.util.hash_array(texts, categorize=False)
+        by_id[[signature == empty for signature in signatures]] = 0
+        hashes = np.zeros(self.n_rows, dtype=np.uint64)
+        if by_id.any():
+            for c in range(self.n_cols):
+                hashes += positioned(by_id[self.style_ids[:, c]], c, _STYLE_SALT)
+        return hashes
+
+    def _formula_hashes(self):
+        # Formulas hash by canonical key: a row keeps its hash when it moves
+        hashes = np.zeros(self.n_rows, dtype=np.uint64)
+        if self.has_formulas():
+            rows, cols = np.divmod(self.formula_index, self.n_cols)
+            by_id = pd.util.hash_array(object_array(self.formula_table.keys), categorize=False)
+            np.add.at(hashes, rows, positioned(by_id[self.formula_ids] | np.uint64(1), cols, _FORMULA_SALT))
+        return hashes
+
+    # ------------------------------------------------------------- alignment
+
+    def take_rows(self, rows):
+        """
+        New SheetData whose row i is this sheet's row rows[i]; -1 inserts an
+        empty gap row. Formulas, heights and merges follow their rows; a merge
+        is kept only while all of its rows stay consecutive.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        present = rows >= 0
+        n_cols = self.n_cols
+        values = np.full((len(rows), n_cols), None, dtype=object)
+        values[present] = self.values[rows[present]]
+        style_ids = np.zeros((len(rows), n_cols), dtype=np.int32)
+        style_ids[present] = self.style_ids[rows[present]]
+        row_heights = np.full(len(rows), np.nan, dtype=np.float64)
+        row_heights[present] = self.row_heights[rows[present]]
+
+        # source row -> aligned row
+        position = np.full(self.n_rows, -1, dtype=np.int64)
+        position[rows[present]] = np.flatnonzero(present)
+
+        f_rows, f_cols = np.divmod(self.formula_index, n_cols)
+        f_new = position[f_rows]
+        kept = np.flatnonzero(f_new >= 0)
+        f_positions = f_new[kept] * n_cols + f_cols[kept]
+        order = np.argsort(f_positions, kind="stable")
+        kept = kept[order]
+
+        merges = []
+        for r, c, r_span, c_span in self.merges:
+            if r + r_span > self.n_rows:
+                continue
+            mapped = position[r:r + r_span]
+            if mapped[0] >= 0 and np.array_equal(mapped, np.arange(mapped[0], mapped[0] + r_span)):
+                merges.append((int(mapped[0]), c, r_span, c_span))
+
+        value_hashes = None
+        if "values" in self._hashes:
+            # Gap rows are empty, and empty rows hash to 0
+            value_hashes = np.zeros(len(rows), dtype=np.uint64)
+            value_hashes[present] = self._hashes["values"][rows[present]]
+
+        return SheetData(
+            values,
+            style_ids,
+            self.style_table,
+            f_positions[order],
+            self.formula_ids[kept],
+            self.formula_table,
+            merges=merges,
+            col_widths=self.col_widths.copy(),
+            row_heights=row_heights,
+            name=self.name,
+            declared_extent=self.declared_extent,
+            value_hashes=value_hashes,
+            formula_origins=self._origins()[kept],
+        )
+
+    def take_columns(self, cols):
+        """
+        New SheetData whose column j is this sheet's column cols[j]; -1 inserts
+        an empty gap column. Formulas, widths and merges follow their columns;
+        a merge is kept only while all of its columns stay consecutive.
+        """
+        cols = np.asarray(cols, dtype=np.int64)
+        present = cols >= 0
+        n_cols = self.n_cols
+        values = np.full((self.n_rows, len(cols)), None, dtype=object)
+        values[:, present] = self.values[:, cols[present]]
+        style_ids = np.zeros((self.n_rows, len(cols)), dtype=np.int32)
+        style_ids[:, present] = self.style_ids[:, cols[present]]
+        col_widths = np.full(len(cols), np.nan, dtype=np.float64)
+        col_widths[present] = self.col_widths[cols[present]]
+
+        # source column -> aligned column
+        position = np.full(n_cols, -1, dtype=np.int64)
+        position[cols[present]] = np.flatnonzero(present)
+
+        f_rows, f_cols = np.divmod(self.formula_index, max(n_cols, 1))
+        f_new = position[f_cols]
+        kept = np.flatnonzero(f_new >= 0)
+        f_positions = f_rows[kept] * len(cols) + f_new[kept]
+        order = np.argsort(f_positions, kind="stable")
+        kept = kept[order]
+
+        merges = []
+        for r, c, r_span, c_span in self.merges:
+            if c + c_span > n_cols:
+                continue
+            mapped = position[c:c + c_span]
+            if mapped[0] >= 0 and np.array_equal(mapped, np.arange(mapped[0], mapped[0] + c_span)):
+                merges.append((r, int(mapped[0]), r_span, c_span))
+
+        return SheetData(
+            values,
+            style_ids,
+            self.style_table,
+            f_positions[order],
+            self.formula_ids[kept],
+            self.formula_table,
+            merges=merges,
+            col_widths=col_widths,
+            row_heights=self.row_heights.copy(),
+            name=self.name,
+            declared_extent=self.declared_extent,
+            formula_origins=self._origins()[kept],
+        )
+
+    # ----------------------------------------------------------- conversions
+
+    def to_legacy(self):
+        """Return the (df, styles, merges, formulas, col_widths, row_heights) tuple."""
+        styles = StyleMap(self.style_table)
+        rows, cols = np.nonzero(self.style_ids)
+        for r, c, sid in zip(rows.tolist(), cols.tolist(), self.style_ids[rows, cols].tolist()):
+            styles.set_id((r, c), sid)
+        formulas = dict(self.iter_formulas())
+        return self.df, styles, list(self.merges), formulas, self.col_widths_dict(), self.row_heights_dict()
+
+    def to_columns(self):
+        """
+        Encode the sheet as a flat dict of NumPy arrays (no pickled objects),
+        suitable for np.savez or shared memory.
+        """
+        columns = encode_values(self.values)
+        columns["style_ids"] = self.style_ids
+        columns["style_table"] = _json_bytes(self.style_table.styles)
+        columns["formula_index"] = self.formula_index
+        columns["formula_ids"] = self.formula_ids
+        columns["formula_offsets"], columns["formula_blob"] = encode_strings(self.formula_table.keys)
+        if self.formula_origins is not None:
+            columns["formula_origins"] = self.formula_origins
+        columns["merges"] = np.asarray(self.merges, dtype=np.int64).reshape(-1, 4)
+        columns["col_widths"] = self.col_widths
+        columns["row_heights"] = self.row_heights
+        columns["meta"] = _json_bytes({"name": self.name, "declared_extent": list(self.declared_extent)})
+        if "values" in self._hashes:
+            columns["value_hashes"] = self._hashes["values"]
+        return columns
+
+    @classmethod
+    def from_columns(cls, columns):
+        """Inverse of to_columns()."""
+        style_table = StyleTable()
+        for style in json.loads(bytes(columns["style_table"]).decode("utf-8"))[1:]:
+            style_table.intern(style)
+        meta = json.loads(bytes(columns["meta"]).decode("utf-8"))
+        return cls(
+            decode_values(columns),
+            np.asarray(columns["style_ids"], dtype=np.int32),
+            style_table,
+            np.asarray(columns["formula_index"], dtype=np.int64),
+            np.asarray(columns["formula_ids"], dtype=np.int32),
+            FormulaTable(decode_strings(columns["formula_offsets"], columns["formula_blob"])),
+            merges=[tuple(m) for m in np.asarray(columns["merges"]).tolist()],
+            col_widths=np.asarray(columns["col_widths"], dtype=np.float64),
+            row_heights=np.asarray(columns["row_heights"], dtype=np.float64),
+            name=meta.get("name"),
+            declared_extent=meta.get("declared_extent"),
+            value_hashes=np.asarray(columns["value_hashes"], dtype=np.uint64) if "value_hashes" in columns else None,
+            formula_origins=(
+                np.asarray(columns["formula_origins"], dtype=np.int64) if "formula_origins" in columns else None
+            ),
+        )
+
+    @classmethod
+    def from_legacy(cls, df, styles, merges, formulas, col_widths, row_heights, name=None, declared_extent=None):
+        """Build a SheetData from the load_excel_with_styles tuple."""
+        n_rows, n_cols = df.shape
+        values = np.empty((n_rows, n_cols), dtype=object)
+        values[:, :] = df.to_numpy(dtype=object)
+
+        style_table = styles.table if isinstance(styles, StyleMap) else StyleTable()
+        style_ids = np.zeros((n_rows, n_cols), dtype=np.int32)
+        if isinstance(styles, StyleMap):
+            for (r, c), sid in styles.ids.items():
+                if r < n_rows and c < n_cols:
+                    style_ids[r, c] = sid
+        elif styles:
+            for (r, c), style in styles.items():
+                if r < n_rows and c < n_cols:
+                    style_ids[r, c] = style_table.intern(style)
+
+        return cls(
+            values,
+            style_ids,
+            style_table,
+            *build_formula_index(formulas or {}, n_rows, n_cols),
+            merges=list(merges or []),
+            col_widths=dims_to_array(col_widths, n_cols),
+            row_heights=dims_to_array(row_heights, n_rows),
+            name=name,
+            declared_extent=declared_extent,
+        )
+
+
+def build_formula_index(formulas, n_rows, n_cols):
+    """Turn a {(row, col): text} dict into sorted flat positions, formula ids and their FormulaTable."""
+    table = FormulaTable()
+    items = [
+        (r * n_cols + c, table.intern(text, r, c))
+        for (r, c), text in formulas.items() if r < n_rows and c < n_cols
+    ]
+    items.sort(key=lambda item: item[0])
+    positions = np.fromiter((pos for pos, _id in items), dtype=np.int64, count=len(items))
+    ids = np.fromiter((formula_id for _pos, formula_id in items), dtype=np.int32, count=len(items))
+    return positions, ids, table
+
+
+
+def used_extent(used_rows, used_cols, merges):
+    """
+    Trimmed extent of a sheet from the 0-based positions of its used cells.
+
+    A cell is used when it has a value, a formula or a visible format; merges
+    anchored on a used cell extend the extent. Returns (n_rows, n_cols,
+    merges) with the merges dropped or clipped to the trimmed extent.
+    """
+    used_rows = np.asarray(used_rows, dtype=np.int64)
+    used_cols = np.asarray(used_cols, dtype=np.int64)
+    n_rows = int(used_rows.max()) + 1 if len(used_rows) else 1
+    n_cols = int(used_cols.max()) + 1 if len(used_cols) else 1
+
+    if merges:
+        anchors = np.array([r * MAX_COLUMNS + c for r, c, _rs, _cs in merges], dtype=np.int64)
+        anchored = np.isin(anchors, used_rows * MAX_COLUMNS + used_cols)
+        for (r_idx, c_idx, r_span, c_span), is_used in zip(merges, anchored.tolist()):
+            if is_used:
+                n_rows = max(n_rows, r_idx + r_span)
+                n_cols = max(n_cols, c_idx + c_span)
+
+    clipped = []
+    for r_idx, c_idx, r_span, c_span in merges:
+        if r_idx >= n_rows or c_idx >= n_cols:
+            continue
+        r_span = min(r_span, n_rows - r_idx)
+        c_span = min(c_span, n_cols - c_idx)
+        if r_span > 1 or c_span > 1:
+            clipped.append((r_idx, c_idx, r_span, c_span))
+    return n_rows, n_cols, clipped
+
+
+def dims_to_array(sizes, length):
+    """Turn a {index: size} dict into a float64 array with NaN for defaults."""
+    arr = np.full(length, np.nan, dtype=np.float64)
+    for idx, size in (sizes or {}).items():
+        if 0 <= idx < length and size:
+            arr[idx] = size
+    return arr
+
+
+def _json_bytes(obj):
+    return np.frombuffer(json.dumps(obj).encode("utf-8"), dtype=np.uint8)
+
+
+def encode_strings(strings):
+    """Pack strings into one UTF-8 blob plus character offsets."""
+    text = "".join(strings)
+    offsets = np.zeros(len(strings) + 1, dtype=np.int64)
+    if strings:
+        np.cumsum([len(item) for item in strings], out=offsets[1:])
+    return offsets, np.frombuffer(text.encode("utf-8"), dtype=np.uint8)
+
+
+def decode_strings(offsets, blob):
+    text = bytes(blob).decode("utf-8")
+    bounds = np.asarray(offsets).tolist()
+    return [text[bounds[i]:bounds[i + 1]] for i in range(len(bounds) - 1)]
+
+
+def encode_values(values):
+    """
+    Columnar encoding of a value matrix:
+      - kinds: uint8 matrix of KIND_* codes
+      - nums: int64 matrix holding ints, bools, float bits, and microsecond
+        counts for datetimes/times/timedeltas
+      - str_codes + str_offsets/str_blob: strings as codes into a unique table
+    """
+    shape = values.shape
+    flat = values.reshape(-1)
+    kinds = np.zeros(flat.size, dtype=np.uint8)
+    nums = np.zeros(flat.size, dtype=np.int64)
+    str_codes = np.full(flat.size, -1, dtype=np.int64)
+    types = np.frompyfunc(type, 1, 1)(flat) if flat.size else np.empty(0, dtype=object)
+
+    mask = types == float
+    nums[mask] = flat[mask].astype(np.float64).view(np.int64)
+    kinds[mask] = KIND_FLOAT
+
+    mask = types == bool
+    nums[mask] = flat[mask].astype(np.int64)
+    kinds[mask] = KIND_BOOL
+
+    mask = types == int
+    if mask.any():
+        try:
+            nums[mask] = flat[mask].astype(np.int64)
+            kinds[mask] = KIND_INT
+        except OverflowError:
+            # Huge integers only survive as floats
+            nums[mask] = flat[mask].astype(np.float64).view(np.int64)
+            kinds[mask] = KIND_FLOAT
+
+    mask = types == datetime.datetime
+    if mask.any():
+        stamps = np.array([v.replace(tzinfo=None) for v in flat[mask]], dtype="datetime64[us]")
+        nums[mask] = stamps.view(np.int64)
+        kinds[mask] = KIND_DATETIME
+
+    mask = types == datetime.timedelta
+    if mask.any():
+        nums[mask] = np.array(flat[mask].tolist(), dtype="timedelta64[us]").view(np.int64)
+        kinds[mask] = KIND_TIMEDELTA
+
+    mask = types == datetime.time
+    if mask.any():
+        nums[mask] = [
+            ((t.hour * 60 + t.minute) * 60 + t.second) * 1_000_000 + t.microsecond
+            for t in flat[mask]
+        ]
+        kinds[mask] = KIND_TIME
+
+    # Whatever is left (str, numpy scalars, dates, Timestamps...) goes
+    # through a per-cell fallback.
+    rest = np.flatnonzero((kinds == KIND_EMPTY) & (types != type(None)))
+    str_positions = []
+    str_items = []
+    for pos in rest.tolist():
+        v = flat[pos]
+        if isinstance(v, str):
+            str_positions.append(pos)
+            str_items.append(v)
+        elif isinstance(v, (bool, np.bool_)):
+            nums[pos] = int(v)
+            kinds[pos] = KIND_BOOL
+        elif isinstance(v, (int, np.integer)) and -2**63 <= int(v) < 2**63:
+            nums[pos] = int(v)
+            kinds[pos] = KIND_INT
+        elif isinstance(v, (float, np.floating, int)):
+            if not np.isnan(float(v)):
+                nums[pos] = np.float64(v).view(np.int64)
+                kinds[pos] = KIND_FLOAT
+        elif isinstance(v, datetime.datetime):
+            if not pd.isna(v):
+                nums[pos] = np.datetime64(v.replace(tzinfo=None), "us").view(np.int64)
+                kinds[pos] = KIND_DATETIME
+        elif isinstance(v, datetime.date):
+            nums[pos] = np.datetime64(v, "us").view(np.int64)
+            kinds[pos] = KIND_DATETIME
+        elif isinstance(v, datetime.timedelta):
+            nums[pos] = np.timedelta64(v, "us").view(np.int64)
+            kinds[pos] = KIND_TIMEDELTA
+        elif not _is_missing(v):
+            str_positions.append(pos)
+            str_items.append(str(v))
+
+    unique = []
+    if str_items:
+        codes, uniques = pd.factorize(object_array(str_items))
+        str_codes[np.asarray(str_positions, dtype=np.int64)] = codes
+        kinds[np.asarray(str_positions, dtype=np.int64)] = KIND_STR
+        unique = [str(u) for u in uniques]
+    str_offsets, str_blob = encode_strings(unique)
+
+    return {
+        "kinds": kinds.reshape(shape),
+        "nums": nums.reshape(shape),
+        "str_codes": str_codes.reshape(shape),
+        "str_offsets": str_offsets,
+        "str_blob": str_blob,
+    }
+
+
+def decode_values(columns):
+    """Inverse of encode_values(); returns the dense object matrix."""
+    kinds = np.asarray(columns["kinds"])
+    shape = kinds.shape
+    kinds = kinds.reshape(-1)
+    nums = np.asarray(columns["nums"]).reshape(-1)
+    values = np.empty(kinds.size, dtype=object)
+
+    mask = kinds == KIND_FLOAT
+    values[mask] = nums[mask].view(np.float64)
+    mask = kinds == KIND_INT
+    values[mask] = nums[mask]
+    mask = kinds == KIND_BOOL
+    values[mask] = nums[mask].astype(bool)
+    mask = kinds == KIND_DATETIME
+    if mask.any():
+        values[mask] = nums[mask].astype("datetime64[us]").astype(object)
+    mask = kinds == KIND_TIMEDELTA
+    if mask.any():
+        values[mask] = nums[mask].astype("timedelta64[us]").astype(object)
+    mask = kinds == KIND_TIME
+    if mask.any():
+        values[mask] = [
+            (datetime.datetime.min + datetime.timedelta(microseconds=int(us))).time()
+            for us in nums[mask]
+        ]
+    mask = kinds == KIND_STR
+    if mask.any():
+        strings = object_array(decode_strings(columns["str_offsets"], columns["str_blob"]))
+        values[mask] = strings[np.asarray(columns["str_codes"]).reshape(-1)[mask]]
+    return values.reshape(shape)
@@ -0,0 +1,97 @@
+"""Interned cell styles.
+
+A workbook has only a few hundred distinct cellXfs entries, but a sheet can
+have millions of cells. Styles are resolved once per distinct entry into a
+StyleTable and every cell only keeps the small integer id of its style.
+"""
+import numpy as np
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+class StyleTable:
+    """Distinct style dicts, indexed by id. Id 0 is always the empty style."""
+
+    def __init__(self):
+        self.styles = [{}]
+        self._index = {_freeze({}): 0}
+
+    def intern(self, style):
+        if not style:
+            return 0
+        key = _freeze(style)
+        style_id = self._index.get(key)
+        if style_id is None:
+            style_id = len(self.styles)
+            self.styles.append(style)
+            self._index[key] = style_id
+        return style_id
+
+    def __getitem__(self, style_id):
+        return self.styles[style_id]
+
+    def __len__(self):
+        return len(self.styles)
+
+    def is_visible(self, style_id):
+        """True when the style renders in an empty cell (fill or border)."""
+        style = self.styles[style_id]
+        return bool(style.get("bg") or style.get("border"))
+
+    def visible_ids(self):
+        """Bool array over style ids, see is_visible()."""
+        return np.fromiter((self.is_visible(i) for i in range(len(self.styles))), dtype=bool, count=len(self.styles))
+
+
+class StyleMap:
+    """
+    (row, col) -> style id, backed by a StyleTable.
+
+    get() keeps the old ``styles.get((r, c), {})`` call sites working and
+    returns the shared style dict, so callers must treat it as read-only.
+    """
+
+    def __init__(self, table=None):
+        self.table = table if table is not None else StyleTable()
+        self.ids = {}
+
+    def set(self, key, style):
+        style_id = self.table.intern(style)
+        if style_id:
+            self.ids[key] = style_id
+        return style_id
+
+    def set_id(self, key, style_id):
+        if style_id:
+            self.ids[key] = style_id
+
+    def style_id(self, key):
+        return self.ids.get(key, 0)
+
+    def get(self, key, default=None):
+        style_id = self.ids.get(key)
+        if style_id is None:
+            return default
+        return self.table.styles[style_id]
+
+    def __getitem__(self, key):
+        return self.table.styles[self.ids[key]]
+
+    def __contains__(self, key):
+        return key in self.ids
+
+    def __len__(self):
+        return len(self.ids)
+
+    def items(self):
+        styles = self.table.styles
+        for key, style_id in self.ids.items():
+            yield key, styles[style_id]
+
+    def to_dict(self):
+        return dict(self.items())
+
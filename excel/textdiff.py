@@ -0,0 +1,118 @@
+"""Intra-cell text diff.
+
+edit_script(old, new) finds the shortest edit script between two cell texts
+with Myers' O(ND) algorithm, after trimming their common prefix and suffix.
+Short texts are compared character by character, long ones word by word
+(runs of word characters, runs of whitespace, single punctuation marks).
+
+cell_diff() is what the view calls for the focused cell: it picks the
+granularity, falls back to words and then to a plain replacement when the
+texts differ too much, and keeps recent results in an LRU cache keyed by the
+text pair.
+"""
+import re
+from functools import lru_cache
+
+EQUAL = 0
+DELETE = 1
+INSERT = 2
+
+# Texts longer than this are compared word by word
+WORD_DIFF_CHARS = 200
+# Most edits searched for before giving up on a granularity; bounds the
+# O((N + M) * D) work for cells that have little in common
+MAX_EDIT_DISTANCE = 400
+CELL_DIFF_CACHE_SIZE = 256
+
+_TOKEN = re.compile(r"\w+|\s+|[^\w\s]")
+
+
+def tokenize(text, words=False):
+    """Characters of ``text``, or its word / whitespace / punctuation tokens."""
+    return _TOKEN.findall(text) if words else list(text)
+
+
+def _myers(a, b, max_d):
+    """(op, token) edits turning a into b, or None if that takes more than max_d edits."""
+    n, m = len(a), len(b)
+    v = {1: 0}
+    trace = []
+    for d in range(min(max_d, n + m) + 1):
+        trace.append(dict(v))
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[k - 1] < v[k + 1]):
+                x = v[k + 1]
+            else:
+                x = v[k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            v[k] = x
+            if x >= n and y >= m:
+                return _backtrack(trace, a, b)
+    return None
+
+
+def _backtrack(trace, a, b):
+    x, y = len(a), len(b)
+    edits = []
+    for d in range(len(trace) - 1, -1, -1):
+        v = trace[d]
+        k = x - y
+        prev_k = k + 1 if k == -d or (k != d and v[k - 1] < v[k + 1]) else k - 1
+        prev_x = v[prev_k]
+        prev_y = prev_x - prev_k
+        while x > prev_x and y > prev_y:
+            x -= 1
+            y -= 1
+            edits.append((EQUAL, a[x]))
+        if d:
+            edits.append((INSERT, b[prev_y]) if x == prev_x else (DELETE, a[prev_x]))
+        x, y = prev_x, prev_y
+    edits.reverse()
+    return edits
+
+
+def _segments(edits):
+    """Merge consecutive edits of one kind into (op, text) segments."""
+    segments = []
+    for op, token in edits:
+        if segments and segments[-1][0] == op:
+            segments[-1][1].append(token)
+        else:
+            segments.append((op, [token]))
+    return [(op, "".join(tokens)) for op, tokens in segments]
+
+
+def edit_script(old, new, words=False, max_distance=MAX_EDIT_DISTANCE):
+    """
+    Shortest edit script turning ``old`` into ``new`` as (op, text) segments
+    (op EQUAL, DELETE or INSERT), or None when more than ``max_distance``
+    tokens differ.
+    """
+    a = tokenize(old, words)
+    b = tokenize(new, words)
+    head = 0
+    while head < len(a) and head < len(b) and a[head] == b[head]:
+        head += 1
+    tail = 0
+    while tail < len(a) - head and tail < len(b) - head and a[-1 - tail] == b[-1 - tail]:
+        tail += 1
+    middle = _myers(a[head:len(a) - tail], b[head:len(b) - tail], max_distance)
+    if middle is None:
+        return None
+    edits = [(EQUAL, t) for t in a[:head]] + middle + [(EQUAL, t) for t in a[len(a) - tail:]]
+    return _segments(edits)
+
+
+@lru_cache(maxsize=CELL_DIFF_CACHE_SIZE)
+def cell_diff(old, new):
+    """Cached edit script between two cell texts, as a tuple of (op, text) segments."""
+    words = max(len(old), len(new)) > WORD_DIFF_CHARS
+    script = edit_script(old, new, words)
+    if script is None and not words:
+        script = edit_script(old, new, True)
+    if script is None:
+        script = [(op, text) for op, text in ((DELETE, old), (INSERT, new)) if text]
+    return tuple(script)
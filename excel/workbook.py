@@ -0,0 +1,165 @@
+"""Whole-workbook comparison.
+
+Sheets of the two workbooks are paired by name and every pair is diffed in a
+process pool. Each worker parses its pair through the parse cache, so opening
+a sheet afterwards only reads the cache and reuses the stored diff.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from excel.cache import load_sheet_cached
+from excel.engine import compare_dataframes
+
+STATUS_CHANGED = "changed"
+STATUS_IDENTICAL = "identical"
+STATUS_ADDED = "added"
+STATUS_REMOVED = "removed"
+STATUS_ERROR = "error"
+
+
+def _normalize_name(name):
+    return " ".join(str(name).split()).casefold()
+
+
+def pair_sheets(names1, names2):
+    """
+    Pair sheet names of two workbooks: exact matches first, then matches
+    ignoring case and surrounding/repeated whitespace. Returns a list of
+    (name1, name2) in workbook 1 order, followed by the sheets only found in
+    workbook 2; the missing side is None.
+    """
+    names1 = list(names1 or [])
+    names2 = list(names2 or [])
+    remaining = set(names2)
+    partner = {}
+
+    for name in names1:
+        if name in remaining:
+            partner[name] = name
+            remaining.discard(name)
+
+    loose = {}
+    for name in names2:
+        if name in remaining:
+            loose.setdefault(_normalize_name(name), name)
+    for name in names1:
+        if name in partner:
+            continue
+        match = loose.pop(_normalize_name(name), None)
+        if match is not None:
+            partner[name] = match
+            remaining.discard(match)
+
+    pairs = [(name, partner.get(name)) for name in names1]
+    pairs.extend((None, name) for name in names2 if name in remaining)
+    return pairs
+
+
+def compare_sheet_pair(file1, sheet1_name, file2, sheet2_name, selection=None, tolerance=None, align_rows=False,
+                       align_columns=False, header_row=None, key_columns=None):
+    """Load and diff one sheet pair. Runs in a worker process."""
+    sheet1 = load_sheet_cached(file1, sheet1_name, selection)
+    sheet2 = load_sheet_cached(file2, sheet2_name, selection)
+    return compare_dataframes(
+        sheet1.df, sheet2.df, tolerance, align_rows, align_columns, header_row, key_columns,
+        row_hashes=(sheet1.row_hashes(), sheet2.row_hashes()),
+    )
+
+
+def _entry(sheet1_name, sheet2_name, status, result=None, error=None):
+    summary = result["summary"] if result else {}
+    return {
+        "sheet1": sheet1_name,
+        "sheet2": sheet2_name,
+        "status": status,
+        "changes_count": summary.get("changes_count", 0),
+        "total_rows": summary.get("total_rows", 0),
+        "total_cols": summary.get("total_cols", 0),
+        "result": result,
+        "error": error,
+    }
+
+
+def _entry_for_result(sheet1_name, sheet2_name, result):
+    summary = result["summary"]
+    # Moved rows / columns carry no cell changes but still differ
+    changed = summary["changes_count"] or summary.get("blocks_moved") or summary.get("cols_moved")
+    status = STATUS_CHANGED if changed else STATUS_IDENTICAL
+    return _entry(sheet1_name, sheet2_name, status, result)
+
+
+def compare_workbooks(file1, file2, names1, names2, max_workers=None, progress=None, selection=None,
+                      tolerance=None, align_rows=False, align_columns=False, header_row=None,
+                      key_columns=None):
+    """
+    Diff every paired sheet of two workbooks concurrently.
+
+    Returns one entry dict per pair (see pair_sheets) with the status, change
+    count, dimensions and the full compare_dataframes result, so any sheet can
+    be opened later without diffing it again. ``progress(done, total)`` is
+    called as pairs complete. ``selection`` (a SheetSelection), ``tolerance``
+    (a NumericTolerance) and the alignment / key options of compare_dataframes
+    apply to every pair.
+    """
+    pairs = pair_sheets(names1, names2)
+    entries = [None] * len(pairs)
+    jobs = []
+    for i, (name1, name2) in enumerate(pairs):
+        if name1 is None:
+            entries[i] = _entry(name1, name2, STATUS_ADDED)
+        elif name2 is None:
+            entries[i] = _entry(name1, name2, STATUS_REMOVED)
+        else:
+            jobs.append(i)
+
+    total = len(jobs)
+    done = 0
+    if progress:
+        progress(done, total)
+
+    if max_workers is None:
+        max_workers = min(total, os.cpu_count() or 1)
+
+    pending = list(jobs)
+    if total > 1 and max_workers > 1:
+        try:
+            # spawn everywhere: forking a process that runs Qt threads is not safe.
+            ctx = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=max_workers, mp_context=ctx) as pool:
+                futures = {
+                    pool.submit(
+                        compare_sheet_pair, file1, pairs[i][0], file2, pairs[i][1],
+                        selection, tolerance, align_rows, align_columns, header_row, key_columns,
+                    ): i
+                    for i in jobs
+                }
+                for future in as_completed(futures):
+                    i = futures[future]
+                    name1, name2 = pairs[i]
+                    try:
+                        entries[i] = _entry_for_result(name1, name2, future.result())
+                    except Exception as e:
+                        entries[i] = _entry(name1, name2, STATUS_ERROR, error=str(e))
+                    done += 1
+                    if progress:
+                        progress(done, total)
+            pending = []
+        except Exception as e:
+            print(f"Workbook compare pool unavailable, comparing sequentially: {e}")
+            pending = [i for i in jobs if entries[i] is None]
+
+    for i in pending:
+        name1, name2 = pairs[i]
+        try:
+            entries[i] = _entry_for_result(name1, name2, compare_sheet_pair(
+                file1, name1, file2, name2, selection, tolerance, align_rows, align_columns, header_row,
+                key_columns,
+            ))
+        except Exception as e:
+            entries[i] = _entry(name1, name2, STATUS_ERROR, error=str(e))
+        done += 1
+        if progress:
+            progress(done, total)
+
+    return entries
@@ -0,0 +1,224 @@
+"""Direct reader for legacy .xls (BIFF) workbooks.
+
+Builds the same SheetData as the xlsx loaders straight from xlrd, without
+converting the workbook to a temporary .xlsx first. Only the requested sheet
+is parsed (``on_demand``), with its formatting. xlrd does not decode formula
+text, so .xls sheets carry cached values only.
+"""
+import numpy as np
+
+from openpyxl.utils.cell import get_column_letter
+from openpyxl.utils.datetime import from_excel, WINDOWS_EPOCH, MAC_EPOCH
+
+from excel.formulas import FormulaTable
+from excel.sheet import SheetData, object_array, dims_to_array, used_extent
+from excel.styles import StyleTable
+
+# xlrd alignment codes -> the openpyxl names used in style dicts
+_HORIZONTAL = {1: "left", 2: "center", 3: "right", 4: "fill", 5: "justify", 6: "centerContinuous", 7: "distributed"}
+_VERTICAL = {0: "top", 1: "center", 3: "justify", 4: "distributed"}
+# Colour index meaning "automatic" (system window text / background)
+_AUTO_COLOURS = {0x40, 0x41, 0x7FFF}
+
+
+def is_xls_file(file_path):
+    path = str(file_path).lower()
+    return path.endswith(".xls")
+
+
+def _open_book(file_path):
+    try:
+        import xlrd
+    except ImportError:
+        raise ValueError("Reading legacy .xls files requires 'xlrd' to be installed.")
+    return xlrd, xlrd.open_workbook(file_path, formatting_info=True, on_demand=True)
+
+
+def probe_xls(file_path):
+    """Sheet names and last author of an .xls file; only the workbook globals are read."""
+    _xlrd, book = _open_book(file_path)
+    try:
+        return {
+            "sheets": book.sheet_names(),
+            "last_saved_by": (book.user_name or "").strip() or None,
+        }
+    finally:
+        book.release_resources()
+
+
+def _colour_to_hex(book, index):
+    if index is None or index in _AUTO_COLOURS:
+        return None
+    rgb = book.colour_map.get(index)
+    if not rgb:
+        return None
+    return "#{:02X}{:02X}{:02X}".format(*rgb)
+
+
+def _build_xf_style(book, xf):
+    """The style dict _build_cell_style produces, from an xlrd XF record."""
+    cell_style = {}
+
+    background = xf.background
+    if background.fill_pattern:
+        hex_code = _colour_to_hex(book, background.pattern_colour_index)
+        if hex_code:
+            cell_style['bg'] = hex_code
+
+    font = book.font_list[xf.font_index]
+    font_style = {
+        'bold': bool(font.bold),
+        'italic': bool(font.italic),
+        'name': font.name,
+        'size': font.height / 20.0,
+    }
+    font_color = _colour_to_hex(book, font.colour_index)
+    if font_color:
+        font_style['color'] = font_color
+    cell_style['font'] = font_style
+
+    alignment = xf.alignment
+    cell_style['align'] = {
+        'horizontal': _HORIZONTAL.get(alignment.hor_align),
+        'vertical': _VERTICAL.get(alignment.vert_align),
+        'wrap_text': bool(alignment.text_wrapped) or None,
+    }
+
+    fmt = book.format_map.get(xf.format_key)
+    if fmt is not None and fmt.format_str:
+        cell_style['numfmt'] = fmt.format_str
+
+    border = xf.border
+    border_style = {}
+    if border.left_line_style: border_style['left'] = True
+    if border.right_line_style: border_style['right'] = True
+    if border.top_line_style: border_style['top'] = True
+    if border.bottom_line_style: border_style['bottom'] = True
+    if border_style:
+        cell_style['border'] = border_style
+
+    return cell_style
+
+
+def _xls_defined_names(book, sheet_index):
+    """{name: A1 reference} of the single-area names visible from a sheet."""
+    names = {}
+    for name in book.name_obj_list:
+        if name.scope not in (-1, sheet_index):
+            continue
+        try:
+            areas = name.area2d()
+        except Exception:
+            # Not a plain reference (constant, formula or multi-area name)
+            continue
+        _sheet, rlo, rhi, clo, chi = areas
+        if rhi <= rlo or chi <= clo:
+            continue
+        ref = f"{get_column_letter(clo + 1)}{rlo + 1}:{get_column_letter(chi)}{rhi}"
+        if name.scope == sheet_index or name.name not in names:
+            names[name.name] = ref
+    return names
+
+
+def load_xls_sheet(file_path, sheet_name=None, selection=None):
+    """Load one sheet of an .xls workbook into a SheetData."""
+    xlrd, book = _open_book(file_path)
+    try:
+        if sheet_name:
+            if sheet_name not in book.sheet_names():
+                raise ValueError(f"Sheet '{sheet_name}' not found in workbook.")
+            sheet = book.sheet_by_name(sheet_name)
+        else:
+            sheet = book.sheet_by_index(0)
+        if selection is not None and selection.needs_name:
+            sheet_index = book.sheet_names().index(sheet.name)
+            selection = selection.resolved(_xls_defined_names(book, sheet_index), sheet.name)
+        wanted = selection.wants if selection is not None else None
+
+        epoch = MAC_EPOCH if book.datemode == 1 else WINDOWS_EPOCH
+        style_table = StyleTable()
+        xf_style_ids = {}
+
+        def intern_xf(xf_index):
+            interned = xf_style_ids.get(xf_index)
+            if interned is None:
+                interned = style_table.intern(_build_xf_style(book, book.xf_list[xf_index]))
+                xf_style_ids[xf_index] = interned
+            return interned
+
+        cell_rows = []
+        cell_cols = []
+        cell_styles = []
+        cell_values = []
+        for r_idx in range(sheet.nrows):
+            if wanted and not selection.wants_row(r_idx):
+                continue
+            types = sheet.row_types(r_idx)
+            raw_values = sheet.row_values(r_idx)
+            for c_idx in range(len(types)):
+                if wanted and not wanted(r_idx, c_idx):
+                    continue
+                ctype = types[c_idx]
+                value = raw_values[c_idx]
+                if ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK):
+                    value = None
+                elif ctype == xlrd.XL_CELL_NUMBER:
+                    if value.is_integer():
+                        value = int(value)
+                elif ctype == xlrd.XL_CELL_DATE:
+                    try:
+                        value = from_excel(value, epoch)
+                    except (OverflowError, ValueError):
+                        value = "#VALUE!"
+                elif ctype == xlrd.XL_CELL_BOOLEAN:
+                    value = bool(value)
+                elif ctype == xlrd.XL_CELL_ERROR:
+                    value = xlrd.error_text_from_code.get(value, "#VALUE!")
+                cell_rows.append(r_idx)
+                cell_cols.append(c_idx)
+                cell_styles.append(intern_xf(sheet.cell_xf_index(r_idx, c_idx)))
+                cell_values.append(value)
+
+        merges = [
+            (rlo, clo, rhi - rlo, chi - clo)
+            for rlo, rhi, clo, chi in sheet.merged_cells
+            if (rhi - rlo > 1 or chi - clo > 1) and not (wanted and not wanted(rlo, clo))
+        ]
+        declared_extent = (max(sheet.nrows, 1), max(sheet.ncols, 1))
+        # colinfo widths are in 1/256 of a character, row heights in twips
+        col_widths = {c: info.width / 256.0 for c, info in sheet.colinfo_map.items() if info.width}
+        row_heights = {
+            r: info.height / 20.0
+            for r, info in sheet.rowinfo_map.items()
+            if info.height_mismatch and info.height
+        }
+    finally:
+        book.release_resources()
+
+    rows = np.asarray(cell_rows, dtype=np.int64)
+    cols = np.asarray(cell_cols, dtype=np.int64)
+    styles = np.asarray(cell_styles, dtype=np.int32)
+    used = np.fromiter((v is not None for v in cell_values), dtype=bool, count=len(cell_values))
+    used |= style_table.visible_ids()[styles]
+    n_rows, n_cols, merges = used_extent(rows[used], cols[used], merges)
+
+    keep = (rows < n_rows) & (cols < n_cols)
+    positions = rows[keep] * n_cols + cols[keep]
+    values = np.empty(n_rows * n_cols, dtype=object)
+    values[positions] = object_array(cell_values)[keep]
+    style_ids = np.zeros(n_rows * n_cols, dtype=np.int32)
+    style_ids[positions] = styles[keep]
+
+    return SheetData(
+        values.reshape(n_rows, n_cols),
+        style_ids.reshape(n_rows, n_cols),
+        style_table,
+        np.zeros(0, dtype=np.int64),
+        np.zeros(0, dtype=np.int32),
+        FormulaTable(),
+        merges=merges,
+        col_widths=dims_to_array(col_widths, n_cols),
+        row_heights=dims_to_array(row_heights, n_rows),
+        name=sheet_name,
+        declared_extent=declared_extent,
+    )
@@ -0,0 +1,534 @@
+"""Single-pass streaming reader for .xlsx worksheets.
+
+openpyxl needs two full loads (``data_only=True`` and ``data_only=False``) to
+get both the cached values and the formula text of a sheet, and builds a Cell
+object for every coordinate. This module streams the worksheet XML straight
+out of the zip archive instead, so every cell's cached value, formula and
+style index come out of one parse without holding the XML tree in memory.
+"""
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+
+from openpyxl.formula.translate import Translator
+from openpyxl.styles.numbers import BUILTIN_FORMATS, BUILTIN_FORMATS_MAX_SIZE
+from openpyxl.styles.stylesheet import Stylesheet
+from openpyxl.utils.cell import coordinate_to_tuple, get_column_letter, range_boundaries
+from openpyxl.utils.datetime import from_excel, from_ISO8601, WINDOWS_EPOCH, MAC_EPOCH
+
+CellFormat = namedtuple("CellFormat", ["font", "fill", "border", "alignment", "number_format"])
+
+# One parsed <row>: parallel lists of 0-based column indexes, cached values and
+# cellXfs style ids, plus a sparse {col: formula_text} dict.
+SheetRow = namedtuple("SheetRow", ["index", "columns", "values", "formulas", "style_ids"])
+
+DEFAULT_BLOCK_ROWS = 1000
+
+REL_TYPE_WORKSHEET = "worksheet"
+REL_TYPE_SHARED_STRINGS = "sharedStrings"
+REL_TYPE_STYLES = "styles"
+REL_TYPE_THEME = "theme"
+
+
+def _local(tag):
+    # Strip the namespace so transitional and strict OOXML files both work.
+    return tag.rsplit("}", 1)[-1]
+
+
+def _namespace(tag):
+    if tag.startswith("{"):
+        return tag[:tag.index("}") + 1]
+    return ""
+
+
+def _attr(element, name):
+    """Return an attribute by local name, whatever namespace it lives in."""
+    value = element.get(name)
+    if value is not None:
+        return value
+    for key, val in element.attrib.items():
+        if _local(key) == name:
+            return val
+    return None
+
+
+def _cast_number(value):
+    if "." in value or "E" in value or "e" in value:
+        return float(value)
+    return int(value)
+
+
+def _text_content(element):
+    """Concatenate plain and rich-text runs of an <si>/<is> element."""
+    parts = []
+    for child in element:
+        name = _local(child.tag)
+        if name == "t":
+            parts.append(child.text or "")
+        elif name == "r":
+            for run_child in child:
+                if _local(run_child.tag) == "t":
+                    parts.append(run_child.text or "")
+    return "".join(parts)
+
+
+class XlsxWorkbook:
+    """
+    Thin wrapper over an .xlsx zip archive exposing just what the loader needs:
+    sheet lookup, shared strings, the stylesheet and the theme XML.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.archive = zipfile.ZipFile(file_path)
+        self._shared_strings = None
+        self._stylesheet = None
+        self._theme_xml = None
+        self._read_workbook()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        if self.archive is not None:
+            self.archive.close()
+            self.archive = None
+
+    def _read_rels(self, part_path):
+        folder, name = posixpath.split(part_path)
+        rels_path = posixpath.join(folder, "_rels", f"{name}.rels")
+        rels = {}
+        try:
+            root = ET.fromstring(self.archive.read(rels_path))
+        except KeyError:
+            return rels
+        for rel in root:
+            target = rel.get("Target") or ""
+            if rel.get("TargetMode") == "External":
+                continue
+            if target.startswith("/"):
+                target = target[1:]
+            else:
+                target = posixpath.normpath(posixpath.join(folder, target))
+            rel_type = (rel.get("Type") or "").rsplit("/", 1)[-1]
+            rels[rel.get("Id")] = (rel_type, target)
+        return rels
+
+    def _read_workbook(self):
+        workbook_path = "xl/workbook.xml"
+        root_rels = self._read_rels("")
+        for rel_type, target in root_rels.values():
+            if rel_type == "officeDocument":
+                workbook_path = target
+                break
+        self.workbook_path = workbook_path
+        self.rels = self._read_rels(workbook_path)
+
+        root = ET.fromstring(self.archive.read(workbook_path))
+        self.epoch = WINDOWS_EPOCH
+        self.active_index = 0
+        self.sheets = []
+        # (name, localSheetId or None, reference) from <definedNames>
+        self.defined_name_list = []
+        for child in root:
+            name = _local(child.tag)
+            if name == "workbookPr":
+                if (child.get("date1904") or "").lower() in ("1", "true"):
+                    self.epoch = MAC_EPOCH
+            elif name == "bookViews":
+                for view in child:
+                    try:
+                        self.active_index = int(view.get("activeTab", 0))
+                    except ValueError:
+                        self.active_index = 0
+                    break
+            elif name == "sheets":
+                for sheet in child:
+                    rel_id = _attr(sheet, "id")
+                    rel_type, target = self.rels.get(rel_id, (None, None))
+                    self.sheets.append((sheet.get("name"), rel_type, target))
+            elif name == "definedNames":
+                for defined in child:
+                    local_id = defined.get("localSheetId")
+                    self.defined_name_list.append((
+                        defined.get("name") or "",
+                        int(local_id) if local_id and local_id.isdigit() else None,
+                        (defined.text or "").strip(),
+                    ))
+
+    def _part_for(self, rel_type):
+        for kind, target in self.rels.values():
+            if kind == rel_type:
+                return target
+        return None
+
+    @property
+    def sheetnames(self):
+        return [name for name, _rel_type, _target in self.sheets]
+
+    def active_sheet_name(self):
+        """Name of the sheet sheet_path(None) resolves to."""
+        target = self.sheet_path(None)
+        for name, _rel_type, part in self.sheets:
+            if part == target:
+                return name
+        return None
+
+    def defined_names(self, sheet_name=None):
+        """{name: reference} visible from a sheet; sheet-scoped names win over global ones."""
+        names = {}
+        local_index = self.sheetnames.index(sheet_name) if sheet_name in self.sheetnames else None
+        for name, local_id, ref in self.defined_name_list:
+            if local_id is None:
+                names.setdefault(name, ref)
+        for name, local_id, ref in self.defined_name_list:
+            if local_id is not None and local_id == local_index:
+                names[name] = ref
+        return names
+
+    def sheet_path(self, sheet_name=None):
+        if sheet_name:
+            for name, rel_type, target in self.sheets:
+                if name == sheet_name:
+                    if rel_type != REL_TYPE_WORKSHEET or not target:
+                        raise ValueError(f"Sheet '{sheet_name}' is not a worksheet.")
+                    return target
+            raise ValueError(f"Sheet '{sheet_name}' not found in workbook.")
+        worksheets = [(name, target) for name, rel_type, target in self.sheets if rel_type == REL_TYPE_WORKSHEET]
+        if not worksheets:
+            raise ValueError("Workbook contains no worksheets.")
+        index = self.active_index if 0 <= self.active_index < len(self.sheets) else 0
+        name, rel_type, target = self.sheets[index]
+        if rel_type != REL_TYPE_WORKSHEET:
+            return worksheets[0][1]
+        return target
+
+    def sheet_dimension(self, sheet_name):
+        """
+        (rows, cols) declared by a worksheet's <dimension>, or None. Only the
+        head of the sheet XML is parsed; reading stops at <sheetData>.
+        """
+        target = None
+        for name, rel_type, part in self.sheets:
+            if name == sheet_name and rel_type == REL_TYPE_WORKSHEET:
+                target = part
+        if not target or target not in self.archive.namelist():
+            return None
+        with self.archive.open(target) as source:
+            for _event, element in ET.iterparse(source, events=("start",)):
+                name = _local(element.tag)
+                if name == "dimension":
+                    ref = element.get("ref")
+                    try:
+                        _min_col, _min_row, max_c, max_r = range_boundaries(ref)
+                    except (TypeError, ValueError):
+                        return None
+                    return (max_r, max_c) if max_r and max_c else None
+                if name == "sheetData":
+                    return None
+        return None
+
+    def core_properties(self):
+        """creator / lastModifiedBy from docProps/core.xml (missing entries are None)."""
+        part = "docProps/core.xml"
+        for rel_type, target in self._read_rels("").values():
+            if rel_type == "core-properties":
+                part = target
+                break
+        props = {"creator": None, "lastModifiedBy": None}
+        try:
+            root = ET.fromstring(self.archive.read(part))
+        except KeyError:
+            return props
+        for child in root:
+            name = _local(child.tag)
+            if name in props:
+                props[name] = (child.text or "").strip() or None
+        return props
+
+    @property
+    def shared_strings(self):
+        if self._shared_strings is None:
+            strings = []
+            part = self._part_for(REL_TYPE_SHARED_STRINGS)
+            if part and part in self.archive.namelist():
+                # Stream the table: large exports carry hundreds of MB of strings.
+                with self.archive.open(part) as source:
+                    si_tag = None
+                    for _event, element in ET.iterparse(source, events=("end",)):
+                        if si_tag is None and _local(element.tag) == "si":
+                            si_tag = element.tag
+                        if element.tag == si_tag:
+                            strings.append(_text_content(element))
+                            element.clear()
+            self._shared_strings = strings
+        return self._shared_strings
+
+    @property
+    def stylesheet(self):
+        if self._stylesheet is None:
+            part = self._part_for(REL_TYPE_STYLES)
+            if part and part in self.archive.namelist():
+                self._stylesheet = Stylesheet.from_tree(ET.fromstring(self.archive.read(part)))
+            else:
+                self._stylesheet = Stylesheet()
+        return self._stylesheet
+
+    @property
+    def loaded_theme(self):
+        # Same attribute name as openpyxl's Workbook so _get_theme_colors works on both.
+        if self._theme_xml is None:
+            part = self._part_for(REL_TYPE_THEME)
+            if part and part in self.archive.namelist():
+                self._theme_xml = self.archive.read(part)
+            else:
+                self._theme_xml = b""
+        return self._theme_xml or None
+
+    def cell_format(self, style_id):
+        """Resolve a cellXfs index to its font, fill, border, alignment and number format."""
+        stylesheet = self.stylesheet
+        styles = stylesheet.cell_styles
+        if not styles:
+            return None
+        if style_id < 0 or style_id >= len(styles):
+            style_id = 0
+        xf = styles[style_id]
+
+        def pick(items, idx):
+            if 0 <= idx < len(items):
+                return items[idx]
+            return None
+
+        num_id = xf.numFmtId
+        if num_id < BUILTIN_FORMATS_MAX_SIZE:
+            number_format = BUILTIN_FORMATS.get(num_id, "General")
+        else:
+            number_format = pick(stylesheet.number_formats, num_id - BUILTIN_FORMATS_MAX_SIZE) or "General"
+        return CellFormat(
+            pick(stylesheet.fonts, xf.fontId),
+            pick(stylesheet.fills, xf.fillId),
+            pick(stylesheet.borders, xf.borderId),
+            pick(stylesheet.alignments, xf.alignmentId),
+            number_format,
+        )
+
+
+class SheetReader:
+    """
+    Streaming reader for one worksheet.
+
+    iter_blocks() walks the sheet XML with iterparse and yields lists of
+    SheetRow, clearing every parsed <row> so memory stays flat however many
+    rows the sheet has. Sheet-level metadata (merges, column widths, row
+    heights, extent) is filled in as the parse goes and is complete once the
+    iterator is exhausted.
+
+    With a SheetSelection (already resolved to an A1 range) cells outside it
+    are skipped before their value is decoded, and merges anchored outside it
+    are dropped.
+    """
+
+    def __init__(self, book, sheet_name=None, selection=None):
+        self.book = book
+        self.sheet_path = book.sheet_path(sheet_name)
+        self.selection = selection
+        self.max_row = 0
+        self.max_col = 0
+        # (rows, cols) from <dimension>, None when the sheet does not declare one
+        self.declared_extent = None
+        self.merges = []
+        self.col_ranges = []
+        self.row_heights = {}
+
+    @property
+    def col_widths(self):
+        col_widths = {}
+        for min_c, max_c, width in self.col_ranges:
+            for col in range(min_c, min(max_c, self.max_col) + 1):
+                col_widths[col - 1] = width
+        return col_widths
+
+    def iter_rows(self):
+        for block in self.iter_blocks():
+            yield from block
+
+    def iter_blocks(self, block_size=DEFAULT_BLOCK_ROWS):
+        book = self.book
+        shared_strings = book.shared_strings
+        stylesheet = book.stylesheet
+        date_formats = stylesheet.date_formats
+        timedelta_formats = stylesheet.timedelta_formats
+        epoch = book.epoch
+
+        selection = self.selection
+        last_row = selection.last_row if selection is not None else None
+        shared_formulae = {}
+        block = []
+        row_counter = 0
+        ns = None
+        tags = {}
+        sheet_data = None
+
+        with book.archive.open(self.sheet_path) as source:
+            for event, element in ET.iterparse(source, events=("start", "end")):
+                if ns is None:
+                    ns = _namespace(element.tag)
+                    tags = {name: ns + name for name in ("sheetData", "row", "c", "v", "f", "is", "col", "mergeCell", "dimension")}
+                tag = element.tag
+                if event == "start":
+                    if tag == tags["sheetData"]:
+                        sheet_data = element
+                    continue
+
+                if tag == tags["row"]:
+                    r_attr = element.get("r")
+                    row_counter = int(r_attr) if r_attr else row_counter + 1
+                    ht = element.get("ht")
+                    if ht is not None:
+                        try:
+                            self.row_heights[row_counter - 1] = float(ht)
+                        except ValueError:
+                            pass
+
+                    if last_row is not None and row_counter - 1 > last_row:
+                        # Past the selection; shared formula masters sit at the
+                        # top-left of their range, so none of them matter any more.
+                        element.clear()
+                        if sheet_data is not None:
+                            sheet_data.clear()
+                        continue
+                    row_wanted = selection is None or selection.wants_row(row_counter - 1)
+
+                    col_counter = 0
+                    columns = []
+                    values = []
+                    style_ids = []
+                    formulas = {}
+                    for cell in element:
+                        if cell.tag != tags["c"]:
+                            continue
+                        coordinate = cell.get("r")
+                        if coordinate:
+                            _row, col_counter = coordinate_to_tuple(coordinate)
+                        else:
+                            col_counter += 1
+
+                        if selection is not None and not (row_wanted and selection.wants_col(col_counter - 1)):
+                            # Skipped, but a shared formula master must still be
+                            # registered for the selected cells that reuse it.
+                            f_elem = cell.find(tags["f"])
+                            if f_elem is not None and f_elem.get("t") == "shared" and f_elem.text:
+                                si = f_elem.get("si")
+                                if si not in shared_formulae:
+                                    if not coordinate:
+                                        coordinate = f"{get_column_letter(col_counter)}{row_counter}"
+                                    shared_formulae[si] = Translator("=" + f_elem.text, coordinate)
+                            continue
+
+                        style_id = cell.get("s")
+                        style_id = int(style_id) if style_id else 0
+                        data_type = cell.get("t", "n")
+
+                        value = None
+                        if data_type == "inlineStr":
+                            child = cell.find(tags["is"])
+                            if child is not None:
+                                value = _text_content(child)
+                        else:
+                            raw = cell.findtext(tags["v"]) or None
+                            if raw is not None:
+                                if data_type == "n":
+                                    value = _cast_number(raw)
+                                    if style_id in date_formats:
+                                        try:
+                                            value = from_excel(value, epoch, timedelta=style_id in timedelta_formats)
+                                        except (OverflowError, ValueError):
+                                            value = "#VALUE!"
+                                elif data_type == "s":
+                                    value = shared_strings[int(raw)]
+                                elif data_type == "b":
+                                    value = bool(int(raw))
+                                elif data_type == "d":
+                                    value = from_ISO8601(raw)
+                                else:
+                                    # "str" (formula string result) and "e" (error) stay as text
+                                    value = raw
+
+                        formula = None
+                        f_elem = cell.find(tags["f"])
+                        if f_elem is not None:
+                            formula = "=" + (f_elem.text or "")
+                            f_type = f_elem.get("t")
+                            if f_type == "shared":
+                                si = f_elem.get("si")
+                                if not coordinate:
+                                    coordinate = f"{get_column_letter(col_counter)}{row_counter}"
+                                if si in shared_formulae:
+                                    formula = shared_formulae[si].translate_formula(coordinate)
+                                elif formula != "=":
+                                    shared_formulae[si] = Translator(formula, coordinate)
+                            elif f_type == "dataTable":
+                                formula = None
+                        elif isinstance(value, str) and value.startswith("="):
+                            formula = value
+
+                        columns.append(col_counter - 1)
+                        values.append(value)
+                        style_ids.append(style_id)
+                        if formula is not None:
+                            formulas[col_counter - 1] = formula
+                        if col_counter > self.max_col:
+                            self.max_col = col_counter
+
+                    element.clear()
+                    if sheet_data is not None:
+                        sheet_data.clear()
+
+                    if columns:
+                        if row_counter > self.max_row:
+                            self.max_row = row_counter
+                        block.append(SheetRow(row_counter - 1, columns, values, formulas, style_ids))
+                        if len(block) >= block_size:
+                            yield block
+                            block = []
+
+                elif tag == tags["col"]:
+                    width = element.get("width")
+                    if width:
+                        try:
+                            self.col_ranges.append((int(element.get("min")), int(element.get("max")), float(width)))
+                        except (TypeError, ValueError):
+                            pass
+
+                elif tag == tags["dimension"]:
+                    ref = element.get("ref")
+                    if ref:
+                        try:
+                            _min_col, _min_row, max_c, max_r = range_boundaries(ref)
+                            if max_r and max_c:
+                                self.declared_extent = (max_r, max_c)
+                        except ValueError:
+                            pass
+
+                elif tag == tags["mergeCell"]:
+                    ref = element.get("ref")
+                    if ref and ":" in ref:
+                        min_col, min_row, max_c, max_r = range_boundaries(ref)
+                        if selection is not None and not selection.wants(min_row - 1, min_col - 1):
+                            continue
+                        self.merges.append((min_row - 1, min_col - 1, max_r - min_row + 1, max_c - min_col + 1))
+
+        if block:
+            yield block
+
+        # openpyxl materialises every cell covered by a merge, so merges count towards the extent.
+        for r_idx, c_idx, r_span, c_span in self.merges:
+            self.max_row = max(self.max_row, r_idx + r_span)
+            self.max_col = max(self.max_col, c_idx + c_span)
+        self.max_row = max(self.max_row, 1)
+        self.max_col = max(self.max_col, 1)
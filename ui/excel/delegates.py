@@ -1,6 +1,6 @@
 from PyQt6.QtWidgets import QStyledItemDelegate
 from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QPen, QColor
+from PyQt6.QtGui import QPen, QColor, QBrush
 
 class BorderDelegate(QStyledItemDelegate):
     def paint(self, painter, option, index):
@@ -40,6 +40,13 @@ class BorderDelegate(QStyledItemDelegate):
             
             painter.restore()
 
+        # Gap row or column: it only exists in the other sheet (alignment)
+        if index.data(Qt.ItemDataRole.UserRole + 4):
+            painter.save()
+            painter.fillRect(option.rect, QColor("#f1f5f9"))
+            painter.fillRect(option.rect, QBrush(QColor("#cbd5e1"), Qt.BrushStyle.BDiagPattern))
+            painter.restore()
+
         diff_mask = index.data(Qt.ItemDataRole.UserRole + 2)
         if diff_mask:
             painter.save()
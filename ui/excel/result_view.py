@@ -19,6 +19,8 @@ from PyQt6.QtWidgets import (
     QComboBox,
     QProgressBar,
     QSplitter,
+    QHeaderView,
+    QAbstractItemView,
 )
 from PyQt6.QtGui import QColor, QIcon, QFont
 from PyQt6.QtCore import Qt, pyqtSignal, QEvent
@@ -26,6 +28,7 @@ from ui.excel.delegates import BorderDelegate
 from PyQt6.QtGui import QGuiApplication
 import numbers
 import math
+import numpy as np
 import re
 import os
 import subprocess
@@ -36,12 +39,17 @@ import html
 from PyQt6.QtGui import QAction, QKeySequence
 from ui.excel.find_dialog import FindDialog
 from ui.excel.filter_header import FilterHeader
+from excel.sheet import SheetData
+from excel.align import ColumnAlignment, RowAlignment, COL_MOVED, ROW_MOVED
+from excel.diff import DiffState, combine_masks, numeric_tolerance, NumericTolerance
+from excel.textdiff import cell_diff, EQUAL, DELETE, INSERT
 
 
 class ResultView(QWidget):
     swapRequested = pyqtSignal()
     viewModeChanged = pyqtSignal(str)
     sheetChangeRequested = pyqtSignal(int, str)
+    workbookSheetRequested = pyqtSignal(int)
     def __init__(self, on_back):
         super().__init__()
         # ... (layout setup)
@@ -58,19 +66,25 @@ class ResultView(QWidget):
         self.ignore_case = False
         self.ignore_whitespace = False
         self.ignore_number_format = False
+        # excel.diff.NumericTolerance, None for exact numeric comparison
+        self.numeric_tolerance = None
+        # excel.align.RowAlignment when rows were aligned, else None
+        self.row_alignment = None
+        # Aligned row -> description of its moved block, for rows of moved blocks
+        self.moved_rows = {}
+        # excel.align.ColumnAlignment when columns were aligned, else None
+        self.column_alignment = None
+        # Keys found more than once when records were matched by key
+        self.duplicate_key_count = 0
         self.only_changes = False
-        self.diff_map = {}
+        self.diff_map = np.zeros((0, 0), dtype=np.uint8)
+        # excel.diff.DiffState of the shown sheets, re-evaluated on option changes
+        self.diff_state = None
         self.diff_rows_content = set()
         self.diff_rows_format = set()
         self.diff_rows_formula = set()
-        self.df1 = None
-        self.df2 = None
-        self.styles1 = None
-        self.styles2 = None
-        self.merges1 = None
-        self.merges2 = None
-        self.formulas1 = {}
-        self.formulas2 = {}
+        self.sheet1 = None
+        self.sheet2 = None
         self.change_set = None
         self.total_rows = 0
         self.total_cols = 0
@@ -143,6 +157,20 @@ class ResultView(QWidget):
 
         formula_layout.addWidget(self.sync_toggle)
         self.layout.addLayout(formula_layout)
+
+        # Workbook summary (whole-workbook compare mode only)
+        self.workbook_summary = QTableWidget(0, 4)
+        self.workbook_summary.setObjectName("WorkbookSummary")
+        self.workbook_summary.setHorizontalHeaderLabels(["Original sheet", "Modified sheet", "Status", "Changed cells"])
+        self.workbook_summary.verticalHeader().setVisible(False)
+        self.workbook_summary.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.workbook_summary.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.workbook_summary.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.workbook_summary.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.workbook_summary.setMaximumHeight(150)
+        self.workbook_summary.setVisible(False)
+        self.workbook_summary.cellClicked.connect(lambda row, _col: self.workbookSheetRequested.emit(row))
+        self.layout.addWidget(self.workbook_summary)
         
         # Split View for Side-by-Side
         self.splitter = QSplitter(Qt.Orientation.Horizontal)
@@ -469,19 +497,47 @@ class ResultView(QWidget):
 
         row = r.topRow()
         col = r.leftColumn()
-        if grid is self.grid1:
-            formula = self.formulas1.get((row, col))
-            val = self.get_cell_value(self.df1, row, col)
-        else:
-            formula = self.formulas2.get((row, col))
-            val = self.get_cell_value(self.df2, row, col)
+        sheet = self.sheet1 if grid is self.grid1 else self.sheet2
+        formula = self.get_cell_formula(sheet, row, col)
+        val = self.get_cell_value(sheet, row, col)
 
 
         if formula and str(formula).startswith("="):
             self.highlight_formula_references(str(formula), grid)
         else:
             self.clear_reference_highlights()
-            self.formula_bar.setText("" if val is None else str(val))
+            diff_html = self.cell_diff_html(grid, row, col)
+            if diff_html:
+                self.formula_bar.setHtml(diff_html)
+            else:
+                self.formula_bar.setText("" if val is None else str(val))
+
+    def cell_diff_html(self, grid, row, col):
+        """
+        Formula bar HTML of a changed text cell: its deletions on the old side,
+        its insertions on the new side. Only made for the focused cell; the
+        edit script comes from cell_diff's cache when the pair was seen before.
+        """
+        if not (self.get_cell_diff_mask(row, col) & 1):
+            return None
+        item = grid.item(row, col)
+        if item is None or item.data(Qt.ItemDataRole.UserRole + 4):
+            return None
+        old = self.get_cell_value(self.sheet1, row, col)
+        new = self.get_cell_value(self.sheet2, row, col)
+        if old is None or new is None:
+            return None
+        if grid is self.grid2:
+            hidden, style = DELETE, "background-color:#bbf7d0; color:#166534;"
+        else:
+            hidden, style = INSERT, "background-color:#fecaca; color:#991b1b; text-decoration:line-through;"
+        html_parts = []
+        for op, text in cell_diff(str(old), str(new)):
+            if op == hidden:
+                continue
+            text = html.escape(text)
+            html_parts.append(text if op == EQUAL else f'<span style="{style}">{text}</span>')
+        return f'<span style="white-space:pre;">{"".join(html_parts)}</span>'
 
     def clear_reference_highlights(self, grid=None):
         target_grid = self.highlighted_grid or grid
@@ -582,7 +638,7 @@ class ResultView(QWidget):
         end = f"{self.get_col_letter(range_obj.rightColumn() + 1)}{range_obj.bottomRow() + 1}"
         return f"{start}:{end}"
 
-    def load_data(self, df1, df2, styles1, styles2, merges1, merges2, formulas1, formulas2, col_widths1, row_heights1, col_widths2, row_heights2, comparison_result, file1_name=None, file2_name=None):
+    def load_data(self, sheet1, sheet2, comparison_result, file1_name=None, file2_name=None):
         # ... Same as before ...
         summary = comparison_result['summary']
         self.status_info.setText("Loading...")
@@ -593,37 +649,34 @@ class ResultView(QWidget):
         total_rows = summary['total_rows']
         total_cols = summary['total_cols']
 
-        changes = comparison_result['changes']
-        
-        change_set = {}
-        for c in changes:
-            change_set[(c['row'], c['col'])] = c
-
-        self.df1 = df1
-        self.df2 = df2
-        self.styles1 = styles1
-        self.styles2 = styles2
-        self.merges1 = merges1
-        self.merges2 = merges2
-        self.formulas1 = formulas1 or {}
-        self.formulas2 = formulas2 or {}
+        # ChangeSet: looked up per cell, texts made only for shown tooltips
+        change_set = comparison_result['changes']
+
+        self.sheet1 = sheet1
+        self.sheet2 = sheet2
         self.change_set = change_set
+        alignment = comparison_result.get('alignment')
+        self.row_alignment = RowAlignment.from_dict(alignment) if alignment else None
+        self.moved_rows = self.build_moved_rows(self.row_alignment)
+        self.duplicate_key_count = comparison_result.get('summary', {}).get('duplicate_keys', 0)
+        column_alignment = comparison_result.get('column_alignment')
+        self.column_alignment = ColumnAlignment.from_dict(column_alignment) if column_alignment else None
         self.total_rows = total_rows
         self.total_cols = total_cols
-        self.base_col_widths1 = col_widths1 or {}
-        self.base_row_heights1 = row_heights1 or {}
-        self.base_col_widths2 = col_widths2 or {}
-        self.base_row_heights2 = row_heights2 or {}
+        self.base_col_widths1 = sheet1.col_widths_dict()
+        self.base_row_heights1 = sheet1.row_heights_dict()
+        self.base_col_widths2 = sheet2.col_widths_dict()
+        self.base_row_heights2 = sheet2.row_heights_dict()
         self.decimal_overrides1 = {}
         self.decimal_overrides2 = {}
         self.active_grid = None
         self.update_formula_bar(None)
 
-        self.diff_map = self.build_diff_map(df1, df2, styles1, styles2, formulas1, formulas2, total_rows, total_cols)
+        self.diff_map = self.build_diff_map(sheet1, sheet2, total_rows, total_cols)
         self.diff_rows_content, self.diff_rows_format, self.diff_rows_formula = self.build_diff_rows(self.diff_map)
 
-        self.populate_grid(self.grid1, df1, styles1, merges1, change_set, total_rows, total_cols, self.decimal_overrides1, col_widths1, row_heights1, is_new=False)
-        self.populate_grid(self.grid2, df2, styles2, merges2, change_set, total_rows, total_cols, self.decimal_overrides2, col_widths2, row_heights2, is_new=True)
+        self.populate_grid(self.grid1, sheet1, change_set, total_rows, total_cols, self.decimal_overrides1, apply_dimensions=True, is_new=False)
+        self.populate_grid(self.grid2, sheet2, change_set, total_rows, total_cols, self.decimal_overrides2, apply_dimensions=True, is_new=True)
         self.apply_row_filter()
         # Cache base sizes for zoom calculations
         self.base_table_font = QFont(self.grid1.font())
@@ -727,6 +780,42 @@ class ResultView(QWidget):
             self.sheet2_current = current_name
         self.hide_sheet_combo(side)
 
+    def set_workbook_summary(self, entries):
+        """Show the per-sheet results of a workbook compare; None hides the panel."""
+        table = self.workbook_summary
+        table.setRowCount(0)
+        if not entries:
+            table.setVisible(False)
+            return
+
+        status_colors = {
+            "changed": "#f97316",
+            "identical": "#10b981",
+            "added": "#3b82f6",
+            "removed": "#ef4444",
+            "error": "#ef4444",
+        }
+        table.setRowCount(len(entries))
+        for row, entry in enumerate(entries):
+            status = entry["status"]
+            if status in ("changed", "identical"):
+                count_text = f"{entry['changes_count']} ({entry['total_rows']} x {entry['total_cols']})"
+            else:
+                count_text = ""
+            cells = [entry["sheet1"] or "", entry["sheet2"] or "", status.capitalize(), count_text]
+            for col, text in enumerate(cells):
+                item = QTableWidgetItem(text)
+                if col == 2:
+                    item.setForeground(QColor(status_colors.get(status, "#334155")))
+                if status == "error" and entry.get("error"):
+                    item.setToolTip(entry["error"])
+                table.setItem(row, col, item)
+        table.setVisible(True)
+
+    def set_workbook_current(self, index):
+        if 0 <= index < self.workbook_summary.rowCount():
+            self.workbook_summary.selectRow(index)
+
     def on_sheet_combo_changed(self, side, name):
         if not name or name == "No sheets found":
             return
@@ -829,6 +918,20 @@ class ResultView(QWidget):
             base = f"{self.total_rows} rows x {self.total_cols} cols"
 
         tags = []
+        if self.row_alignment is not None:
+            counts = self.row_alignment.counts()
+            tags.append(
+                f"+{counts['rows_added']} / -{counts['rows_removed']} / ~{counts['rows_modified']} rows"
+            )
+            if counts['blocks_moved']:
+                tags.append(f"⇅ {counts['blocks_moved']} moved blocks ({counts['rows_moved']} rows)")
+        if self.duplicate_key_count:
+            tags.append(f"{self.duplicate_key_count} duplicate keys")
+        if self.column_alignment is not None:
+            counts = self.column_alignment.counts()
+            tags.append(
+                f"+{counts['cols_added']} / -{counts['cols_removed']} / ↔{counts['cols_moved']} cols"
+            )
         if self.only_changes:
             tags.append("Only changes")
         elif self.show_differences:
@@ -837,6 +940,11 @@ class ResultView(QWidget):
             tags.append("Filtered")
         if getattr(self, "view_mode", "normal") == "page_break":
             tags.append("Page Break")
+        trimmed = [s.declared_extent for s in (self.sheet1, self.sheet2) if s is not None and s.is_trimmed]
+        if trimmed:
+            declared_rows = max(extent[0] for extent in trimmed)
+            declared_cols = max(extent[1] for extent in trimmed)
+            tags.append(f"Trimmed from {declared_rows} x {declared_cols}")
 
         if tags:
             base = f"{base}  •  " + " | ".join(tags)
@@ -1015,7 +1123,7 @@ class ResultView(QWidget):
             for row_idx, height_px in base_row_heights.items():
                 table.setRowHeight(row_idx, max(18, int(height_px * scale)))
 
-    def populate_grid(self, table: QTableWidget, df, styles, merges, change_set, max_rows, max_cols, decimal_overrides, col_widths=None, row_heights=None, is_new=False):
+    def populate_grid(self, table: QTableWidget, sheet: SheetData, change_set, max_rows, max_cols, decimal_overrides, apply_dimensions=False, is_new=False):
         table.setUpdatesEnabled(False)
         table.setSortingEnabled(False)
         table.clearContents()
@@ -1047,7 +1155,20 @@ class ResultView(QWidget):
             }
         """)
         
-        headers = [self.get_col_letter(i + 1) for i in range(max_cols)]
+        # Aligned columns: label columns with their source letter, gaps stay blank
+        gap_cols = set()
+        moved_cols = {}
+        if self.column_alignment is not None and len(self.column_alignment) == max_cols:
+            alignment = self.column_alignment
+            source_cols = alignment.new_cols if is_new else alignment.old_cols
+            headers = [self.get_col_letter(c + 1) if c >= 0 else "" for c in source_cols.tolist()]
+            gap_cols = set(np.flatnonzero(source_cols < 0).tolist())
+            for i in np.flatnonzero(alignment.kinds == COL_MOVED).tolist():
+                old_letter = self.get_col_letter(int(alignment.old_cols[i]) + 1)
+                new_letter = self.get_col_letter(int(alignment.new_cols[i]) + 1)
+                moved_cols[i] = f"Column moved: {old_letter} → {new_letter}"
+        else:
+            headers = [self.get_col_letter(i + 1) for i in range(max_cols)]
         # table.setHorizontalHeaderLabels(headers) # We set model via items usually, but HeaderView needs labels.
         # However, we are replacing the header, so we need to ensure labels persist.
         # QTableWidget stores labels in a model item.
@@ -1057,7 +1178,11 @@ class ResultView(QWidget):
         table.setHorizontalHeader(header)
         table.setHorizontalHeaderLabels(headers)
         for i, label in enumerate(headers):
-            table.setHorizontalHeaderItem(i, QTableWidgetItem(label))
+            header_item = QTableWidgetItem(label)
+            if i in moved_cols:
+                header_item.setToolTip(moved_cols[i])
+                header_item.setForeground(QColor("#7c3aed"))
+            table.setHorizontalHeaderItem(i, header_item)
         header.setDefaultAlignment(Qt.AlignmentFlag.AlignCenter)
         table.horizontalHeader().setVisible(True)
         table.verticalHeader().setVisible(True)
@@ -1074,6 +1199,8 @@ class ResultView(QWidget):
         table.blockSignals(True)
         
         # Apply Custom Dimensions
+        col_widths = sheet.col_widths_dict() if apply_dimensions else None
+        row_heights = sheet.row_heights_dict() if apply_dimensions else None
         if col_widths:
             for col_idx, width in col_widths.items():
                 if col_idx < max_cols:
@@ -1096,20 +1223,28 @@ class ResultView(QWidget):
             
         table.horizontalHeader().setFixedHeight(25)
         table.verticalHeader().setFixedWidth(30)
-        
-        df_rows, df_cols = df.shape
 
+        # Aligned rows: label rows with their source row number, gaps stay blank
+        gap_rows = set()
+        if self.row_alignment is not None and len(self.row_alignment) == max_rows:
+            source_rows = self.row_alignment.new_rows if is_new else self.row_alignment.old_rows
+            table.setVerticalHeaderLabels([str(r + 1) if r >= 0 else "" for r in source_rows.tolist()])
+            gap_rows = set(np.flatnonzero(source_rows < 0).tolist())
+            table.verticalHeader().setFixedWidth(max(30, 8 * len(str(max_rows)) + 10))
+            for r, description in self.moved_rows.items():
+                header_item = table.verticalHeaderItem(r)
+                header_item.setToolTip(description)
+                header_item.setForeground(QColor("#7c3aed"))
+        else:
+            table.setVerticalHeaderLabels([str(r + 1) for r in range(max_rows)])
+        
         for r in range(max_rows):
             for c in range(max_cols):
-                cell_value = None
-                if r < df_rows and c < df_cols:
-                    v = df.iloc[r, c]
-                    if str(v) not in ('nan', 'NaT', 'None'):
-                         cell_value = v
+                cell_value = sheet.value(r, c)
 
                 # Apply Styles
                 bg_color = None
-                cell_style = styles.get((r, c), {}) if styles else {}
+                cell_style = sheet.style(r, c)
 
                 decimal_override = decimal_overrides.get((r, c), 0) if decimal_overrides else 0
                 display_value = self.format_cell_value(cell_value, cell_style, decimal_override)
@@ -1177,28 +1312,23 @@ class ResultView(QWidget):
                     if 'border' in cell_style:
                         item.setData(Qt.ItemDataRole.UserRole, cell_style['border'])
 
+                if r in gap_rows or c in gap_cols:
+                    # Row / column only exists on the other side
+                    item.setData(Qt.ItemDataRole.UserRole + 4, True)
+                    item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
+                    table.setItem(r, c, item)
+                    continue
+
                 # Apply Diff Marker (Preserve original fill + text colors)
-                diff_mask = self.get_cell_diff_mask(r, c)
-                if diff_mask:
-                    change_info = change_set.get((r, c))
-                    item.setData(Qt.ItemDataRole.UserRole + 2, diff_mask)
-                    tips = []
-                    if change_info and (diff_mask & 1):
-                        tips.append(f"Old: {change_info.get('old')}\nNew: {change_info.get('new')}")
-                    if diff_mask & 4:
-                        old_f = self.formulas1.get((r, c), "")
-                        new_f = self.formulas2.get((r, c), "")
-                        tips.append(f"Formula:\n{old_f}\n→ {new_f}")
-                    if diff_mask & 2:
-                        tips.append("Format changed")
-                    if tips:
-                        item.setToolTip("\n\n".join(tips))
+                self.apply_diff_marker(item, r, c)
+                if r in self.moved_rows:
+                    item.setToolTip(self.moved_rows[r])
                 
                 table.setItem(r, c, item)
 
         # Apply Merges
         # merges: list of (r, c, r_span, c_span)
-        for (r, c, r_span, c_span) in merges:
+        for (r, c, r_span, c_span) in sheet.merges:
             if r < max_rows and c < max_cols:
                 table.setSpan(r, c, r_span, c_span)
 
@@ -1233,12 +1363,12 @@ class ResultView(QWidget):
                 table.setColumnWidth(i, 50)
 
     def set_show_differences(self, enabled):
+        previous = self.visible_diff_map()
+        was_filtered = self.only_changes
         self.show_differences = bool(enabled)
-        ranges = self.capture_selection()
         if not self.show_differences:
             self.only_changes = False
-        self.refresh_view(ranges)
-        self.update_status_info()
+        self.update_diff_cells(previous, was_filtered)
 
     def is_light_text_on_light_bg(self, fg, bg):
         if not fg:
@@ -1253,7 +1383,13 @@ class ResultView(QWidget):
             return True
         return False
 
-    def set_diff_options(self, content=None, format=None, formula=None, only_changes=None, ignore_case=None, ignore_whitespace=None, ignore_number_format=None):
+    def set_diff_options(self, content=None, format=None, formula=None, only_changes=None, ignore_case=None, ignore_whitespace=None, ignore_number_format=None,
+                         abs_tolerance=None, rel_tolerance=None, ulp_tolerance=None):
+        previous = self.visible_diff_map()
+        was_filtered = self.only_changes
+        rediff = any(option is not None for option in (
+            ignore_case, ignore_whitespace, ignore_number_format, abs_tolerance, rel_tolerance, ulp_tolerance,
+        ))
         if content is not None:
             self.show_diff_content = bool(content)
         if format is not None:
@@ -1268,33 +1404,91 @@ class ResultView(QWidget):
             self.ignore_whitespace = bool(ignore_whitespace)
         if ignore_number_format is not None:
             self.ignore_number_format = bool(ignore_number_format)
+        if abs_tolerance is not None or rel_tolerance is not None or ulp_tolerance is not None:
+            current = self.numeric_tolerance or NumericTolerance()
+            self.numeric_tolerance = numeric_tolerance(
+                current.abs_tol if abs_tolerance is None else abs_tolerance,
+                current.rel_tol if rel_tolerance is None else rel_tolerance,
+                current.ulps if ulp_tolerance is None else ulp_tolerance,
+            )
         if not self.show_differences:
             self.only_changes = False
-        # Rebuild diff map when ignore options change
-        self.diff_map = self.build_diff_map(self.df1, self.df2, self.styles1, self.styles2, self.formulas1, self.formulas2, self.total_rows, self.total_cols)
-        self.diff_rows_content, self.diff_rows_format, self.diff_rows_formula = self.build_diff_rows(self.diff_map)
-        ranges = self.capture_selection()
-        self.refresh_view(ranges)
-        self.update_status_info()
-
-    def get_cell_diff_mask(self, row, col):
+        # Re-evaluate the kept diff state under the new options (candidate cells only)
+        if rediff and self.diff_state is not None:
+            self.diff_map = self.current_diff_map()
+            self.diff_rows_content, self.diff_rows_format, self.diff_rows_formula = self.build_diff_rows(self.diff_map)
+        self.update_diff_cells(previous, was_filtered)
+
+    def visible_diff_bits(self):
+        """DIFF_* bits currently shown for a cell."""
         if not self.show_differences:
             return 0
-        mask = self.diff_map.get((row, col), 0)
-        if mask == 0:
-            return 0
         if self.show_diff_content and self.show_diff_format:
-            if self.show_diff_formula:
-                return mask
-            return mask & 0b011
+            return 0b111 if self.show_diff_formula else 0b011
         if self.show_diff_content:
-            return mask & 0b001
+            return 0b001
         if self.show_diff_format:
-            return mask & 0b010
+            return 0b010
         if self.show_diff_formula:
-            return mask & 0b100
+            return 0b100
         return 0
 
+    def get_cell_diff_mask(self, row, col):
+        if row >= self.diff_map.shape[0] or col >= self.diff_map.shape[1]:
+            return 0
+        return int(self.diff_map[row, col]) & self.visible_diff_bits()
+
+    def visible_diff_map(self):
+        """Shown diff bits of the candidate cells (see DiffState.candidates)."""
+        if self.diff_state is None:
+            return np.zeros(0, dtype=np.uint8)
+        return self.diff_map.reshape(-1)[self.diff_state.candidates] & self.visible_diff_bits()
+
+    def apply_diff_marker(self, item, r, c):
+        """Set (or clear) the diff marker and tooltip of one cell item."""
+        diff_mask = self.get_cell_diff_mask(r, c)
+        if not diff_mask:
+            item.setData(Qt.ItemDataRole.UserRole + 2, None)
+            item.setToolTip("")
+            return
+        change_info = self.change_set.get((r, c))
+        item.setData(Qt.ItemDataRole.UserRole + 2, diff_mask)
+        tips = []
+        if change_info and (diff_mask & 1):
+            tips.append(f"Old: {change_info.get('old')}\nNew: {change_info.get('new')}")
+        if diff_mask & 4:
+            old_f = self.sheet1.formula(r, c) or ""
+            new_f = self.sheet2.formula(r, c) or ""
+            tips.append(f"Formula:\n{old_f}\n→ {new_f}")
+        if diff_mask & 2:
+            tips.append("Format changed")
+        item.setToolTip("\n\n".join(tips))
+
+    def update_diff_cells(self, previous, was_filtered):
+        """
+        Repaint only the cells whose shown diff changed since ``previous``
+        (a visible_diff_map()), instead of repopulating both grids.
+        """
+        if self.diff_state is not None and len(previous) == len(self.diff_state.candidates):
+            changed = self.diff_state.candidates[previous != self.visible_diff_map()]
+            n_cols = self.diff_map.shape[1]
+            for table in (self.grid1, self.grid2):
+                table.setUpdatesEnabled(False)
+                table.blockSignals(True)
+                for pos in changed.tolist():
+                    r, c = divmod(pos, n_cols)
+                    item = table.item(r, c)
+                    if item is None or item.data(Qt.ItemDataRole.UserRole + 4):
+                        continue
+                    self.apply_diff_marker(item, r, c)
+                table.blockSignals(False)
+                table.setUpdatesEnabled(True)
+        # Unhiding every row is only needed when the filter was on
+        if self.only_changes or was_filtered:
+            self.apply_row_filter()
+        else:
+            self.update_status_info()
+
     def apply_row_filter(self):
         if self.total_rows == 0:
             return
@@ -1306,7 +1500,7 @@ class ResultView(QWidget):
             return
         allowed = set()
         if self.show_diff_content:
-            allowed = allowed.union(self.diff_rows_content)
+            allowed = allowed.union(self.diff_rows_content, self.moved_rows)
         if self.show_diff_format:
             allowed = allowed.union(self.diff_rows_format)
         if self.show_diff_formula:
@@ -1318,95 +1512,55 @@ class ResultView(QWidget):
         self.update_status_info()
 
     def build_diff_rows(self, diff_map):
-        rows_content = set()
-        rows_format = set()
-        rows_formula = set()
-        for (r, _c), mask in diff_map.items():
-            if mask & 1:
-                rows_content.add(r)
-            if mask & 2:
-                rows_format.add(r)
-            if mask & 4:
-                rows_formula.add(r)
-        return rows_content, rows_format, rows_formula
-
-    def build_diff_map(self, df1, df2, styles1, styles2, formulas1, formulas2, max_rows, max_cols):
-        diff_map = {}
-        for r in range(max_rows):
-            for c in range(max_cols):
-                v1 = self.get_cell_value(df1, r, c)
-                v2 = self.get_cell_value(df2, r, c)
-                content_diff = not self.values_equal(v1, v2)
-
-                f1 = (formulas1 or {}).get((r, c))
-                f2 = (formulas2 or {}).get((r, c))
-                formula_diff = not self.formulas_equal(f1, f2)
-
-                s1 = styles1.get((r, c), {}) if styles1 else {}
-                s2 = styles2.get((r, c), {}) if styles2 else {}
-                format_diff = self.style_signature(s1) != self.style_signature(s2)
-
-                mask = 0
-                if content_diff:
-                    mask |= 1
-                if format_diff:
-                    mask |= 2
-                if formula_diff:
-                    mask |= 4
-                if mask:
-                    diff_map[(r, c)] = mask
+        def rows_with(bit):
+            return set(np.flatnonzero((diff_map & bit).any(axis=1)).tolist())
+        return rows_with(1), rows_with(2), rows_with(4)
+
+    def build_moved_rows(self, alignment):
+        """Aligned row -> "Rows a–b moved to c–d" for both places of every moved block."""
+        if alignment is None or not len(alignment.moves):
+            return {}
+        moves = alignment.moves[np.argsort(alignment.moves[:, 0])]
+        texts = [
+            f"Rows {old + 1}–{old + rows} moved to {new + 1}–{new + rows}"
+            for old, new, rows in moves.tolist()
+        ]
+        moved = np.flatnonzero(alignment.kinds == ROW_MOVED)
+        old_rows = alignment.old_rows[moved]
+        by_new = np.argsort(moves[:, 1])
+        block = np.where(
+            old_rows >= 0,
+            np.searchsorted(moves[:, 0], old_rows, side="right") - 1,
+            by_new[np.searchsorted(moves[by_new, 1], alignment.new_rows[moved], side="right") - 1],
+        )
+        return {r: texts[b] for r, b in zip(moved.tolist(), block.tolist())}
+
+    def build_diff_map(self, sheet1, sheet2, max_rows, max_cols):
+        self.diff_state = DiffState(sheet1, sheet2, max_rows, max_cols)
+        return self.current_diff_map()
+
+    def current_diff_map(self):
+        masks = self.diff_state.masks(
+            ignore_case=self.ignore_case,
+            ignore_whitespace=self.ignore_whitespace,
+            ignore_number_format=self.ignore_number_format,
+            tolerance=self.numeric_tolerance,
+        )
+        diff_map = combine_masks(masks)
+        if self.moved_rows:
+            # Moved rows are unchanged: shown as their block, not cell by cell
+            diff_map[np.fromiter(self.moved_rows, dtype=np.int64, count=len(self.moved_rows))] = 0
         return diff_map
 
-    def get_cell_value(self, df, r, c):
-        if df is None:
-            return None
-        if r >= df.shape[0] or c >= df.shape[1]:
+    def get_cell_value(self, sheet, r, c):
+        if sheet is None:
             return None
-        v = df.iloc[r, c]
-        if str(v) in ('nan', 'NaT', 'None'):
-            return None
-        return v
-
-    def values_equal(self, a, b):
-        if a is None and b is None:
-            return True
-        if a is None or b is None:
-            return False
-        if isinstance(a, numbers.Number) and isinstance(b, numbers.Number):
-            return float(a) == float(b)
-        return self.normalize_text(str(a)) == self.normalize_text(str(b))
-
-    def formulas_equal(self, a, b):
-        if a is None and b is None:
-            return True
-        if a is None or b is None:
-            return False
-        return self.normalize_text(str(a)) == self.normalize_text(str(b))
+        return sheet.value(r, c)
 
-    def normalize_text(self, value):
-        if not isinstance(value, str):
-            return value
-        text = value
-        if self.ignore_whitespace:
-            text = " ".join(text.split())
-        if self.ignore_case:
-            text = text.lower()
-        return text
-
-    def style_signature(self, style):
-        if not style:
-            style = {}
-        font = style.get('font', {})
-        align = style.get('align', {})
-        border = style.get('border', {})
-        numfmt = None if self.ignore_number_format else style.get('numfmt')
-        return (
-            style.get('bg'),
-            font.get('color'), font.get('bold'), font.get('italic'), font.get('size'), font.get('name'),
-            align.get('horizontal'), align.get('vertical'), align.get('wrap_text'),
-            bool(border.get('left')), bool(border.get('right')), bool(border.get('top')), bool(border.get('bottom')),
-            numfmt,
-        )
+    def get_cell_formula(self, sheet, r, c):
+        if sheet is None:
+            return None
+        return sheet.formula(r, c)
 
     def copy_selected_range(self):
         table = self._get_active_grid()
@@ -1444,10 +1598,10 @@ class ResultView(QWidget):
                         del overrides[key]
 
     def refresh_view(self, ranges=None):
-        if self.df1 is None or self.df2 is None:
+        if self.sheet1 is None or self.sheet2 is None:
             return
-        self.populate_grid(self.grid1, self.df1, self.styles1, self.merges1, self.change_set, self.total_rows, self.total_cols, self.decimal_overrides1, is_new=False)
-        self.populate_grid(self.grid2, self.df2, self.styles2, self.merges2, self.change_set, self.total_rows, self.total_cols, self.decimal_overrides2, is_new=True)
+        self.populate_grid(self.grid1, self.sheet1, self.change_set, self.total_rows, self.total_cols, self.decimal_overrides1, is_new=False)
+        self.populate_grid(self.grid2, self.sheet2, self.change_set, self.total_rows, self.total_cols, self.decimal_overrides2, is_new=True)
         self.apply_row_filter()
         if ranges:
             self.restore_selection(ranges)
@@ -1760,21 +1914,18 @@ class ResultView(QWidget):
         look_in = options['look_in']
         
         if look_in == "Formulas":
-            # Check formula dicts
-            if grid is self.grid1:
-                f = self.formulas1.get((r, c))
-            else:
-                f = self.formulas2.get((r, c))
+            # Check formulas
+            f = self.get_cell_formula(self.sheet1 if grid is self.grid1 else self.sheet2, r, c)
             
             if f and str(f).startswith("="):
                 return f
             # If no formula, does it fallback to value? Excel usually searches values if no formula? 
             # Actually Excel searches the displayed formula string usually.
             # If no formula, use value
-            return self.get_cell_value(self.df1 if grid is self.grid1 else self.df2, r, c)
+            return self.get_cell_value(self.sheet1 if grid is self.grid1 else self.sheet2, r, c)
             
         else: # Values
-             return self.get_cell_value(self.df1 if grid is self.grid1 else self.df2, r, c)
+             return self.get_cell_value(self.sheet1 if grid is self.grid1 else self.sheet2, r, c)
 
     def toggle_freeze(self):
         # Implementation of Freeze Panes
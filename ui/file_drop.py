@@ -1,6 +1,6 @@
 import os
 from datetime import datetime
-from openpyxl import load_workbook
+from excel.probe import probe_workbook
 from PyQt6.QtWidgets import QFrame, QVBoxLayout, QLabel, QFileDialog, QHBoxLayout, QWidget
 from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QDragEnterEvent, QDropEvent
@@ -169,14 +169,11 @@ class FileDropWidget(QFrame):
         authors = "Unknown"
         last_saved_by = "Unknown"
         try:
-            wb = load_workbook(file_path, read_only=True)
-            creator = wb.properties.creator or ""
-            last_mod = wb.properties.lastModifiedBy or ""
-            if creator:
-                authors = creator
-            if last_mod:
-                last_saved_by = last_mod
-            wb.close()
+            info = probe_workbook(file_path)
+            if info["author"]:
+                authors = info["author"]
+            if info["last_saved_by"]:
+                last_saved_by = info["last_saved_by"]
         except Exception:
             pass
 
@@ -20,6 +20,9 @@ from PyQt6.QtWidgets import (
     QCheckBox,
     QScrollArea,
     QSizePolicy,
+    QFormLayout,
+    QLineEdit,
+    QSpinBox,
 )
 from PyQt6.QtGui import QIcon, QAction, QPixmap, QPainter, QGuiApplication
 from PyQt6.QtCore import Qt, QThread, pyqtSignal, QSize, QByteArray, QPropertyAnimation, QEasingCurve, QRect, QTimer
@@ -34,7 +37,6 @@ import re
 import shutil
 import tempfile
 import subprocess
-from openpyxl import load_workbook
 from core.config import (
     get_last_open_dir,
     update_last_open_dir,
@@ -42,16 +44,23 @@ from core.config import (
     set_update_prompt_on_startup,
     set_pending_update,
     pop_pending_update,
+    get_numeric_tolerance,
+    set_numeric_tolerance,
 )
 from core.version import APP_VERSION, CURRENT_VERSION
 from core.update_manager import check_for_update
 from core.feedback_manager import submit_feedback
-from core.utils import convert_xls_to_xlsx
 
 # Add root to sys.path to ensure core imports work
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from excel.engine import load_excel_with_styles, compare_dataframes
+from excel.engine import compare_dataframes
+from excel.parallel import load_sheets
+from excel.workbook import compare_workbooks
+from excel.probe import probe_workbook
+from excel.xls_reader import is_xls_file
+from excel.selection import SheetSelection, parse_columns
+from excel.diff import numeric_tolerance
 
 
 class ClickableLabel(QLabel):
@@ -75,26 +84,97 @@ class UpdateCheckThread(QThread):
         self.finished.emit(info, err)
 
 class WorkerThread(QThread):
-    finished = pyqtSignal(object, object, object, object, object, object, object, object, object, object, object, object, object) 
-    # df1, df2, styles1, styles2, merges1, merges2, formulas1, formulas2, col_widths1, row_heights1, col_widths2, row_heights2, result
+    finished = pyqtSignal(object, object, object)
+    # sheet1, sheet2, result
     error = pyqtSignal(str)
 
-    def __init__(self, file1, file2, sheet1_name, sheet2_name):
+    def __init__(self, file1, file2, sheet1_name, sheet2_name, result=None,
+                 cell_range=None, columns=None, skip_rows=None, tolerance=None, align_rows=False,
+                 align_columns=False, key_columns=None):
         super().__init__()
         self.file1 = file1
         self.file2 = file2
         self.sheet1_name = sheet1_name
         self.sheet2_name = sheet2_name
+        # Precomputed compare result (workbook mode): only the sheets are loaded.
+        self.result = result
+        # Region / column subset / skipped rows, pushed down into the reader
+        self.cell_range = cell_range
+        self.columns = columns
+        self.skip_rows = skip_rows
+        # excel.diff.NumericTolerance for numeric cells
+        self.tolerance = tolerance
+        self.align_rows = align_rows
+        self.align_columns = align_columns
+        # Column indexes to match records on, None for positional rows
+        self.key_columns = key_columns
 
     def run(self):
         try:
-            # Load with styles
-            df1, raw_styles1, merges1, formulas1, col_widths1, row_heights1 = load_excel_with_styles(self.file1, self.sheet1_name)
-            df2, raw_styles2, merges2, formulas2, col_widths2, row_heights2 = load_excel_with_styles(self.file2, self.sheet2_name)
+            selection = SheetSelection.from_options(self.cell_range, self.columns, self.skip_rows)
+            # Load with styles (single XML pass per workbook, cached on disk,
+            # both workbooks parsed in parallel processes)
+            sheet1, sheet2 = load_sheets([
+                (self.file1, self.sheet1_name),
+                (self.file2, self.sheet2_name),
+            ], selection)
             
-            result = compare_dataframes(df1, df2)
+            result = self.result
+            if result is None:
+                # The first row of the region carries the column headers
+                header_row = selection.first_row if selection else 0
+                result = compare_dataframes(
+                    sheet1.df, sheet2.df, self.tolerance, self.align_rows, self.align_columns, header_row,
+                    self.key_columns, row_hashes=(sheet1.row_hashes(), sheet2.row_hashes()),
+                )
+            column_alignment = result.get("column_alignment")
+            if column_alignment:
+                # Matched columns side by side, with gap columns
+                sheet1 = sheet1.take_columns(column_alignment["old_cols"])
+                sheet2 = sheet2.take_columns(column_alignment["new_cols"])
+            alignment = result.get("alignment")
+            if alignment:
+                # Show both sheets in aligned order, with gap rows
+                sheet1 = sheet1.take_rows(alignment["old_rows"])
+                sheet2 = sheet2.take_rows(alignment["new_rows"])
             
-            self.finished.emit(df1, df2, raw_styles1, raw_styles2, merges1, merges2, formulas1, formulas2, col_widths1, row_heights1, col_widths2, row_heights2, result)
+            self.finished.emit(sheet1, sheet2, result)
+        except Exception as e:
+            self.error.emit(str(e) + "\n" + traceback.format_exc())
+
+class WorkbookWorkerThread(QThread):
+    finished = pyqtSignal(object)
+    # list of per-sheet entries (see excel.workbook.compare_workbooks)
+    progress = pyqtSignal(int, int)
+    error = pyqtSignal(str)
+
+    def __init__(self, file1, file2, sheet1_names, sheet2_names, tolerance=None, align_rows=False,
+                 align_columns=False, key_columns=None):
+        super().__init__()
+        self.file1 = file1
+        self.file2 = file2
+        self.sheet1_names = list(sheet1_names or [])
+        self.sheet2_names = list(sheet2_names or [])
+        self.tolerance = tolerance
+        self.align_rows = align_rows
+        self.align_columns = align_columns
+        self.key_columns = key_columns
+
+    def run(self):
+        try:
+            entries = compare_workbooks(
+                self.file1,
+                self.file2,
+                self.sheet1_names,
+                self.sheet2_names,
+                progress=self.progress.emit,
+                tolerance=self.tolerance,
+                align_rows=self.align_rows,
+                align_columns=self.align_columns,
+                header_row=0,
+                key_columns=self.key_columns,
+            )
+            self.finished.emit(entries)
         except Exception as e:
             self.error.emit(str(e) + "\n" + traceback.format_exc())
 
@@ -150,8 +230,10 @@ class MainWindow(QMainWindow):
         self.sheet1_names = []
         self.sheet2_names = []
         self.last_open_dir = get_last_open_dir()
-        self.file1_converted_path = None
-        self.file2_converted_path = None
+        # Workbook compare mode: per-sheet entries from the last full run
+        self.workbook_results = None
+        # Key columns spec ("A,C") for record matching, "" for positional rows
+        self.key_columns = ""
 
         # 2. Content Area (Stacked Pages)
         self.stack = QStackedWidget()
@@ -167,6 +249,8 @@ class MainWindow(QMainWindow):
         self.result_view.setObjectName("ResultView")
         self.result_view.swapRequested.connect(self.handle_result_swap)
         self.result_view.sheetChangeRequested.connect(self.on_result_sheet_change)
+        self.result_view.workbookSheetRequested.connect(self.on_workbook_sheet_requested)
+        self.result_view.numeric_tolerance = numeric_tolerance(*get_numeric_tolerance())
         self.stack.addWidget(self.result_view)
 
         self.connect_ribbon_actions()
@@ -362,6 +446,26 @@ class MainWindow(QMainWindow):
         self.ribbon_ignore_numfmt_action.setChecked(False)
         settings_menu.addAction(self.ribbon_ignore_numfmt_action)
 
+        settings_menu.addSeparator()
+        self.ribbon_align_rows_action = QAction("Align Rows", self)
+        self.ribbon_align_rows_action.setCheckable(True)
+        self.ribbon_align_rows_action.setChecked(False)
+        self.ribbon_align_rows_action.setToolTip("Match inserted and deleted rows instead of comparing row by row")
+        settings_menu.addAction(self.ribbon_align_rows_action)
+
+        self.ribbon_align_cols_action = QAction("Align Columns", self)
+        self.ribbon_align_cols_action.setCheckable(True)
+        self.ribbon_align_cols_action.setChecked(False)
+        self.ribbon_align_cols_action.setToolTip("Match inserted, deleted and moved columns by content and header")
+        settings_menu.addAction(self.ribbon_align_cols_action)
+
+        self.ribbon_key_columns_action = QAction("Key Columns...", self)
+        self.ribbon_key_columns_action.setToolTip("Match records on key columns instead of row position")
+        settings_menu.addAction(self.ribbon_key_columns_action)
+
+        self.ribbon_tolerance_action = QAction("Numeric Tolerance...", self)
+        settings_menu.addAction(self.ribbon_tolerance_action)
+
         self.ribbon_settings_btn.setMenu(settings_menu)
         compare_layout.addWidget(self.ribbon_settings_btn)
 
@@ -722,6 +826,10 @@ class MainWindow(QMainWindow):
         action_layout.addWidget(self.helper_label)
         action_layout.addStretch()
 
+        self.compare_all_check = QCheckBox("Compare all sheets")
+        self.compare_all_check.setToolTip("Pair sheets by name and compare the whole workbook")
+        action_layout.addWidget(self.compare_all_check)
+
         self.compare_btn = QPushButton("Compare Now")
         self.compare_btn.setObjectName("PrimaryButton")
         self.compare_btn.clicked.connect(self.start_comparison)
@@ -805,45 +913,18 @@ class MainWindow(QMainWindow):
 
 
     def set_file1(self, path):
-        self.file1_path = path # Original path for UI
-        self.file1_converted_path = None
-        
-        path_lower = path.lower()
-        if path_lower.endswith(".xls") and not path_lower.endswith(".xlsx"):
-            # Attempt convert
-            converted = convert_xls_to_xlsx(path)
-            if converted:
-                self.file1_converted_path = converted
-                # Use converted path for processing/loading sheets
-                # But keep original path for display in UI
-            else:
-                 QMessageBox.warning(self, "Format Warning", 
-                                   "This is a legacy .xls file and requires 'xlrd' to process.\n"
-                                   "Values will be compared, but some styles/formulas might be lost during conversion.")
-        
+        self.file1_path = path
+        self.workbook_results = None
+        # Legacy .xls files are read directly by the compare worker (no conversion).
         self.update_last_dir(path)
-        # Use converted path for internal processing if available
-        proc_path = self.file1_converted_path if self.file1_converted_path else path
-        self.populate_sheet_combo(self.sheet1_combo, proc_path, is_left=True)
+        self.populate_sheet_combo(self.sheet1_combo, path, is_left=True)
         self.check_ready()
 
     def set_file2(self, path):
-        self.file2_path = path # Original path for UI
-        self.file2_converted_path = None
-        
-        path_lower = path.lower()
-        if path_lower.endswith(".xls") and not path_lower.endswith(".xlsx"):
-            converted = convert_xls_to_xlsx(path)
-            if converted:
-                self.file2_converted_path = converted
-            else:
-                 QMessageBox.warning(self, "Format Warning", 
-                                   "This is a legacy .xls file and requires 'xlrd' to process.\n"
-                                   "Values will be compared, but some styles/formulas might be lost during conversion.")
-
+        self.file2_path = path
+        self.workbook_results = None
         self.update_last_dir(path)
-        proc_path = self.file2_converted_path if self.file2_converted_path else path
-        self.populate_sheet_combo(self.sheet2_combo, proc_path, is_left=False)
+        self.populate_sheet_combo(self.sheet2_combo, path, is_left=False)
         self.check_ready()
         
     def check_ready(self):
@@ -857,21 +938,112 @@ class MainWindow(QMainWindow):
             self.helper_label.setText("Select two files to compare.")
 
     def start_comparison(self):
+        if self.compare_all_check.isChecked():
+            self.start_workbook_comparison()
+        else:
+            self.start_sheet_comparison()
+
+    def start_sheet_comparison(self, result=None):
         # ... (UI updates) ...
-        f1 = self.file1_converted_path if self.file1_converted_path else self.file1_path
-        f2 = self.file2_converted_path if self.file2_converted_path else self.file2_path
+        f1 = self.file1_path
+        f2 = self.file2_path
         
         self.result_view.set_loading(True)
+        if result is None and not self.compare_all_check.isChecked():
+            self.workbook_results = None
+            self.result_view.set_workbook_summary(None)
         
-        self.worker = WorkerThread(f1, f2, self.sheet1_name, self.sheet2_name)
+        self.worker = WorkerThread(
+            f1, f2, self.sheet1_name, self.sheet2_name, result=result,
+            tolerance=self.result_view.numeric_tolerance,
+            align_rows=self.ribbon_align_rows_action.isChecked(),
+            align_columns=self.ribbon_align_cols_action.isChecked(),
+            key_columns=parse_columns(self.key_columns) or None,
+        )
         self.worker.finished.connect(self.on_comparison_finished)
         self.worker.error.connect(self.on_error)
         self.worker.start()
-        
-    def on_comparison_finished(self, df1, df2, s1, s2, m1, m2, f1, f2, cw1, rh1, cw2, rh2, result):
+
+    def start_workbook_comparison(self):
+        f1 = self.file1_path
+        f2 = self.file2_path
+
+        self.workbook_results = None
+        self.compare_btn.setEnabled(False)
+        self.compare_btn.setText("Comparing...")
+        self.result_view.set_loading(True)
+
+        self.workbook_worker = WorkbookWorkerThread(
+            f1, f2, self.sheet1_names, self.sheet2_names,
+            tolerance=self.result_view.numeric_tolerance,
+            align_rows=self.ribbon_align_rows_action.isChecked(),
+            align_columns=self.ribbon_align_cols_action.isChecked(),
+            key_columns=parse_columns(self.key_columns) or None,
+        )
+        self.workbook_worker.progress.connect(self.on_workbook_progress)
+        self.workbook_worker.finished.connect(self.on_workbook_comparison_finished)
+        self.workbook_worker.error.connect(self.on_error)
+        self.workbook_worker.start()
+
+    def on_workbook_progress(self, done, total):
+        if total:
+            self.compare_btn.setText(f"Comparing {done}/{total} sheets...")
+
+    def on_workbook_comparison_finished(self, entries):
+        self.workbook_results = entries
+        self.result_view.set_workbook_summary(entries)
+
+        paired = [i for i, e in enumerate(entries) if e["sheet1"] and e["sheet2"]]
+        if not paired:
+            self.on_error("No sheets with matching names were found in the two workbooks.")
+            return
+
+        # Open the selected pair if it was compared, else the first changed sheet.
+        index = self.find_workbook_entry(self.sheet1_name, self.sheet2_name)
+        if index is None:
+            changed = [i for i in paired if entries[i]["status"] == "changed"]
+            index = changed[0] if changed else paired[0]
+        self.open_workbook_entry(index)
+
+    def find_workbook_entry(self, sheet1_name, sheet2_name=None, side=None):
+        if not self.workbook_results:
+            return None
+        for i, entry in enumerate(self.workbook_results):
+            if side == 1 and entry["sheet1"] == sheet1_name and entry["sheet2"]:
+                return i
+            if side == 2 and entry["sheet2"] == sheet2_name and entry["sheet1"]:
+                return i
+            if side is None and entry["sheet1"] == sheet1_name and entry["sheet2"] == sheet2_name:
+                return i
+        return None
+
+    def open_workbook_entry(self, index):
+        entry = self.workbook_results[index]
+        if entry["status"] == "error":
+            self.on_error(f"Could not compare sheet '{entry['sheet1']}':\n{entry['error']}")
+            return
+        self.sheet1_name = entry["sheet1"]
+        self.sheet2_name = entry["sheet2"]
+        for combo, name in ((self.sheet1_combo, self.sheet1_name), (self.sheet2_combo, self.sheet2_name)):
+            if combo.isEnabled():
+                combo.blockSignals(True)
+                combo.setCurrentText(name)
+                combo.blockSignals(False)
+        self.result_view.set_workbook_current(index)
+        # The diff is already computed; only the parsed sheets are (re)loaded.
+        self.start_sheet_comparison(result=entry["result"])
+
+    def on_workbook_sheet_requested(self, index):
+        if not self.workbook_results or not (0 <= index < len(self.workbook_results)):
+            return
+        entry = self.workbook_results[index]
+        if entry["sheet1"] and entry["sheet2"]:
+            self.open_workbook_entry(index)
+
+    def on_comparison_finished(self, sheet1, sheet2, result):
         # When finished, we jump to Result View
         # Result View works with data, so we populate it
-        self.result_view.load_data(df1, df2, s1, s2, m1, m2, f1, f2, cw1, rh1, cw2, rh2, result, self.file1_path, self.file2_path)
+        self.result_view.load_data(sheet1, sheet2, result, self.file1_path, self.file2_path)
         self.result_view.set_loading(False)
         self.result_view.set_sheet_options(1, self.sheet1_names or [], self.sheet1_name)
         self.result_view.set_sheet_options(2, self.sheet2_names or [], self.sheet2_name)
@@ -883,6 +1055,11 @@ class MainWindow(QMainWindow):
         self.compare_btn.setText("Compare Now")
         self.compare_btn.setEnabled(True)
     
+    def on_alignment_toggled(self, _checked):
+        # Alignment changes the grid layout, so the shown result is recomputed.
+        if self.stack.currentWidget() is self.result_view and self.file1_path and self.file2_path:
+            self.start_comparison()
+
     def on_error(self, err_msg):
         QMessageBox.critical(self, "Error", err_msg)
         self.compare_btn.setText("Compare Now")
@@ -926,6 +1103,10 @@ class MainWindow(QMainWindow):
         self.ribbon_ignore_case_action.toggled.connect(lambda v: self.result_view.set_diff_options(ignore_case=v))
         self.ribbon_ignore_space_action.toggled.connect(lambda v: self.result_view.set_diff_options(ignore_whitespace=v))
         self.ribbon_ignore_numfmt_action.toggled.connect(lambda v: self.result_view.set_diff_options(ignore_number_format=v))
+        self.ribbon_tolerance_action.triggered.connect(self.open_tolerance_dialog)
+        self.ribbon_key_columns_action.triggered.connect(self.open_key_columns_dialog)
+        self.ribbon_align_rows_action.toggled.connect(self.on_alignment_toggled)
+        self.ribbon_align_cols_action.toggled.connect(self.on_alignment_toggled)
         if hasattr(self, "ribbon_view_group"):
             self.ribbon_view_group.idClicked.connect(
                 lambda idx: self.result_view.set_view_mode("normal" if idx == 0 else "page_break")
@@ -1256,6 +1437,92 @@ class MainWindow(QMainWindow):
 
         QTimer.singleShot(0, _apply)
 
+    def open_tolerance_dialog(self):
+        abs_tol, rel_tol, ulps = get_numeric_tolerance()
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Numeric Tolerance")
+        dialog.setMinimumWidth(360)
+
+        layout = QVBoxLayout(dialog)
+        note = QLabel("Numbers within any of these tolerances are treated as equal. Use 0 for an exact match.")
+        note.setWordWrap(True)
+        note.setStyleSheet("color: #64748b; font-size: 12px;")
+        layout.addWidget(note)
+
+        form = QFormLayout()
+        abs_input = QLineEdit(repr(abs_tol))
+        abs_input.setPlaceholderText("e.g. 1e-9")
+        form.addRow("Absolute:", abs_input)
+        rel_input = QLineEdit(repr(rel_tol))
+        rel_input.setPlaceholderText("e.g. 1e-12")
+        form.addRow("Relative:", rel_input)
+        ulp_input = QSpinBox()
+        ulp_input.setRange(0, 1_000_000)
+        ulp_input.setValue(ulps)
+        form.addRow("ULPs:", ulp_input)
+        layout.addLayout(form)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Cancel | QDialogButtonBox.StandardButton.Ok)
+        buttons.accepted.connect(lambda: self.save_tolerance(dialog, abs_input.text(), rel_input.text(), ulp_input.value()))
+        buttons.rejected.connect(dialog.reject)
+        layout.addWidget(buttons)
+
+        dialog.exec()
+
+    def open_key_columns_dialog(self):
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Key Columns")
+        dialog.setMinimumWidth(360)
+
+        layout = QVBoxLayout(dialog)
+        note = QLabel(
+            "Rows with the same values in these columns are compared as one record, "
+            "wherever they are in the sheet. Leave empty to compare rows by position."
+        )
+        note.setWordWrap(True)
+        note.setStyleSheet("color: #64748b; font-size: 12px;")
+        layout.addWidget(note)
+
+        form = QFormLayout()
+        key_input = QLineEdit(self.key_columns)
+        key_input.setPlaceholderText("e.g. A or A,C")
+        form.addRow("Columns:", key_input)
+        layout.addLayout(form)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Cancel | QDialogButtonBox.StandardButton.Ok)
+        buttons.accepted.connect(lambda: self.save_key_columns(dialog, key_input.text()))
+        buttons.rejected.connect(dialog.reject)
+        layout.addWidget(buttons)
+
+        dialog.exec()
+
+    def save_key_columns(self, dialog, text):
+        spec = (text or "").strip()
+        try:
+            parse_columns(spec)
+        except ValueError:
+            QMessageBox.warning(self, "Key Columns", "Please enter column letters, e.g. A or A,C:D.")
+            return
+        dialog.accept()
+        if spec == self.key_columns:
+            return
+        self.key_columns = spec
+        self.ribbon_key_columns_action.setText(f"Key Columns ({spec})..." if spec else "Key Columns...")
+        # Record matching changes the row layout, so the shown result is recomputed.
+        self.on_alignment_toggled(bool(spec))
+
+    def save_tolerance(self, dialog, abs_text, rel_text, ulps):
+        try:
+            abs_tol = float((abs_text or "0").strip())
+            rel_tol = float((rel_text or "0").strip())
+            numeric_tolerance(abs_tol, rel_tol, ulps)
+        except ValueError:
+            QMessageBox.warning(self, "Numeric Tolerance", "Please enter non-negative numbers, e.g. 0.001 or 1e-9.")
+            return
+        set_numeric_tolerance(abs_tol, rel_tol, ulps)
+        self.result_view.set_diff_options(abs_tolerance=abs_tol, rel_tolerance=rel_tol, ulp_tolerance=ulps)
+        dialog.accept()
+
     def save_feedback(self, dialog, text):
         content = (text or "").strip()
         if not content:
@@ -1408,11 +1675,10 @@ class MainWindow(QMainWindow):
         if not file_path:
             return []
         try:
-            wb = load_workbook(file_path, read_only=True)
-            names = list(wb.sheetnames)
-            wb.close()
-            return names
-        except Exception:
+            return list(probe_workbook(file_path)["sheets"])
+        except Exception as e:
+            if is_xls_file(file_path):
+                QMessageBox.warning(self, "Format Warning", f"Could not read the legacy .xls file.\n\n{e}")
             return []
 
     def populate_sheet_combo(self, combo, file_path, is_left):
@@ -1471,9 +1737,15 @@ class MainWindow(QMainWindow):
             self.sheet2_name = sheet_name
             if self.sheet2_combo.isEnabled():
                 self.sheet2_combo.setCurrentText(sheet_name)
+        if self.workbook_results:
+            # Workbook mode: follow the partner sheet and reuse the stored diff.
+            index = self.find_workbook_entry(self.sheet1_name, self.sheet2_name, side=side)
+            if index is not None:
+                self.open_workbook_entry(index)
+                return
         # Trigger comparison again if ready
         if self.file1_path and self.file2_path and self.sheet1_name and self.sheet2_name:
-            self.start_comparison()
+            self.start_sheet_comparison()
 
     def apply_global_styles(self):
         self.setStyleSheet("""